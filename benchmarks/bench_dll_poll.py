@@ -0,0 +1,91 @@
+# benchmarks/bench_dll_poll.py
+"""
+TelemetryDLL.poll(): jedno wywołanie get_snapshot() kontra sześć osobnych funkcji.
+
+Kompiluje stub biblioteki (kompilator C: zmienna CC, domyślnie 'cc') do katalogu
+tymczasowego i mierzy obie ścieżki providera na tym samym .so.
+
+Użycie:
+  python benchmarks/bench_dll_poll.py [liczba_pollów]
+"""
+from __future__ import annotations
+import os, subprocess, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ritt.telemetry.dll import TelemetryDLL  # noqa: E402
+
+STUB_C = r"""
+#include <stdint.h>
+
+typedef struct {
+    uint32_t size;
+    uint32_t flags;
+    int32_t  game_minutes;
+    int64_t  game_time_unix;
+    float    speed_ms;
+    int32_t  engine_on;
+    int32_t  parking_brake;
+    int32_t  paused;
+} RittSnapshot;
+
+static int32_t minutes = 7 * 24 * 60;
+
+int   get_game_time_minutes(void) { return ++minutes; }
+int   get_game_time_unix(void)    { return 0; }
+float get_speed_ms(void)          { return 22.5f; }
+int   get_engine_on(void)         { return 1; }
+int   get_parking_brake(void)     { return 0; }
+int   get_paused(void)            { return 0; }
+
+int get_snapshot(RittSnapshot *out) {
+    if (out->size < sizeof(RittSnapshot)) return 0;
+    out->flags = 1;
+    out->game_minutes = ++minutes;
+    out->game_time_unix = 0;
+    out->speed_ms = 22.5f;
+    out->engine_on = 1;
+    out->parking_brake = 0;
+    out->paused = 0;
+    return 1;
+}
+"""
+
+
+def build_stub(workdir: str) -> str:
+    src = os.path.join(workdir, "ritt_stub.c")
+    lib = os.path.join(workdir, "ritt_stub.dll" if sys.platform == "win32" else "ritt_stub.so")
+    with open(src, "w") as f:
+        f.write(STUB_C)
+    cc = os.environ.get("CC", "cc")
+    subprocess.run([cc, "-O2", "-shared", "-fPIC", "-o", lib, src], check=True)
+    return lib
+
+
+def bench(provider: TelemetryDLL, n: int) -> float:
+    poll = provider.poll
+    for _ in range(1000):
+        poll()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        poll()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main(argv):
+    n = int(argv[0]) if argv else 200000
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = build_stub(tmp)
+        snap = TelemetryDLL(lib, use_snapshot=True)
+        per_fn = TelemetryDLL(lib, use_snapshot=False)
+        assert snap.has_snapshot and not per_fn.has_snapshot
+        a, b = snap.poll(), per_fn.poll()
+        assert a["speed_kmh"] == b["speed_kmh"] and a["time_source"] == b["time_source"] == "dll:minutes"
+        print(f"polls: {n}")
+        print(f"{'path':<12}{'us/poll':>10}")
+        for name, p in (("snapshot", snap), ("per-function", per_fn)):
+            print(f"{name:<12}{bench(p, n):>10.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
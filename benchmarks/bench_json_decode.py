@@ -0,0 +1,127 @@
+# benchmarks/bench_json_decode.py
+"""
+Porównanie dekodowania odpowiedzi Funbit: czas i alokacje.
+
+Warianty:
+  json+copy   – dawny provider: json.loads(text) + dict(data) + kopia 'truck',
+  json        – json.loads(bytes),
+  sections    – jsondecode.decode_sections() (loads() + tylko gałęzie mappera),
+  orjson      – jsondecode.loads() z orjson (jeśli zainstalowany).
+
+Użycie:
+  python benchmarks/bench_json_decode.py [nagranie.json | nagranie.jsonl ...]
+Bez argumentów używa syntetycznego ładunku w układzie Funbit (z dodatkową,
+nieużywaną gałęzią 'trailers', jaką wysyłają nowsze wersje serwera).
+"""
+from __future__ import annotations
+import json, os, sys, time, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ritt.telemetry import jsondecode  # noqa: E402
+
+
+def synthetic_payload(extra_trailers: int = 10) -> bytes:
+    vec = {"x": 1234.5678, "y": 45.25, "z": -9876.125}
+    placement = dict(vec, heading=0.25, pitch=0.01, roll=-0.002)
+    truck = {k: 0.0 for k in (
+        "cruiseControlSpeed", "fuel", "fuelCapacity", "fuelAverageConsumption", "fuelWarningFactor",
+        "wearEngine", "wearTransmission", "wearCabin", "wearChassis", "wearWheels", "userSteer",
+        "userThrottle", "userBrake", "userClutch", "gameSteer", "gameThrottle", "gameBrake", "gameClutch",
+        "brakeTemperature", "adblue", "adblueCapacity", "adblueAverageConsumption", "airPressure",
+        "airPressureWarningValue", "airPressureEmergencyValue", "oilTemperature", "oilPressure",
+        "oilPressureWarningValue", "waterTemperature", "waterTemperatureWarningValue", "batteryVoltage",
+        "batteryVoltageWarningValue", "lightsDashboardValue", "engineRpm", "engineRpmMax")}
+    truck.update({k: False for k in (
+        "cruiseControlOn", "fuelWarningOn", "engineOn", "electricOn", "wipersOn", "parkBrakeOn",
+        "motorBrakeOn", "adblueWarningOn", "airPressureWarningOn", "airPressureEmergencyOn",
+        "oilPressureWarningOn", "waterTemperatureWarningOn", "batteryVoltageWarningOn", "lightsDashboardOn",
+        "blinkerLeftActive", "blinkerRightActive", "blinkerLeftOn", "blinkerRightOn", "lightsParkingOn",
+        "lightsBeamLowOn", "lightsBeamHighOn", "lightsAuxFrontOn", "lightsAuxRoofOn", "lightsBeaconOn",
+        "lightsBrakeOn", "lightsReverseOn")})
+    truck.update(id="volvo.fh16", make="Volvo", model="FH16", speed=22.4, odometer=123456.7, gear=11,
+                 displayedGear=11, forwardGears=12, reverseGears=4, shifterType="automatic",
+                 retarderBrake=0, retarderStepCount=4, shifterSlot=0,
+                 placement=placement, acceleration=vec, head=vec, cabin=vec, hook=vec)
+    trailer = {"attached": True, "id": "scs.box", "name": "Box trailer", "mass": 18000.0, "wear": 0.02,
+               "placement": placement}
+    doc = {
+        "game": {"connected": True, "gameName": "ETS2", "paused": False, "time": "0001-01-05T14:31:00Z",
+                 "timeScale": 19.0, "nextRestStopTime": "0001-01-01T08:12:00Z", "version": "1.16",
+                 "telemetryPluginVersion": "9"},
+        "truck": truck,
+        "trailer": trailer,
+        "job": {"income": 12345, "deadlineTime": "0001-01-06T02:00:00Z", "remainingTime": "0001-01-01T11:29:00Z",
+                "sourceCity": "Berlin", "sourceCompany": "Tradeaux", "destinationCity": "Praha",
+                "destinationCompany": "Posped"},
+        "navigation": {"estimatedTime": "0001-01-01T05:10:00Z", "estimatedDistance": 350123, "speedLimit": 80},
+    }
+    if extra_trailers:
+        doc["trailers"] = [dict(trailer, id=f"scs.box.{i}", wheels=[dict(vec, wear=0.01)] * 8)
+                           for i in range(extra_trailers)]
+    return json.dumps(doc).encode("utf-8")
+
+
+def load_payloads(paths):
+    out = []
+    for p in paths:
+        with open(p, "rb") as f:
+            data = f.read()
+        if p.endswith(".jsonl"):
+            out.extend(line for line in data.splitlines() if line.strip())
+        else:
+            out.append(data)
+    return out
+
+
+def _old_provider(buf: bytes):
+    data = json.loads(buf.decode("utf-8", "replace"))
+    result = dict(data)
+    if isinstance(result.get("truck"), dict):
+        result["truck"] = dict(result["truck"])
+    return result
+
+
+def _variants():
+    yield "json+copy", _old_provider
+    yield "json", json.loads
+    yield "sections", jsondecode.decode_sections
+    if jsondecode._HAS_ORJSON:
+        yield "orjson", jsondecode.loads
+
+
+def _alloc(fn, payloads):
+    """(bloki żywe po dekodowaniu jednej ramki, szczyt pamięci w bajtach)."""
+    tracemalloc.start()
+    blocks = 0
+    peak = 0
+    for buf in payloads:
+        before = sys.getallocatedblocks()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        obj = fn(buf)
+        blocks += sys.getallocatedblocks() - before
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        del obj
+    tracemalloc.stop()
+    return blocks / len(payloads), peak
+
+
+def main(argv):
+    payloads = load_payloads(argv) if argv else [synthetic_payload()]
+    size = sum(len(p) for p in payloads) / len(payloads)
+    print(f"payloads: {len(payloads)}, avg size: {size:.0f} B, backend: {jsondecode.backend()}")
+    print(f"{'variant':<12}{'us/frame':>10}{'blocks':>10}{'peak B':>10}")
+    rounds = max(1, 20000 // len(payloads))
+    for name, fn in _variants():
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for buf in payloads:
+                fn(buf)
+        us = (time.perf_counter() - t0) / (rounds * len(payloads)) * 1e6
+        blocks, peak = _alloc(fn, payloads)
+        print(f"{name:<12}{us:>10.1f}{blocks:>10.0f}{peak:>10}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+# benchmarks/bench_mapper.py
+"""
+Mapper Funbit: ręcznie pisany (get_first/to_bool, jak przed tabelą pól)
+kontra kod wygenerowany ze schema.FUNBIT_V9.
+
+Warianty:
+  handwritten – dawny normalize_funbit_v9 (kopia poniżej),
+  generated   – normalize_funbit_v9 (CompiledSchema.frame),
+  http+flat   – jak okno główne przy mode = http: FunbitMapper() na JSON
+                z dodatkami TelemetryHTTP (engine_on, parking_brake, ...)
+                + to_flat() (bez zapisu do DB).
+
+Użycie:
+  python benchmarks/bench_mapper.py [nagranie.json | nagranie.jsonl ...]
+"""
+from __future__ import annotations
+import json, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ritt.telemetry.model import TelemetryFrame, GameInfo, TruckInfo, TrailerInfo, JobInfo, NavigationInfo  # noqa: E402
+from ritt.telemetry.mappers.funbit_v9 import FunbitMapper, normalize_funbit_v9  # noqa: E402
+from ritt.telemetry.mappers.schema import SPEED_SCALE, to_bool, vec3 as _vec3  # noqa: E402
+from bench_json_decode import load_payloads, synthetic_payload  # noqa: E402
+
+
+def get_first(d: dict, *keys, default=None):
+    for k in keys:
+        if k in d: return d.get(k)
+    return default
+
+
+def handwritten_v9(raw):
+    g = raw.get("game", {}) or {}
+    t = raw.get("truck", {}) or {}
+    tr = raw.get("trailer", {}) or {}
+    j = raw.get("job", {}) or {}
+    n = raw.get("navigation", {}) or {}
+
+    speed_ms = float(t.get("speed") or 0.0)
+    speed_kmh = speed_ms * SPEED_SCALE
+
+    engine_on = to_bool(get_first(t, "engineOn", "engine_on", "engine", default=False))
+    parking_brake = to_bool(get_first(t, "parkBrakeOn", "parkingBrake", "parking_brake", default=False))
+
+    game = GameInfo(
+        connected = to_bool(get_first(g, "connected")),
+        game_name = g.get("gameName"),
+        paused = to_bool(get_first(g, "paused")),
+        time_iso = g.get("time"),
+        time_scale = g.get("timeScale"),
+        next_rest_iso = g.get("nextRestStopTime"),
+        version = g.get("version"),
+        plugin_version = (str(get_first(g, "telemetryPluginVersion")) if get_first(g, "telemetryPluginVersion") is not None else None),
+    )
+
+    truck = TruckInfo(
+        id = t.get("id"),
+        make = t.get("make"),
+        model = t.get("model"),
+        speed_ms = speed_ms,
+        speed_kmh = speed_kmh,
+        engine_on = engine_on,
+        park_brake_on = parking_brake,
+        cruise_on = to_bool(get_first(t, "cruiseControlOn")),
+        cruise_speed_kmh = float(get_first(t, "cruiseControlSpeed") or 0.0),
+        odometer_km = float(get_first(t, "odometer") or 0.0),
+        gear = get_first(t, "gear"),
+        rpm = float(get_first(t, "engineRpm") or 0.0),
+        battery_v = float(get_first(t, "batteryVoltage") or 0.0),
+        lights_beam_low = to_bool(get_first(t, "lightsBeamLowOn")),
+        lights_parking = to_bool(get_first(t, "lightsParkingOn")),
+        placement = _vec3(get_first(t, "placement")),
+        heading = float((get_first(t, "placement") or {}).get("heading") or 0.0),
+        pitch = float((get_first(t, "placement") or {}).get("pitch") or 0.0),
+        roll = float((get_first(t, "placement") or {}).get("roll") or 0.0),
+        acceleration = _vec3(get_first(t, "acceleration")),
+        head = _vec3(get_first(t, "head")),
+        cabin = _vec3(get_first(t, "cabin")),
+        hook = _vec3(get_first(t, "hook")),
+    )
+
+    trailer = TrailerInfo(
+        attached = to_bool(get_first(tr, "attached")),
+        id = tr.get("id"),
+        name = tr.get("name"),
+        mass_kg = float(get_first(tr, "mass") or 0.0),
+        wear = float(get_first(tr, "wear") or 0.0),
+        placement = _vec3(get_first(tr, "placement")),
+        heading = float((get_first(tr, "placement") or {}).get("heading") or 0.0),
+        pitch = float((get_first(tr, "placement") or {}).get("pitch") or 0.0),
+        roll = float((get_first(tr, "placement") or {}).get("roll") or 0.0),
+    )
+
+    job = JobInfo(
+        income = int(get_first(j, "income") or 0),
+        deadline_iso = get_first(j, "deadlineTime"),
+        remaining_iso = get_first(j, "remainingTime"),
+        source_city = get_first(j, "sourceCity"),
+        source_company = get_first(j, "sourceCompany"),
+        dest_city = get_first(j, "destinationCity"),
+        dest_company = get_first(j, "destinationCompany"),
+    )
+
+    nav = NavigationInfo(
+        eta_iso = get_first(n, "estimatedTime"),
+        distance_m = int(get_first(n, "estimatedDistance") or 0),
+        speed_limit_kmh = int(get_first(n, "speedLimit") or 0),
+    )
+
+    tf = TelemetryFrame(
+        paused = to_bool(get_first(g, "paused", default=False)),
+        speed_kmh = speed_kmh,
+        engine_on = engine_on,
+        parking_brake = parking_brake,
+        game_time_iso = get_first(g, "time"),
+        game = game,
+        truck = truck,
+        trailer = trailer,
+        job = job,
+        navigation = nav,
+        raw = raw,
+    )
+    return tf
+
+
+def _http_frame(raw):
+    """Pełny JSON z polami doklejanymi przez TelemetryHTTP.poll()."""
+    t = raw.get("truck") or {}
+    speed = float(t.get("speed") or 0.0) * SPEED_SCALE
+    return dict(raw, engine_on=bool(t.get("engineOn")), parking_brake=bool(t.get("parkBrakeOn")),
+                speed_scaled=speed, game_time_iso=(raw.get("game") or {}).get("time"))
+
+
+def _flat(mapper):
+    def run(raw):
+        return mapper(raw).to_flat()
+    return run
+
+
+def main(argv):
+    frames = [json.loads(p) for p in (load_payloads(argv) if argv else [synthetic_payload(extra_trailers=0)])]
+    http_frames = [_http_frame(raw) for raw in frames]
+    for raw, http in zip(frames, http_frames):
+        if handwritten_v9(raw) != normalize_funbit_v9(raw):
+            raise SystemExit("generated mapper differs from the hand-written one")
+        if normalize_funbit_v9(http).to_flat() != normalize_funbit_v9(raw).to_flat():
+            raise SystemExit("HTTP provider frame did not take the full mapping path")
+    variants = (
+        ("handwritten", handwritten_v9, frames),
+        ("generated", normalize_funbit_v9, frames),
+        ("http+flat", _flat(FunbitMapper()), http_frames),
+    )
+    rounds = max(1, 20000 // len(frames))
+    print(f"frames: {len(frames)}")
+    print(f"{'variant':<12}{'us/frame':>10}")
+    for name, fn, data in variants:
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for raw in data:
+                fn(raw)
+        us = (time.perf_counter() - t0) / (rounds * len(frames)) * 1e6
+        print(f"{name:<12}{us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
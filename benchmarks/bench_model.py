@@ -0,0 +1,110 @@
+# benchmarks/bench_model.py
+"""
+Model ramki: dataclassy ze __slots__ (obecne) kontra zwykłe dataclassy z __dict__.
+
+Dla obu wariantów ten sam mapper (schema.FUNBIT_V9) buduje ramki z ładunku
+Funbit; mierzone są:
+  build us   – czas zbudowania ramki,
+  flat us    – czas serializacji dla UI (to_flat() kontra dawne kopiowanie __dict__;
+               stare to_flat oddawało żywe __dict__ sekcji, nowe buduje świeże słowniki),
+  norm us    – build + flat, czyli to, co normalize() płaci za ramkę,
+  B/frame    – pamięć jednej ramki trzymanej w buforze historii (bez 'raw'),
+  blocks     – liczba alokacji na ramkę.
+
+Użycie:
+  python benchmarks/bench_model.py [liczba_ramek_w_historii]
+"""
+from __future__ import annotations
+import dataclasses, json, os, sys, timeit, tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ritt.telemetry import model  # noqa: E402
+from ritt.telemetry.mappers import schema  # noqa: E402
+from bench_json_decode import synthetic_payload  # noqa: E402
+
+CLASSES = ("Vec3", "GameInfo", "TruckInfo", "TrailerInfo", "JobInfo", "NavigationInfo", "TelemetryFrame")
+
+
+def legacy_classes():
+    """Te same pola co w model.py, ale zwykłe dataclassy (z __dict__), jak przed __slots__."""
+    out = {}
+    for name in CLASSES:
+        specs = []
+        for f in dataclasses.fields(getattr(model, name)):
+            if f.default_factory is not dataclasses.MISSING:
+                factory = out.get(getattr(f.default_factory, "__name__", ""), f.default_factory)
+                specs.append((f.name, f.type, dataclasses.field(default_factory=factory)))
+            else:
+                specs.append((f.name, f.type, dataclasses.field(default=f.default)))
+        out[name] = dataclasses.make_dataclass(name, specs)
+    return out
+
+
+def legacy_flat(tf):
+    return {
+        "game_time_iso": tf.game_time_iso,
+        "game_time_unix": tf.game_time_unix,
+        "game_minutes": tf.game_minutes,
+        "paused": bool(tf.paused),
+        "speed_kmh": float(tf.speed_kmh),
+        "engine_on": bool(tf.engine_on),
+        "parking_brake": bool(tf.parking_brake),
+        "game": tf.game.__dict__,
+        "truck": {
+            **tf.truck.__dict__,
+            "placement": tf.truck.placement.__dict__,
+            "acceleration": tf.truck.acceleration.__dict__,
+            "head": tf.truck.head.__dict__,
+            "cabin": tf.truck.cabin.__dict__,
+            "hook": tf.truck.hook.__dict__,
+        },
+        "trailer": {**tf.trailer.__dict__, "placement": tf.trailer.placement.__dict__},
+        "job": tf.job.__dict__,
+        "navigation": tf.navigation.__dict__,
+    }
+
+
+def use_classes(classes):
+    """Podmienia klasy w model i kompiluje mapper od nowa (kod schematu wiąże klasy przy kompilacji)."""
+    for name, cls in classes.items():
+        setattr(model, name, cls)
+    schema.Vec3 = classes["Vec3"]  # konwerter vec3
+    return schema.CompiledSchema(schema.FUNBIT_V9).frame
+
+
+def best_us(fn, n=5000, repeat=7):
+    """Najlepszy z 'repeat' pomiarów (us na wywołanie) – mniej szumu niż jedna długa pętla."""
+    return min(timeit.repeat(fn, number=n, repeat=repeat)) / n * 1e6
+
+
+def measure(label, build, raw, flat, history):
+    tf = build(raw)
+    build_us = best_us(lambda: build(raw))
+    flat_us = best_us(lambda: flat(tf))
+    norm_us = best_us(lambda: flat(build(raw)))
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    blocks0 = sys.getallocatedblocks()
+    buf = [build(raw) for _ in range(history)]
+    blocks = (sys.getallocatedblocks() - blocks0) / history
+    per_frame = (tracemalloc.get_traced_memory()[0] - base) / history
+    tracemalloc.stop()
+    del buf
+    print(f"{label:<10}{build_us:>10.2f}{flat_us:>10.2f}{norm_us:>10.2f}{per_frame:>10.0f}{blocks:>10.1f}")
+
+
+def main(argv):
+    history = int(argv[0]) if argv else 10000
+    raw = json.loads(synthetic_payload(extra_trailers=0))
+    slotted = {name: getattr(model, name) for name in CLASSES}
+    print(f"frames in history: {history}")
+    print(f"{'model':<10}{'build us':>10}{'flat us':>10}{'norm us':>10}{'B/frame':>10}{'blocks':>10}")
+    measure("__dict__", use_classes(legacy_classes()), raw, legacy_flat, history)
+    measure("__slots__", use_classes(slotted), raw, lambda tf: tf.to_flat(), history)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
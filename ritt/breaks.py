@@ -88,7 +88,7 @@ class BreakManager:
         self.counters = Counters()
 
         # 14-dniowe okno jazdy
-        self._drive_window: Deque[Tuple[int, int]] = deque()
+        self._drive_window: Deque[Tuple[Optional[int], int]] = deque()  # (czas gry albo None = jeszcze nieznany, sekundy)
 
         # Ostatnie stany „sprzętowe”
         self._last_engine_on: bool = False
@@ -199,8 +199,7 @@ class BreakManager:
         self.counters.drive_this_week += seconds
         self.counters.work_this_week += seconds
         self.counters.since_last_qual_break_drive += seconds
-        ts = self._last_game_unix_sec or 0
-        self._drive_window.append((ts, seconds))
+        self._drive_window.append((self._last_game_unix_sec, seconds))
         self._recalc_14days_sum()
 
     def tick_break(self, seconds: int) -> None:
@@ -254,6 +253,25 @@ class BreakManager:
         self.counters.continuous_rest = 0
         return res
 
+    def restore_counters(self, drive_today: int = 0, work_today: int = 0,
+                         drive_this_week: int = 0, work_this_week: int = 0,
+                         drive_14days: int = 0, game_unix_sec: Optional[int] = None) -> None:
+        """
+        Odtwarza liczniki po restarcie (np. z agregatu dni gry w TelemetryDB).
+        Okno 14-dniowe dostaje jeden wpis z sumą, który wypadnie z okna jak każdy inny.
+        Bez game_unix_sec wpis dostaje czas gry z pierwszego tick() – nie może
+        wypaść z okna tylko dlatego, że przy starcie czas gry był nieznany.
+        """
+        self.counters.drive_today = max(0, int(drive_today))
+        self.counters.work_today = max(0, int(work_today))
+        self.counters.drive_this_week = max(0, int(drive_this_week))
+        self.counters.work_this_week = max(0, int(work_this_week))
+        self._drive_window.clear()
+        if drive_14days > 0:
+            ts = game_unix_sec if game_unix_sec is not None else self._last_game_unix_sec
+            self._drive_window.append((None if ts is None else int(ts), int(drive_14days)))
+        self._recalc_14days_sum()
+
     @property
     def since_break_seconds(self) -> int:
         return self.counters.since_last_qual_break_drive
@@ -340,6 +358,9 @@ class BreakManager:
         self.counters.work_this_week = 0
 
     def _prune_14day_window(self, now_unix: int) -> None:
+        if any(ts is None for ts, _ in self._drive_window):
+            # wpisy sprzed pierwszego znanego czasu gry (restore_counters, tick_drive) – dostają ten czas
+            self._drive_window = deque((now_unix if ts is None else ts, sec) for ts, sec in self._drive_window)
         threshold = now_unix - FORTNIGHT_WINDOW_SEC
         while self._drive_window and self._drive_window[0][0] <= threshold:
             self._drive_window.popleft()
@@ -5,11 +5,34 @@ DEFAULTS = {
     "driver_id": "DRV001",
     "lang": "pl",
     # telemetry
-    "mode": "sim",  # dll | http | sim
+    "mode": "sim",  # dll | http | sim | replay | shm | stream | multi
     "dll_path": "",
     "http_url": "http://127.0.0.1:25555/api/telemetry",
     "speed_scale": "3.6",       # m/s -> km/h
     "fallback_game_speed": "0", # sek gry / sek real (0=wyłącz)
+    # nagrywanie / odtwarzanie (mode = replay)
+    "record_path": "",          # pusty = bez nagrywania
+    "replay_path": "telemetry.rec",
+    "replay_speed": "1.0",      # 0 = ramka po ramce, bez czekania
+    "replay_loop": "0",
+    # pamięć współdzielona (mode = shm, wymaga własnego pluginu-pisarza – patrz telemetry/shm.py):
+    # nazwa mapowania (Windows, np. Local\\RITTTelemetry) albo plik; bez domyślnej nazwy
+    "shm_name": "",
+    "shm_path": "",
+    # strumień ramek push (mode = stream): linie JSON po TCP
+    "stream_addr": "127.0.0.1:25556",
+    "frozen_model": "0",          # 1 = ramki TelemetryFrame niemodyfikowalne
+    # kilka źródeł naraz (mode = multi): kolejność = priorytet przy remisie
+    "multi_sources": "dll,http",
+    "multi_interval_ms": "100",   # start odpytywania źródeł w tle; potem tempo z harmonogramu UI
+    "multi_stale_ms": "1000",     # starsza ramka = źródło niezdrowe
+    # szyna telemetrii: jedna akwizycja, odbiorcy (UI, DB, zbocza/n8n) we własnym tempie
+    "bus_interval_ms": "100",     # 0 = bez szyny (tick UI sam odpytuje i zapisuje); >0 = tempo startowe, potem harmonogram
+    # zdarzenia (zbocza) z telemetrii: silnik, ręczny, ruszenie, pauza, naczepa, zlecenie
+    "edge_debounce_ms": "500",    # nowy stan musi się utrzymać tyle, zanim powstanie zdarzenie
+    "edge_move_on_kmh": "2.0",    # ruszenie powyżej ...
+    "edge_move_off_kmh": "0.5",   # ... zatrzymanie dopiero poniżej (histereza)
+    "edge_time_jump_min": "30",   # większy skok czasu gry (albo cofnięcie) = game_time_jump
 }
 
 def _read_ini():
@@ -28,6 +51,22 @@ def _read_ini():
         "http_url": cp.get("telemetry", "http_url", fallback=DEFAULTS["http_url"]),
         "speed_scale": float(cp.get("telemetry", "speed_scale", fallback=DEFAULTS["speed_scale"])),
         "fallback_game_speed": int(cp.get("telemetry", "fallback_game_speed", fallback=DEFAULTS["fallback_game_speed"])),
+        "record_path": cp.get("telemetry", "record_path", fallback=DEFAULTS["record_path"]),
+        "replay_path": cp.get("telemetry", "replay_path", fallback=DEFAULTS["replay_path"]),
+        "replay_speed": float(cp.get("telemetry", "replay_speed", fallback=DEFAULTS["replay_speed"])),
+        "replay_loop": cp.getboolean("telemetry", "replay_loop", fallback=DEFAULTS["replay_loop"] == "1"),
+        "shm_name": cp.get("telemetry", "shm_name", fallback=DEFAULTS["shm_name"]),
+        "shm_path": cp.get("telemetry", "shm_path", fallback=DEFAULTS["shm_path"]),
+        "stream_addr": cp.get("telemetry", "stream_addr", fallback=DEFAULTS["stream_addr"]),
+        "frozen_model": cp.getboolean("telemetry", "frozen_model", fallback=DEFAULTS["frozen_model"] == "1"),
+        "multi_sources": cp.get("telemetry", "multi_sources", fallback=DEFAULTS["multi_sources"]),
+        "multi_interval_ms": int(cp.get("telemetry", "multi_interval_ms", fallback=DEFAULTS["multi_interval_ms"])),
+        "multi_stale_ms": int(cp.get("telemetry", "multi_stale_ms", fallback=DEFAULTS["multi_stale_ms"])),
+        "bus_interval_ms": int(cp.get("telemetry", "bus_interval_ms", fallback=DEFAULTS["bus_interval_ms"])),
+        "edge_debounce_ms": int(cp.get("telemetry", "edge_debounce_ms", fallback=DEFAULTS["edge_debounce_ms"])),
+        "edge_move_on_kmh": float(cp.get("telemetry", "edge_move_on_kmh", fallback=DEFAULTS["edge_move_on_kmh"])),
+        "edge_move_off_kmh": float(cp.get("telemetry", "edge_move_off_kmh", fallback=DEFAULTS["edge_move_off_kmh"])),
+        "edge_time_jump_min": float(cp.get("telemetry", "edge_time_jump_min", fallback=DEFAULTS["edge_time_jump_min"])),
     }
 
 CFG = _read_ini()
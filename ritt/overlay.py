@@ -12,13 +12,18 @@ class MiniOverlay(QWidget):
         self.lbl.setStyleSheet("font-size:16px; color:#fff; padding:8px;")
         lay=QVBoxLayout(self); lay.addWidget(self.lbl)
         self.resize(350,120); self._drag=None
+        self._shown=None  # (tekst, tło, przezroczystość) ostatnio ustawione
         self.timer=QTimer(self); self.timer.timeout.connect(self.refresh); self.timer.start(1000); self.refresh()
 
     def refresh(self):
-        self.lbl.setText(self.text_provider())
+        text=self.text_provider()
         bg="rgba(0,0,0,180)" if self.bg_enabled else "rgba(0,0,0,0)"
-        self.setStyleSheet(f"background:{bg}; border-radius:12px;")
-        self.setWindowOpacity(self.opacity)
+        shown=(text, bg, self.opacity)
+        if shown==self._shown: return  # nic się nie zmieniło – bez przeliczania stylów
+        if self._shown is None or text!=self._shown[0]: self.lbl.setText(text)
+        if self._shown is None or bg!=self._shown[1]: self.setStyleSheet(f"background:{bg}; border-radius:12px;")
+        if self._shown is None or self.opacity!=self._shown[2]: self.setWindowOpacity(self.opacity)
+        self._shown=shown
 
     def mousePressEvent(self,e):
         if e.button()==Qt.LeftButton: self._drag=e.globalPosition().toPoint()
@@ -0,0 +1,299 @@
+# ritt/telemetry/bus.py
+"""
+Szyna telemetrii: jedna pętla akwizycji, wielu odbiorców z własnym tempem.
+
+Pętla akwizycji (jeden wątek) odpytuje provider co interval_ms (provider
+strumieniowy z frames() – czyta ramki zaraz po nadejściu), mapuje je przez
+TelemetryService.map_frame() i publikuje TelemetryFrame. Publikacja nie czeka
+na nikogo: ramka trafia do skrzynki każdego odbiorcy, a odbiorca przetwarza
+ją we własnym wątku – wolny odbiorca (np. zawieszony POST do n8n) nie
+spowalnia ani akwizycji, ani pozostałych odbiorców.
+
+subscribe(name, callback, ...):
+  rate_hz – najwyżej tyle dostarczeń na sekundę (None = każda ramka od razu),
+  policy  – co skrzynka trzyma między dostarczeniami:
+              "latest" – tylko najnowszą ramkę (starsze są zastępowane),
+              "all"    – wszystkie, do maxlen (przy przepełnieniu giną najstarsze),
+              "change" – najnowszą, dostarczaną tylko gdy key(ramka) się zmienił,
+  batch   – callback dostaje listę par (ts_utc, ramka) zebranych od poprzedniego
+            dostarczenia (ma sens z policy="all", np. zapis do DB paczkami).
+Wyjątek w callbacku jest liczony i logowany; odbiorca działa dalej.
+Statystyki (dostarczone, zgubione, zastąpione, opóźnienie): stats().
+
+Tempo akwizycji: interval_ms to wartość startowa; set_interval() (tick UI
+z interwałem AdaptivePollScheduler) zmienia je w locie, więc szyna zwalnia
+na postoju/pauzie/bez serwera tak jak tick. close() zamyka też provider.
+"""
+from __future__ import annotations
+import threading, time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+POLICIES = ("latest", "all", "change")
+_NO_KEY = object()
+
+
+class _Subscriber:
+    """Skrzynka i wątek jednego odbiorcy."""
+
+    def __init__(self, name: str, callback: Callable[[Any], None],
+                 rate_hz: Optional[float], policy: str, batch: bool, maxlen: int,
+                 key: Optional[Callable[[Any], Any]]):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r} (expected one of {POLICIES})")
+        self.name = name
+        self.callback = callback
+        self.min_interval = 1.0 / rate_hz if rate_hz else 0.0
+        self.policy = policy
+        self.batch = bool(batch)
+        self.key = key
+        self.delivered = 0
+        self.dropped = 0        # policy="all": przepełniona skrzynka
+        self.superseded = 0     # policy="latest"/"change": ramka zastąpiona nowszą przed dostarczeniem
+        self.unchanged = 0      # policy="change": pominięte, bo key się nie zmienił
+        self.errors = 0
+        self.last_error = ""
+        self.latency_sec: Optional[float] = None  # publikacja -> koniec callbacku (ostatnie dostarczenie)
+        self._box: Deque[Tuple[float, float, Any]] = deque(maxlen=max(1, int(maxlen)) if policy == "all" else 1)
+        self._last_key: Any = _NO_KEY
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name=f"telemetry-bus-{name}", daemon=True)
+
+    def offer(self, ts: float, frame: Any) -> None:
+        """Wywoływane przez pętlę akwizycji – nigdy nie blokuje dłużej niż wstawienie do deque."""
+        with self._cond:
+            if len(self._box) == self._box.maxlen:
+                if self.policy == "all":
+                    self.dropped += 1
+                else:
+                    self.superseded += 1
+            self._box.append((time.monotonic(), ts, frame))
+            self._cond.notify()
+
+    def _take(self) -> List[Tuple[float, float, Any]]:
+        with self._cond:
+            while not self._box and not self._stop:
+                self._cond.wait()
+            items = list(self._box)
+            self._box.clear()
+            return items
+
+    def _run(self) -> None:
+        next_at = 0.0
+        while True:
+            items = self._take()
+            if self.min_interval and not self._stop:
+                wait = next_at - time.monotonic()
+                if wait > 0.0:
+                    # w tym czasie pętla akwizycji dalej wkłada ramki do skrzynki
+                    with self._cond:
+                        self._cond.wait_for(lambda: self._stop, wait)
+                        items.extend(self._box)
+                        self._box.clear()
+                next_at = time.monotonic() + self.min_interval
+            if items:
+                if self.policy != "all" and len(items) > 1:
+                    self.superseded += len(items) - 1
+                    items = items[-1:]
+                self._deliver(items)
+            if self._stop:
+                return  # po stop() skrzynka jest jeszcze raz opróżniana (np. ostatnia paczka do DB)
+
+    def _deliver(self, items: List[Tuple[float, float, Any]]) -> None:
+        if self.policy == "change":
+            frame = items[-1][2]
+            try:
+                k = self.key(frame) if self.key is not None else frame
+            except Exception as e:
+                self._failed(e)
+                return
+            if k == self._last_key:
+                self.unchanged += 1
+                return
+            self._last_key = k
+        try:
+            if self.batch:
+                self.callback([(ts, frame) for _, ts, frame in items])
+            else:
+                for _, _, frame in items:
+                    self.callback(frame)
+        except Exception as e:
+            self._failed(e)
+            return
+        self.delivered += len(items) if (self.batch or self.policy == "all") else 1
+        self.latency_sec = time.monotonic() - items[-1][0]
+
+    def _failed(self, e: Exception) -> None:
+        if self.errors == 0 or str(e) != self.last_error:
+            print(f"[TelemetryBus] {self.name}: {e}")
+        self.errors += 1
+        self.last_error = str(e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._box)
+        return {
+            "policy": self.policy,
+            "rate_hz": round(1.0 / self.min_interval, 2) if self.min_interval else None,
+            "delivered": self.delivered,
+            "pending": pending,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "unchanged": self.unchanged,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "latency_ms": None if self.latency_sec is None else round(self.latency_sec * 1000.0, 2),
+        }
+
+    def stop(self, timeout: float = 0.0) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if timeout > 0.0 and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+
+class TelemetryBus:
+    """Jedna pętla akwizycji publikująca ramki do niezależnych odbiorców."""
+
+    def __init__(self, service, interval_ms: int = 100, stale_ms: int = 2000):
+        self.service = service
+        self.provider = service.provider
+        self.interval_sec = max(0.01, interval_ms / 1000.0)
+        self.stale_sec = max(self.interval_sec, stale_ms / 1000.0)
+        self.published = 0
+        self.errors = 0
+        self.last_error = ""
+        self.latest: Optional[Any] = None
+        self.latest_at = 0.0        # monotonic ostatniej opublikowanej ramki
+        self._subs: Dict[str, _Subscriber] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------------------------------------------------------
+    # Odbiorcy
+    # ---------------------------------------------------------------
+    def subscribe(self, name: str, callback: Callable[[Any], None],
+                  rate_hz: Optional[float] = None, policy: str = "latest",
+                  batch: bool = False, maxlen: int = 1024,
+                  key: Optional[Callable[[Any], Any]] = None) -> None:
+        """Rejestruje odbiorcę (patrz opis modułu); nazwa musi być unikalna."""
+        sub = _Subscriber(name, callback, rate_hz, policy, batch, maxlen, key)
+        with self._lock:
+            if name in self._subs:
+                raise ValueError(f"subscriber {name!r} already registered")
+            self._subs[name] = sub
+        sub._thread.start()
+
+    def unsubscribe(self, name: str, timeout: float = 1.0) -> bool:
+        with self._lock:
+            sub = self._subs.pop(name, None)
+        if sub is None:
+            return False
+        sub.stop(timeout)
+        return True
+
+    # ---------------------------------------------------------------
+    # Akwizycja
+    # ---------------------------------------------------------------
+    def start(self) -> "TelemetryBus":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="telemetry-bus", daemon=True)
+            self._thread.start()
+        return self
+
+    def set_interval(self, interval_ms: int) -> None:
+        """Nowe tempo odpytywania (np. z AdaptivePollScheduler); budzi pętlę od razu."""
+        interval_sec = max(0.01, interval_ms / 1000.0)
+        if interval_sec != self.interval_sec:
+            self.interval_sec = interval_sec
+            self._wake.set()
+
+    def publish(self, frame: Any, ts_utc: Optional[float] = None) -> None:
+        """Rozsyła ramkę do wszystkich odbiorców (bez czekania na nich)."""
+        ts = time.time() if ts_utc is None else ts_utc
+        self.latest = frame
+        self.latest_at = time.monotonic()
+        self.published += 1
+        with self._lock:
+            subs = list(self._subs.values())
+        for sub in subs:
+            sub.offer(ts, frame)
+
+    def _acquired(self, raw: Optional[Dict[str, Any]]) -> None:
+        self.publish(self.service.map_frame(raw or {}))
+
+    def _failed(self, e: Exception) -> None:
+        if self.errors == 0 or str(e) != self.last_error:
+            print(f"[TelemetryBus] acquisition error: {e}")
+        self.errors += 1
+        self.last_error = str(e)
+
+    def _run(self) -> None:
+        frames = getattr(self.provider, "frames", None)
+        if callable(frames):
+            try:
+                for raw in frames():
+                    if self._stop.is_set():
+                        return
+                    self._acquired(raw)
+            except Exception as e:
+                self._failed(e)
+            return
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                self._acquired(self.provider.poll())
+            except Exception as e:
+                self._failed(e)
+            self._wake.wait(max(0.0, self.interval_sec - (time.monotonic() - t0)))
+            self._wake.clear()
+
+    @property
+    def connected(self) -> bool:
+        """Czy ostatnia ramka jest świeższa niż stale_ms (dla TelemetryService)."""
+        if self.latest is None:
+            return False
+        if not getattr(self.provider, "connected", True):
+            return False
+        return time.monotonic() - self.latest_at < self.stale_sec
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            subs = dict(self._subs)
+        return {
+            "published": self.published,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "connected": self.connected,
+            "subscribers": {name: sub.stats() for name, sub in subs.items()},
+        }
+
+    def close(self, timeout: float = 2.0) -> None:
+        """
+        Zatrzymuje akwizycję, zamyka provider, dostarcza ramki czekające
+        w skrzynkach i zatrzymuje odbiorców.
+        """
+        self._stop.set()
+        self._wake.set()
+        close = getattr(self.provider, "close", None)
+        streaming = callable(getattr(self.provider, "frames", None))
+        if streaming and callable(close):
+            close()  # budzi frames() czekające na gnieździe
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        if not streaming and callable(close):
+            # provider odpytywany (wątki multipleksera, DLL, nagranie) – po ostatnim poll()
+            try:
+                close()
+            except Exception as e:
+                print(f"[TelemetryBus] provider close: {e}")
+        with self._lock:
+            subs, self._subs = list(self._subs.values()), {}
+        for sub in subs:
+            sub.stop()
+        for sub in subs:
+            sub.stop(timeout)
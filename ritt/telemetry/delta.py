@@ -0,0 +1,108 @@
+# ritt/telemetry/delta.py
+"""
+Różnice między kolejnymi snapshotami JSON (Funbit) – tylko zmienione ścieżki.
+
+Format różnicy (kompaktowy JSON):
+  {"s": [[["truck", "speed"], 12.3], ...],   # ustaw wartość pod ścieżką
+   "d": [["trailer", "wear"], ...]}          # usuń ścieżkę
+Listy traktujemy jak wartości atomowe (zmiana elementu = podmiana całej listy).
+"""
+from __future__ import annotations
+import json, zlib
+from typing import Any, Dict, List, Optional
+
+_MISSING = object()
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, list]:
+    """Zwraca różnicę old -> new (puste {} gdy brak zmian)."""
+    sets: List[list] = []
+    dels: List[list] = []
+    _diff_into(old, new, [], sets, dels)
+    out: Dict[str, list] = {}
+    if sets:
+        out["s"] = sets
+    if dels:
+        out["d"] = dels
+    return out
+
+
+def _diff_into(old: Dict[str, Any], new: Dict[str, Any], path: list, sets: list, dels: list) -> None:
+    for k, nv in new.items():
+        ov = old.get(k, _MISSING)
+        if ov is _MISSING:
+            sets.append([path + [k], nv])
+        elif isinstance(nv, dict) and isinstance(ov, dict):
+            _diff_into(ov, nv, path + [k], sets, dels)
+        elif ov != nv or type(ov) is not type(nv):
+            sets.append([path + [k], nv])
+    for k in old:
+        if k not in new:
+            dels.append(path + [k])
+
+
+def apply(base: Dict[str, Any], delta: Optional[Dict[str, list]]) -> Dict[str, Any]:
+    """Nakłada różnicę na kopię 'base' (base pozostaje nietknięty)."""
+    out = json.loads(json.dumps(base))  # głęboka kopia (tylko typy JSON)
+    if not delta:
+        return out
+    for path, value in delta.get("s", ()):
+        cur = out
+        for part in path[:-1]:
+            nxt = cur.get(part)
+            if not isinstance(nxt, dict):
+                nxt = cur[part] = {}
+            cur = nxt
+        cur[path[-1]] = value
+    for path in delta.get("d", ()):
+        cur = out
+        for part in path[:-1]:
+            cur = cur.get(part)
+            if not isinstance(cur, dict):
+                break
+        else:
+            cur.pop(path[-1], None)
+    return out
+
+
+def pack(obj: Any, level: int = 6) -> bytes:
+    """JSON + zlib."""
+    return zlib.compress(json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), level)
+
+
+def unpack(blob: Optional[bytes]) -> Any:
+    if not blob:
+        return None
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class DeltaEncoder:
+    """
+    Koduje strumień snapshotów jako klatki kluczowe + różnice względem
+    ostatniej klatki kluczowej (co 'keyframe_every' ramek nowa klatka).
+    Dzięki temu każdą ramkę odtwarzamy z dokładnie dwóch rekordów.
+    """
+    def __init__(self, keyframe_every: int = 240):
+        self.keyframe_every = max(1, int(keyframe_every))
+        self._key: Optional[Dict[str, Any]] = None
+        self._since_key = 0
+
+    def reset(self) -> None:
+        self._key = None
+        self._since_key = 0
+
+    def set_key(self, key: Dict[str, Any]) -> None:
+        """Podmienia bieżącą klatkę kluczową (np. na kopię odczytaną z zapisu)."""
+        self._key = key
+
+    def encode(self, raw: Dict[str, Any]) -> tuple[bool, Optional[Dict[str, list]]]:
+        """
+        Zwraca (is_keyframe, delta). Dla klatki kluczowej delta = None,
+        a wywołujący zapisuje pełny snapshot 'raw'.
+        """
+        if self._key is None or self._since_key >= self.keyframe_every:
+            self._key = raw
+            self._since_key = 1
+            return True, None
+        self._since_key += 1
+        return False, diff(self._key, raw)
@@ -1,58 +1,103 @@
+"""
+Provider z biblioteki natywnej (DLL/.so).
+
+Dwie ścieżki odczytu:
+  • get_snapshot(RittSnapshot*) – jedno wywołanie wypełnia całą strukturę
+    (preferowane; struktura jest alokowana raz i używana przy każdym poll()),
+  • osobne funkcje get_game_time_minutes()/get_game_time_unix()/get_speed_ms()/
+    get_engine_on()/get_parking_brake()/get_paused() – fallback dla starszych DLL.
+Symbole i restype/argtypes są ustawiane raz, przy ładowaniu biblioteki.
+
+Po stronie C:
+    typedef struct {
+        uint32_t size;            /* sizeof – wypełnia wołający, DLL może sprawdzić wersję */
+        uint32_t flags;           /* 1 = game_minutes, 2 = game_time_unix poprawne */
+        int32_t  game_minutes;
+        int64_t  game_time_unix;
+        float    speed_ms;
+        int32_t  engine_on;
+        int32_t  parking_brake;
+        int32_t  paused;
+    } RittSnapshot;
+    int get_snapshot(RittSnapshot *out);   /* != 0 – dane poprawne */
+
+Benchmark obu ścieżek (stub .so): benchmarks/bench_dll_poll.py.
+"""
 import os, ctypes
 from .base import TelemetryBase
 
+SNAP_HAS_MINUTES = 1
+SNAP_HAS_UNIX = 2
+
+
+class RittSnapshot(ctypes.Structure):
+    _fields_ = [
+        ("size", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("game_minutes", ctypes.c_int32),
+        ("game_time_unix", ctypes.c_int64),
+        ("speed_ms", ctypes.c_float),
+        ("engine_on", ctypes.c_int32),
+        ("parking_brake", ctypes.c_int32),
+        ("paused", ctypes.c_int32),
+    ]
+
+
+# (klucz, symbol, restype, wartość domyślna przy braku funkcji/błędzie)
+_GETTERS = (
+    ("game_minutes", "get_game_time_minutes", ctypes.c_int, None),
+    ("game_time_unix", "get_game_time_unix", ctypes.c_int, 0),
+    ("speed_ms", "get_speed_ms", ctypes.c_float, 0.0),
+    ("engine_on", "get_engine_on", ctypes.c_int, 1),
+    ("parking_brake", "get_parking_brake", ctypes.c_int, 0),
+    ("paused", "get_paused", ctypes.c_int, 0),
+)
+
+
+def _symbol(dll, name, restype, argtypes=()):
+    try:
+        fn = getattr(dll, name)
+    except AttributeError:
+        return None
+    fn.restype = restype
+    fn.argtypes = list(argtypes)
+    return fn
+
+
 class TelemetryDLL(TelemetryBase):
-    """Oczekiwane (jeśli to nie Funbit): get_game_time_minutes() albo get_game_time_unix() itd."""
-    def __init__(self, dll_path, speed_scale=3.6):
+    """Oczekiwane (jeśli to nie Funbit): get_snapshot() albo get_game_time_minutes()/get_game_time_unix() itd."""
+    def __init__(self, dll_path, speed_scale=3.6, use_snapshot=True):
         self.scale = speed_scale
         self.dll = None
         self.has_minutes = False
         self.has_unix = False
+        self.has_snapshot = False
+        self._snapshot_fn = None
+        self._snap = RittSnapshot(size=ctypes.sizeof(RittSnapshot))
+        self._snap_ref = ctypes.byref(self._snap)
+        self._getters = ()
         if dll_path and os.path.exists(dll_path):
             try:
                 self.dll = ctypes.CDLL(dll_path)
-                try:
-                    self.dll.get_game_time_minutes.restype = ctypes.c_int
-                    self.has_minutes = True
-                except Exception:
-                    self.has_minutes = False
-                try:
-                    self.dll.get_game_time_unix.restype = ctypes.c_int
-                    self.has_unix = True
-                except Exception:
-                    self.has_unix = False
-                try: self.dll.get_speed_ms.restype = ctypes.c_float
-                except Exception: pass
-                try: self.dll.get_engine_on.restype = ctypes.c_int
-                except Exception: pass
-                try: self.dll.get_parking_brake.restype = ctypes.c_int
-                except Exception: pass
-                try: self.dll.get_paused.restype = ctypes.c_int
-                except Exception: pass
             except Exception as e:
                 print("DLL load error:", e); self.dll=None
+        if self.dll is not None:
+            self._bind(use_snapshot)
 
-    def poll(self):
-        if not self.dll:
-            return {"game_minutes": None,"game_time_unix":0,"speed_kmh":0.0,"engine_on":True,"parking_brake":False,"paused":False,"time_source":"dll:none"}
-        gm=None; gt=0; sp=0.0; eng=1; park=0; paused=0
-        try:
-            if self.has_minutes:
-                gm = int(self.dll.get_game_time_minutes())
-        except Exception: gm=None
-        try:
-            if self.has_unix:
-                gt = int(self.dll.get_game_time_unix())
-        except Exception: gt=0
-        try: sp=float(self.dll.get_speed_ms())
-        except Exception: sp=0.0
-        try: eng=int(self.dll.get_engine_on())
-        except Exception: eng=1
-        try: park=int(self.dll.get_parking_brake())
-        except Exception: park=0
-        try: paused=int(self.dll.get_paused())
-        except Exception: paused=0
+    def _bind(self, use_snapshot):
+        if use_snapshot:
+            self._snapshot_fn = _symbol(self.dll, "get_snapshot", ctypes.c_int, [ctypes.POINTER(RittSnapshot)])
+            self.has_snapshot = self._snapshot_fn is not None
+        getters = []
+        for key, name, restype, default in _GETTERS:
+            fn = _symbol(self.dll, name, restype)
+            if fn is not None:
+                getters.append((key, fn, default))
+        self._getters = tuple(getters)
+        self.has_minutes = any(k == "game_minutes" for k, _, _ in getters)
+        self.has_unix = any(k == "game_time_unix" for k, _, _ in getters)
 
+    def _result(self, gm, gt, sp, eng, park, paused):
         src = "dll:minutes" if gm is not None else ("dll:unix" if gt>0 else "dll:none")
         return {
             "game_minutes": gm,
@@ -63,3 +108,47 @@ class TelemetryDLL(TelemetryBase):
             "paused": bool(paused),
             "time_source": src,
         }
+
+    def _poll_snapshot(self):
+        s = self._snap
+        if not self._snapshot_fn(self._snap_ref):
+            return None
+        flags = s.flags
+        gm = s.game_minutes if flags & SNAP_HAS_MINUTES else None
+        gt = s.game_time_unix if flags & SNAP_HAS_UNIX else 0
+        sp = s.speed_ms * self.scale
+        return {
+            "game_minutes": gm,
+            "game_time_unix": gt,
+            "speed_kmh": sp if sp > 0.0 else 0.0,
+            "engine_on": s.engine_on != 0,
+            "parking_brake": s.parking_brake != 0,
+            "paused": s.paused != 0,
+            "time_source": "dll:minutes" if gm is not None else ("dll:unix" if gt>0 else "dll:none"),
+        }
+
+    def _poll_getters(self):
+        v = {"game_minutes": None, "game_time_unix": 0, "speed_ms": 0.0,
+             "engine_on": 1, "parking_brake": 0, "paused": 0}
+        for key, fn, default in self._getters:
+            try:
+                v[key] = fn()
+            except Exception:
+                v[key] = default
+        return self._result(v["game_minutes"], v["game_time_unix"], v["speed_ms"],
+                            v["engine_on"], v["parking_brake"], v["paused"])
+
+    def poll(self):
+        if not self.dll:
+            return {"game_minutes": None,"game_time_unix":0,"speed_kmh":0.0,"engine_on":True,"parking_brake":False,"paused":False,"time_source":"dll:none"}
+        if self._snapshot_fn is not None:
+            try:
+                out = self._poll_snapshot()
+                if out is not None:
+                    return out
+            except Exception as e:
+                # DLL ma get_snapshot, ale wywołanie zawodzi – zostajemy przy osobnych funkcjach
+                print("DLL snapshot error:", e)
+                self._snapshot_fn = None
+                self.has_snapshot = False
+        return self._poll_getters()
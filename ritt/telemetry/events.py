@@ -0,0 +1,245 @@
+# ritt/telemetry/events.py
+"""
+Zdarzenia z telemetrii: zbocza sygnałów zamiast porównywania booleanów co tick.
+
+EdgeDetector.feed(ramka) porównuje ramkę z poprzednimi i zwraca (oraz
+rozsyła subskrybentom) zdarzenia TelemetryEvent:
+  engine_on / engine_off                      – silnik,
+  parking_brake_set / parking_brake_released  – hamulec ręczny,
+  moving_start / moving_stop                  – ruszenie / zatrzymanie (histereza prędkości),
+  paused / resumed                            – pauza gry,
+  trailer_attached / trailer_detached         – naczepa,
+  job_started / job_finished                  – zlecenie (zmiana trasy = finished + started),
+  game_time_jump                              – skok czasu gry (sen, prom, wczytanie zapisu).
+
+Debounce: nowa wartość sygnału musi utrzymać się przez debounce_ms, zanim
+powstanie zdarzenie (krótkie drgnięcia, np. hamulec puszczony na jedną ramkę,
+nie dają pary zdarzeń). signal_debounce_ms nadpisuje czas dla pojedynczych
+sygnałów: engine, parking_brake, moving, paused, trailer, job.
+Histereza ruchu: ruszenie przy speed_kmh > move_on_kmh, zatrzymanie dopiero
+przy speed_kmh <= move_off_kmh.
+
+Czas gry: game_time_unix, a gdy ramka go nie ma (pełny JSON Funbita) –
+sekundy z game_time_iso, jak w gameday.
+
+Pierwsza ramka (i pierwsza po reset()) ustala stan bez zdarzeń.
+Ramka może być TelemetryFrame albo płaskim słownikiem
+(poll_normalized()); sygnały, których ramka nie ma (None), są pomijane.
+"""
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .gameday import game_seconds, parse_game_iso
+
+ENGINE_ON = "engine_on"
+ENGINE_OFF = "engine_off"
+PARKING_BRAKE_SET = "parking_brake_set"
+PARKING_BRAKE_RELEASED = "parking_brake_released"
+MOVING_START = "moving_start"
+MOVING_STOP = "moving_stop"
+PAUSED = "paused"
+RESUMED = "resumed"
+TRAILER_ATTACHED = "trailer_attached"
+TRAILER_DETACHED = "trailer_detached"
+JOB_STARTED = "job_started"
+JOB_FINISHED = "job_finished"
+GAME_TIME_JUMP = "game_time_jump"
+
+EVENT_LABELS = {
+    ENGINE_ON: "Silnik włączony",
+    ENGINE_OFF: "Silnik wyłączony",
+    PARKING_BRAKE_SET: "Hamulec ręczny zaciągnięty",
+    PARKING_BRAKE_RELEASED: "Hamulec ręczny zwolniony",
+    MOVING_START: "Pojazd ruszył",
+    MOVING_STOP: "Pojazd zatrzymał się",
+    PAUSED: "Pauza gry",
+    RESUMED: "Koniec pauzy gry",
+    TRAILER_ATTACHED: "Naczepa podpięta",
+    TRAILER_DETACHED: "Naczepa odpięta",
+    JOB_STARTED: "Rozpoczęto zlecenie",
+    JOB_FINISHED: "Zakończono zlecenie",
+    GAME_TIME_JUMP: "Skok czasu gry",
+}
+
+_UNSET = object()
+
+
+@dataclass(slots=True)
+class TelemetryEvent:
+    kind: str
+    value: Any = None           # nowa wartość sygnału (game_time_jump: skok w sekundach gry)
+    prev: Any = None            # poprzednia wartość (game_time_jump: poprzedni czas gry)
+    ts_utc: float = 0.0
+    game_time: Optional[int] = None
+    frame: Any = None           # ramka, na której zdarzenie powstało
+
+    @property
+    def label(self) -> str:
+        return EVENT_LABELS.get(self.kind, self.kind)
+
+
+def _field(frame: Any, name: str, sub: Optional[str] = None) -> Any:
+    """Pole ramki – obiekt (TelemetryFrame) albo słownik (płaska ramka z sekcjami)."""
+    if isinstance(frame, dict):
+        v = frame.get(name)
+        if sub is not None:
+            v = v.get(sub) if isinstance(v, dict) else None
+        return v
+    v = getattr(frame, name, None)
+    return getattr(v, sub, None) if sub is not None else v
+
+
+def _game_time(frame: Any) -> Optional[int]:
+    """Czas gry w sekundach: game_time_unix, inaczej z game_time_iso (0 / brak = None)."""
+    gt = _field(frame, "game_time_unix")
+    if gt:
+        return int(gt)
+    dt = parse_game_iso(_field(frame, "game_time_iso"))
+    return game_seconds(dt) if dt is not None else None
+
+
+def _flag(v: Any) -> Optional[bool]:
+    return None if v is None else bool(v)
+
+
+def _job_key(frame: Any) -> Optional[str]:
+    parts = tuple(_field(frame, "job", k) for k in ("source_city", "source_company", "dest_city", "dest_company"))
+    if not any(parts):
+        return None
+    return "|".join(str(p or "") for p in parts)
+
+
+class _Debounced:
+    """Stan jednego sygnału: wartość ustalona i kandydat czekający na debounce."""
+    __slots__ = ("value", "candidate", "since")
+
+    def __init__(self):
+        self.value: Any = _UNSET
+        self.candidate: Any = _UNSET
+        self.since = 0.0
+
+    def update(self, v: Any, now: float, hold: float) -> bool:
+        """True, gdy ustalona wartość właśnie się zmieniła (poprzednia – w wywołującym)."""
+        if self.value is _UNSET:
+            self.value = v  # pierwsza ramka – stan bez zdarzenia
+            return False
+        if v == self.value:
+            self.candidate = _UNSET
+            return False
+        if self.candidate is _UNSET or v != self.candidate:
+            self.candidate, self.since = v, now
+        if now - self.since >= hold:
+            self.value, self.candidate = v, _UNSET
+            return True
+        return False
+
+
+# sygnał -> (zdarzenie przy True / nowej wartości, zdarzenie przy False / braku wartości)
+_BOOL_SIGNALS: Dict[str, Tuple[str, str]] = {
+    "engine": (ENGINE_ON, ENGINE_OFF),
+    "parking_brake": (PARKING_BRAKE_SET, PARKING_BRAKE_RELEASED),
+    "moving": (MOVING_START, MOVING_STOP),
+    "paused": (PAUSED, RESUMED),
+    "trailer": (TRAILER_ATTACHED, TRAILER_DETACHED),
+}
+
+
+class EdgeDetector:
+    """Zamienia kolejne ramki na zdarzenia (zbocza) z debounce i histerezą."""
+
+    def __init__(self,
+                 debounce_ms: int = 500,
+                 move_on_kmh: float = 2.0,
+                 move_off_kmh: float = 0.5,
+                 time_jump_min: float = 30.0,
+                 signal_debounce_ms: Optional[Dict[str, int]] = None):
+        self.move_on_kmh = float(move_on_kmh)
+        self.move_off_kmh = min(float(move_off_kmh), self.move_on_kmh)
+        self.time_jump_sec = max(1.0, float(time_jump_min) * 60.0)
+        self._hold = {name: max(0, int(debounce_ms)) / 1000.0 for name in (*_BOOL_SIGNALS, "job")}
+        for name, ms in (signal_debounce_ms or {}).items():
+            if name not in self._hold:
+                raise ValueError(f"unknown signal {name!r} (expected one of {tuple(self._hold)})")
+            self._hold[name] = max(0, int(ms)) / 1000.0
+        self._state = {name: _Debounced() for name in self._hold}
+        self._game_time: Optional[int] = None
+        self._subs: List[Tuple[Callable[[TelemetryEvent], None], Optional[frozenset]]] = []
+        self.counts: Dict[str, int] = {}
+
+    # ---------------------------------------------------------------
+    # Subskrypcje
+    # ---------------------------------------------------------------
+    def subscribe(self, callback: Callable[[TelemetryEvent], None], kinds: Optional[Iterable[str]] = None) -> None:
+        """callback(zdarzenie) dla wybranych rodzajów (None = wszystkie); wołany w wątku feed()."""
+        self._subs = self._subs + [(callback, frozenset(kinds) if kinds is not None else None)]
+
+    def unsubscribe(self, callback: Callable[[TelemetryEvent], None]) -> None:
+        self._subs = [s for s in self._subs if s[0] != callback]
+
+    def _emit(self, ev: TelemetryEvent) -> None:
+        self.counts[ev.kind] = self.counts.get(ev.kind, 0) + 1
+        for callback, kinds in self._subs:
+            if kinds is not None and ev.kind not in kinds:
+                continue
+            try:
+                callback(ev)
+            except Exception as e:
+                print(f"[EdgeDetector] {ev.kind} subscriber error: {e}")
+
+    # ---------------------------------------------------------------
+    # Detekcja
+    # ---------------------------------------------------------------
+    def _moving(self, frame: Any) -> Optional[bool]:
+        speed = _field(frame, "speed_kmh")
+        if speed is None:
+            return None
+        moving = self._state["moving"].value
+        return float(speed) > (self.move_off_kmh if moving is True else self.move_on_kmh)
+
+    def feed(self, frame: Any, now: Optional[float] = None) -> List[TelemetryEvent]:
+        """Przetwarza ramkę; zwraca zdarzenia (już rozesłane subskrybentom)."""
+        now = time.monotonic() if now is None else now
+        ts = time.time()
+        gt = _game_time(frame)
+        out: List[TelemetryEvent] = []
+
+        values = {
+            "engine": _flag(_field(frame, "engine_on")),
+            "parking_brake": _flag(_field(frame, "parking_brake")),
+            "moving": self._moving(frame),
+            "paused": _flag(_field(frame, "paused")),
+            "trailer": _flag(_field(frame, "trailer", "attached")),
+        }
+        for name, v in values.items():
+            if v is None:
+                continue
+            st = self._state[name]
+            if st.update(v, now, self._hold[name]):
+                on, off = _BOOL_SIGNALS[name]
+                out.append(TelemetryEvent(on if v else off, v, not v, ts, gt, frame))
+
+        job = self._state["job"]
+        prev_job = job.value
+        if job.update(_job_key(frame), now, self._hold["job"]):
+            if prev_job is not None:
+                out.append(TelemetryEvent(JOB_FINISHED, None, prev_job, ts, gt, frame))
+            if job.value is not None:
+                out.append(TelemetryEvent(JOB_STARTED, job.value, prev_job, ts, gt, frame))
+
+        if gt is not None:
+            if self._game_time is not None:
+                jump = gt - self._game_time
+                if jump < 0 or jump > self.time_jump_sec:
+                    out.append(TelemetryEvent(GAME_TIME_JUMP, jump, self._game_time, ts, gt, frame))
+            self._game_time = gt
+
+        for ev in out:
+            self._emit(ev)
+        return out
+
+    def reset(self) -> None:
+        """Następna ramka ustala stan od nowa (np. po utracie połączenia)."""
+        self._state = {name: _Debounced() for name in self._hold}
+        self._game_time = None
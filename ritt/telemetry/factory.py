@@ -47,11 +47,69 @@ def _import_provider(module_name: str, class_name: str):
 def build_provider():
     """
     Buduje provider telemetrii zgodnie z konfiguracją.
-    Obsługiwane: 'http', 'dll', 'sim' (domyślnie 'http').
+    Obsługiwane: 'http', 'dll', 'sim', 'replay', 'shm', 'stream', 'multi' (domyślnie 'http').
+    'multi' łączy źródła z multi_sources (np. "dll,http") w TelemetryMultiplexer.
+    Gdy ustawiono record_path, wynik każdego poll() jest dopisywany do nagrania
+    (provider HTTP oddaje wtedy pełny JSON, nie tylko gałęzie dla mappera).
     """
     mode = str(_cfg_get("telemetry_mode", _cfg_get("mode", "http"))).lower()
+    record_path = _cfg_get("record_path", "")
+    recording = bool(record_path) and mode != "replay"
+    provider = _build_source(mode, selective=not recording)
+
+    if recording:
+        from .replay import RecordingProvider, TelemetryRecorder
+        provider = RecordingProvider(provider, TelemetryRecorder(record_path))
+    return provider
+
+def _build_multi(selective: bool = True):
+    TelemetryMultiplexer = _import_provider("ritt.telemetry.multiplex", "TelemetryMultiplexer")
+    sources = []
+    for name in str(_cfg_get("multi_sources", "dll,http")).split(","):
+        name = name.strip().lower()
+        if not name or name == "multi":
+            continue
+        try:
+            p = _build_source(name, selective)
+        except Exception as e:
+            print(f"[factory] multi: source '{name}' unavailable: {e}")
+            continue
+        if name == "dll" and getattr(p, "dll", None) is None:
+            # brak biblioteki – provider oddawałby same zera jako "zdrowe" ramki
+            print("[factory] multi: source 'dll' skipped (library not loaded)")
+            continue
+        sources.append((name, p))
+    return TelemetryMultiplexer(
+        sources,
+        interval_ms=int(_cfg_get("multi_interval_ms", 100)),
+        stale_ms=int(_cfg_get("multi_stale_ms", 1000)),
+    )
+
+def _build_source(mode: str, selective: bool = True):
+    if mode == "multi":
+        return _build_multi(selective)
+
     speed_scale = float(_cfg_get("speed_scale", 1.0))
 
+    if mode == "replay":
+        TelemetryReplay = _import_provider("ritt.telemetry.replay", "TelemetryReplay")
+        return TelemetryReplay(
+            path=_cfg_get("replay_path", "telemetry.rec"),
+            speed=float(_cfg_get("replay_speed", 1.0)),
+            loop=bool(_cfg_get("replay_loop", False)),
+        )
+
+    if mode == "shm":
+        TelemetrySHM = _import_provider("ritt.telemetry.shm", "TelemetrySHM")
+        return TelemetrySHM(name=_cfg_get("shm_name", "") or None, path=_cfg_get("shm_path", "") or None,
+                            speed_scale=speed_scale)
+
+    if mode == "stream":
+        from .stream import parse_addr
+        TelemetryStream = _import_provider("ritt.telemetry.stream", "TelemetryStream")
+        host, port = parse_addr(str(_cfg_get("stream_addr", "127.0.0.1:25556")))
+        return TelemetryStream(host=host, port=port)
+
     if mode == "dll":
         TelemetryDLL = _import_provider("ritt.telemetry.providers.dll", "TelemetryDLL")
         return TelemetryDLL(dll_path=_cfg_get("dll_path", None), speed_scale=speed_scale)
@@ -66,4 +124,5 @@ def build_provider():
         url=_cfg_get("http_url", "http://127.0.0.1:25555/api/ets2/telemetry"),
         timeout=_cfg_get("http_timeout", 0.5),
         speed_scale=speed_scale,
+        selective=selective,
     )
@@ -0,0 +1,136 @@
+# ritt/telemetry/gameday.py
+"""
+Naliczanie czasu jazdy/pracy/odpoczynku per dzień gry i tydzień ISO (czas gry).
+
+Odcinek między dwiema kolejnymi ramkami dostaje stan z WCZEŚNIEJSZEJ ramki
+(jazda: > 0.1 km/h, praca: silnik ON, inaczej odpoczynek). Pauza nie nalicza nic.
+Odcinek przechodzący przez północ gry jest dzielony między oba dni.
+Skok czasu gry (sen, wczytanie zapisu) dłuższy niż MAX_ACTIVE_GAP_SEC liczymy
+jako odpoczynek – w grze nie da się jechać „przez” przeskok zegara.
+"""
+from __future__ import annotations
+import threading, time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from .model import TelemetryFrame
+
+DRIVE_SPEED_KMH = 0.1
+MAX_ACTIVE_GAP_SEC = 300
+DAY_SEC = 86400
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def game_datetime(tf: TelemetryFrame) -> Optional[datetime]:
+    """Czas gry z ramki (naive UTC): game_time_unix, a gdy brak – game_time_iso."""
+    gt = tf.game_time_unix
+    if gt:
+        try:
+            return _EPOCH + timedelta(seconds=int(gt))
+        except (OverflowError, ValueError):
+            return None
+    return parse_game_iso(tf.game_time_iso)
+
+
+def parse_game_iso(iso: Any) -> Optional[datetime]:
+    """Czas gry z napisu ISO Funbita ("0001-01-05T14:31:00Z") jako naive UTC; None, gdy brak/błąd."""
+    if isinstance(iso, str) and iso:
+        try:
+            return datetime.fromisoformat(iso.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return None
+    return None
+
+
+def game_seconds(dt: datetime) -> int:
+    """Sekundy od 1970-01-01 (dla dat gry z roku 0001 – ujemne)."""
+    return int((dt - _EPOCH).total_seconds())
+
+
+def iso_week(day) -> str:
+    y, w, _ = day.isocalendar()
+    return f"{y:04d}-W{w:02d}"
+
+
+class GameDayAccumulator:
+    """
+    Sumuje sekundy per (dzień gry, tydzień ISO) w pamięci; drain() oddaje
+    zaległe przyrosty do zapisu (upsert w TelemetryDB). Bezpieczne wątkowo.
+    Każdy dzień pamięta też ostatni czas gry i chwilę (ts UTC) ostatniego
+    przyrostu – po starcie odtwarzamy dzień zapisany najpóźniej, a nie
+    najpóźniejszą datę (wczytany starszy zapis gry).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, str], list] = {}
+        self._prev_t: Optional[int] = None
+        self._prev_state: Optional[int] = None  # 0=jazda, 1=praca, 2=odpoczynek
+        self._last_iso: Optional[str] = None
+        self._last_dt: Optional[datetime] = None
+
+    def _frame_datetime(self, tf: TelemetryFrame) -> Optional[datetime]:
+        # ten sam ISO co poprzednio (pauza, rzadszy zegar) – bez ponownego parsowania
+        if not tf.game_time_unix and tf.game_time_iso is not None and tf.game_time_iso == self._last_iso:
+            return self._last_dt
+        dt = game_datetime(tf)
+        self._last_iso, self._last_dt = tf.game_time_iso, dt
+        return dt
+
+    def feed(self, tf: TelemetryFrame) -> Optional[datetime]:
+        """Nalicza odcinek od poprzedniej ramki; zwraca czas gry tej ramki (lub None)."""
+        with self._lock:
+            dt = self._frame_datetime(tf)
+            if dt is None:
+                return None
+            t = game_seconds(dt)
+            if tf.paused:
+                # w pauzie zegar stoi – zapamiętujemy tylko punkt odniesienia
+                self._prev_t = t
+                return dt
+            if self._prev_t is not None and self._prev_state is not None:
+                span = t - self._prev_t
+                if span > 0:
+                    state = self._prev_state if span <= MAX_ACTIVE_GAP_SEC else 2
+                    self._add_span(self._prev_t, t, state)
+            self._prev_t = t
+            if float(tf.speed_kmh or 0.0) > DRIVE_SPEED_KMH:
+                self._prev_state = 0
+            elif tf.engine_on:
+                self._prev_state = 1
+            else:
+                self._prev_state = 2
+            return dt
+
+    def _add_span(self, t0: int, t1: int, state: int) -> None:
+        """Dolicza odcinek [t0, t1) – kawałkami, po jednym na każdy dzień gry."""
+        now = time.time()
+        while t0 < t1:
+            end = min(t1, (t0 // DAY_SEC + 1) * DAY_SEC)
+            day = (_EPOCH + timedelta(seconds=t0)).date()
+            acc = self._pending.setdefault((day.isoformat(), iso_week(day)), [0, 0, 0, end, now])
+            acc[state] += end - t0
+            acc[3], acc[4] = end, now
+            t0 = end
+
+    def drain(self) -> Dict[Tuple[str, str], list]:
+        """
+        Zwraca i zeruje zaległe przyrosty
+        {(game_day, iso_week): [drive, work, rest, last_game_time, updated_at]}.
+        """
+        with self._lock:
+            out, self._pending = self._pending, {}
+            return out
+
+    def merge(self, pending: Dict[Tuple[str, str], list]) -> None:
+        """Oddaje przyrosty z powrotem (np. po nieudanym zapisie)."""
+        with self._lock:
+            for key, vals in pending.items():
+                acc = self._pending.get(key)
+                if acc is None:
+                    self._pending[key] = list(vals)
+                    continue
+                for i in range(3):
+                    acc[i] += vals[i]
+                if vals[4] > acc[4]:  # nowszy przyrost zostaje ostatnim
+                    acc[3], acc[4] = vals[3], vals[4]
@@ -0,0 +1,64 @@
+# ritt/telemetry/jsondecode.py
+"""
+Dekodowanie odpowiedzi Funbit Telemetry Server.
+
+loads()           – pełne dekodowanie: orjson, jeśli jest, inaczej json (stdlib).
+decode_sections() – zwraca tylko wybrane gałęzie najwyższego poziomu
+                    (game/truck/trailer/job/navigation): loads() i odrzucenie
+                    zbędnych kluczy. Dekodowanie gałęzi nie jest pomijane
+                    (przeskakiwanie w Pythonie – skanerem raw_decode czy
+                    wyrażeniem regularnym – było wolniejsze od json.loads(),
+                    patrz benchmark), więc czas jest taki jak loads(); zysk to
+                    mniejszy wynik: mniej żywych obiektów i mniejszy 'raw' dla
+                    mappera/DeltaEncoder/nagrania.
+
+Przyspieszenie daje tylko orjson (opcjonalny, zob. requirements.txt):
+pip install orjson – wykrywany przy imporcie, bez zmian w ritt.ini;
+backend() mówi, który dekoder jest w użyciu.
+
+Benchmark: benchmarks/bench_json_decode.py.
+"""
+from __future__ import annotations
+import json
+from typing import Any, Iterable, Optional, Union
+
+try:
+    import orjson  # opcjonalne – szybszy dekoder JSON (pip install orjson)
+    _HAS_ORJSON = True
+except Exception:
+    orjson = None  # type: ignore[assignment]
+    _HAS_ORJSON = False
+
+# gałęzie potrzebne mapperowi funbit_v9 i providerom HTTP
+FUNBIT_SECTIONS = frozenset(("game", "truck", "trailer", "job", "navigation"))
+
+Payload = Union[bytes, bytearray, memoryview, str]
+
+
+def backend() -> str:
+    """Nazwa używanego dekodera ('orjson' albo 'json')."""
+    return "orjson" if _HAS_ORJSON else "json"
+
+
+def loads(buf: Payload) -> Any:
+    """Pełne dekodowanie (bytes lub str)."""
+    if _HAS_ORJSON:
+        return orjson.loads(buf)
+    if isinstance(buf, (bytearray, memoryview)):
+        buf = bytes(buf)
+    return json.loads(buf)
+
+
+def decode_sections(buf: Payload, sections: Optional[Iterable[str]] = FUNBIT_SECTIONS) -> Any:
+    """
+    Zwraca tylko podane gałęzie najwyższego poziomu obiektu JSON.
+    sections=None -> pełne dekodowanie (jak loads()).
+    """
+    if sections is None:
+        return loads(buf)
+    keep = sections if isinstance(sections, frozenset) else frozenset(sections)
+    data = loads(buf)
+    if isinstance(data, dict):
+        for k in [k for k in data if k not in keep]:
+            del data[k]
+    return data
@@ -0,0 +1,340 @@
+# ritt/telemetry/mappers/schema.py
+"""
+Deklaratywne mapowanie JSON pluginu telemetrii -> model (TelemetryFrame).
+
+Schemat to zwykłe dane (słownik, można go wczytać z JSON – load_schema_file()):
+  {
+    "name": "funbit_v9",
+    "detect": {"requires": ["truck"],                        # ścieżki, które muszą istnieć
+               "path": "game.telemetryPluginVersion",        # opcjonalnie: wersja pluginu
+               "values": ["9"]},
+    "frame": [ [pole, [ścieżki...], konwerter, domyślna], ... ],   # pola TelemetryFrame
+    "sections": [ {"attr": "truck", "model": "TruckInfo", "path": "truck",
+                   "fields": [ [pole, [ścieżki względem sekcji...], konwerter, domyślna], ... ]}, ... ]
+  }
+Ścieżki kandydujące: pierwsza istniejąca wygrywa ("engineOn", "engine_on", ...);
+kropka schodzi głębiej ("placement.heading"). Gdy żadna nie istnieje, konwerter
+dostaje wartość domyślną (jak get_first(..., default) w dawnym ręcznym mapperze).
+Konwertery (CONVERTERS): raw, bool, float, int, str, vec3, kmh – szablony wyrażeń,
+nowe można dopisać bez zmiany kompilatora. Nazwy (name, attr, pola) muszą być
+identyfikatorami Pythona, model sekcji – jedną z SECTION_MODELS; inaczej ValueError.
+
+register_schema() kompiluje schemat przy imporcie do wyspecjalizowanego kodu (jak
+dataclasses generuje __init__): bez pętli po tabeli, bez get_first(*keys),
+każdą wspólną gałąź (np. truck.placement) pobiera raz.
+Wynik: CompiledSchema.frame(raw), .sections[attr](sekcja).
+
+Benchmark względem ręcznego mappera: benchmarks/bench_mapper.py.
+"""
+from __future__ import annotations
+import json, keyword, math
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from .. import model as _model
+from ..model import Vec3
+
+SPEED_SCALE = 3.6  # m/s -> km/h
+
+_E: Dict[str, Any] = {}  # pusta gałąź (tylko do odczytu)
+
+
+def to_bool(v) -> bool:
+    if isinstance(v, bool): return v
+    if v is None: return False
+    if isinstance(v, (int, float)): return v != 0
+    if isinstance(v, str):
+        s = v.strip().lower()
+        if s in ("1","true","t","yes","y","on"): return True
+        if s in ("0","false","f","no","n","off",""): return False
+    return bool(v)
+
+
+def vec3(d: Dict[str, Any] | None) -> Vec3:
+    if not isinstance(d, dict): return Vec3()
+    return Vec3(float(d.get("x") or 0.0), float(d.get("y") or 0.0), float(d.get("z") or 0.0))
+
+
+# nazwa -> szablon wyrażenia ({v} = surowa wartość)
+CONVERTERS: Dict[str, str] = {
+    "raw": "{v}",
+    "bool": "({v} if {v}.__class__ is bool else _to_bool({v}))",
+    "float": "float({v} or 0.0)",
+    "int": "int({v} or 0)",
+    "str": "(None if {v} is None else str({v}))",
+    "vec3": "_vec3({v})",
+    "kmh": "float({v} or 0.0) * _SPEED_SCALE",
+}
+
+_GLOBALS: Dict[str, Any] = {"_to_bool": to_bool, "_vec3": vec3, "_SPEED_SCALE": SPEED_SCALE, "_E": _E}
+
+# klasy, które schemat może wskazać jako "model" sekcji (tylko te trafiają do kodu)
+SECTION_MODELS = ("GameInfo", "TruckInfo", "TrailerInfo", "JobInfo", "NavigationInfo")
+
+
+# ---------------------------------------------------------------
+# Tabela: Funbit ETS2 Telemetry Server (plugin v9)
+# ---------------------------------------------------------------
+_PLACEMENT = [
+    ["heading", ["placement.heading"], "float", None],
+    ["pitch", ["placement.pitch"], "float", None],
+    ["roll", ["placement.roll"], "float", None],
+]
+
+FUNBIT_V9: Dict[str, Any] = {
+    "name": "funbit_v9",
+    "detect": {"requires": ["truck"]},
+    "frame": [
+        ["paused", ["game.paused"], "bool", False],
+        ["speed_kmh", ["truck.speed"], "kmh", None],
+        ["engine_on", ["truck.engineOn", "truck.engine_on", "truck.engine"], "bool", False],
+        ["parking_brake", ["truck.parkBrakeOn", "truck.parkingBrake", "truck.parking_brake"], "bool", False],
+        ["game_time_iso", ["game.time"], "raw", None],
+    ],
+    "sections": [
+        {"attr": "game", "model": "GameInfo", "path": "game", "fields": [
+            ["connected", ["connected"], "bool", None],
+            ["game_name", ["gameName"], "raw", None],
+            ["paused", ["paused"], "bool", None],
+            ["time_iso", ["time"], "raw", None],
+            ["time_scale", ["timeScale"], "raw", None],
+            ["next_rest_iso", ["nextRestStopTime"], "raw", None],
+            ["version", ["version"], "raw", None],
+            ["plugin_version", ["telemetryPluginVersion"], "str", None],
+        ]},
+        {"attr": "truck", "model": "TruckInfo", "path": "truck", "fields": [
+            ["id", ["id"], "raw", None],
+            ["make", ["make"], "raw", None],
+            ["model", ["model"], "raw", None],
+            ["speed_ms", ["speed"], "float", None],
+            ["speed_kmh", ["speed"], "kmh", None],
+            ["engine_on", ["engineOn", "engine_on", "engine"], "bool", False],
+            ["park_brake_on", ["parkBrakeOn", "parkingBrake", "parking_brake"], "bool", False],
+            ["cruise_on", ["cruiseControlOn"], "bool", None],
+            ["cruise_speed_kmh", ["cruiseControlSpeed"], "float", None],
+            ["odometer_km", ["odometer"], "float", None],
+            ["gear", ["gear"], "raw", None],
+            ["rpm", ["engineRpm"], "float", None],
+            ["battery_v", ["batteryVoltage"], "float", None],
+            ["lights_beam_low", ["lightsBeamLowOn"], "bool", None],
+            ["lights_parking", ["lightsParkingOn"], "bool", None],
+            ["placement", ["placement"], "vec3", None],
+            *_PLACEMENT,
+            ["acceleration", ["acceleration"], "vec3", None],
+            ["head", ["head"], "vec3", None],
+            ["cabin", ["cabin"], "vec3", None],
+            ["hook", ["hook"], "vec3", None],
+        ]},
+        {"attr": "trailer", "model": "TrailerInfo", "path": "trailer", "fields": [
+            ["attached", ["attached"], "bool", None],
+            ["id", ["id"], "raw", None],
+            ["name", ["name"], "raw", None],
+            ["mass_kg", ["mass"], "float", None],
+            ["wear", ["wear"], "float", None],
+            ["placement", ["placement"], "vec3", None],
+            *_PLACEMENT,
+        ]},
+        {"attr": "job", "model": "JobInfo", "path": "job", "fields": [
+            ["income", ["income"], "int", None],
+            ["deadline_iso", ["deadlineTime"], "raw", None],
+            ["remaining_iso", ["remainingTime"], "raw", None],
+            ["source_city", ["sourceCity"], "raw", None],
+            ["source_company", ["sourceCompany"], "raw", None],
+            ["dest_city", ["destinationCity"], "raw", None],
+            ["dest_company", ["destinationCompany"], "raw", None],
+        ]},
+        {"attr": "navigation", "model": "NavigationInfo", "path": "navigation", "fields": [
+            ["eta_iso", ["estimatedTime"], "raw", None],
+            ["distance_m", ["estimatedDistance"], "int", None],
+            ["speed_limit_kmh", ["speedLimit"], "int", None],
+        ]},
+    ],
+}
+
+
+# ---------------------------------------------------------------
+# Generator kodu
+# ---------------------------------------------------------------
+class _Gen:
+    """Zbiera linie jednej funkcji; wspólne gałęzie i wartości liczone raz."""
+
+    def __init__(self, consts: List[Any]):
+        self.lines: List[str] = []
+        self.consts = consts
+        self._parents: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+        self._values: Dict[Tuple[str, Tuple[str, ...], str], str] = {}
+        self._n = 0
+
+    def _name(self, prefix: str) -> str:
+        self._n += 1
+        return f"{prefix}{self._n}"
+
+    def literal(self, value: Any) -> str:
+        if value is None or isinstance(value, (bool, int, str)) or (isinstance(value, float) and math.isfinite(value)):
+            return repr(value)
+        self.consts.append(value)
+        return f"_C[{len(self.consts) - 1}]"
+
+    def parent(self, base: str, parts: Tuple[str, ...]) -> str:
+        """Zmienna z gałęzią base[parts...] (pusta, gdy brak albo to nie słownik)."""
+        if not parts:
+            return base
+        key = (base, parts)
+        if key not in self._parents:
+            up = self.parent(base, parts[:-1])
+            name = self._name("p")
+            self.lines.append(f"{name} = {up}.get({parts[-1]!r})")
+            self.lines.append(f"if {name}.__class__ is not dict: {name} = _E")
+            self._parents[key] = name
+        return self._parents[key]
+
+    def value(self, base: str, candidates: Sequence[str], default: Any) -> str:
+        """Zmienna z wartością pierwszej istniejącej ścieżki (albo domyślną)."""
+        key = (base, tuple(candidates), repr(default))
+        if key not in self._values:
+            name = self._name("v")
+            if len(candidates) == 1:
+                # jedna ścieżka: dict.get(k, domyślna) – to samo co 'in' + indeks, szybciej
+                parts = tuple(candidates[0].split("."))
+                par = self.parent(base, parts[:-1])
+                default_expr = "" if default is None else f", {self.literal(default)}"
+                self.lines.append(f"{name} = {par}.get({parts[-1]!r}{default_expr})")
+                self._values[key] = name
+                return name
+            for i, path in enumerate(candidates):
+                parts = tuple(path.split("."))
+                par = self.parent(base, parts[:-1])
+                self.lines.append(f"{'if' if i == 0 else 'elif'} {parts[-1]!r} in {par}: {name} = {par}[{parts[-1]!r}]")
+            if candidates:
+                self.lines.append(f"else: {name} = {self.literal(default)}")
+            else:
+                self.lines.append(f"{name} = {self.literal(default)}")
+            self._values[key] = name
+        return self._values[key]
+
+    def field(self, base: str, spec: Sequence[Any]) -> Tuple[str, str]:
+        target, candidates, conv = _ident(spec[0], "field"), _paths(spec[1]), spec[2] or "raw"
+        default = spec[3] if len(spec) > 3 else None
+        if conv not in CONVERTERS:
+            raise ValueError(f"unknown converter '{conv}' for field '{target}'")
+        v = self.value(base, candidates, default)
+        return target, CONVERTERS[conv].format(v=v)
+
+
+def _ident(value: Any, what: str) -> str:
+    """Nazwa ze schematu wstawiana do kodu wprost – tylko identyfikator, nie słowo kluczowe."""
+    if not isinstance(value, str) or not value.isidentifier() or keyword.iskeyword(value):
+        raise ValueError(f"invalid {what} name: {value!r}")
+    return value
+
+
+def _paths(candidates: Any) -> List[str]:
+    """Ścieżki kandydujące – lista napisów (do kodu trafiają tylko przez repr())."""
+    if not isinstance(candidates, (list, tuple)) or not all(isinstance(c, str) for c in candidates):
+        raise ValueError(f"invalid schema paths: {candidates!r}")
+    return list(candidates)
+
+
+def _function(name: str, arg: str, gen: _Gen, result: str) -> str:
+    body = "".join(f"    {line}\n" for line in gen.lines)
+    return f"def {name}({arg}):\n{body}    return {result}\n"
+
+
+class CompiledSchema:
+    """Wygenerowane funkcje mapujące dla jednego schematu."""
+
+    def __init__(self, schema: Dict[str, Any]):
+        # schemat może pochodzić z pliku (load_schema_file) – do kodu trafiają tylko
+        # sprawdzone identyfikatory, znane klasy modelu i repr() ścieżek/wartości
+        self.name: str = _ident(schema["name"], "schema")
+        self.schema = schema
+        self.detect_spec: Dict[str, Any] = schema.get("detect") or {}
+        consts: List[Any] = []
+        sources: List[str] = []
+        section_funcs: List[Tuple[str, str, str]] = []  # (attr, nazwa funkcji, ścieżka sekcji)
+
+        for sec in schema.get("sections", ()):
+            attr = _ident(sec["attr"], "section")
+            if sec["model"] not in SECTION_MODELS:
+                raise ValueError(f"unknown model '{sec['model']}' for section '{attr}'")
+            path = sec.get("path", attr)
+            if not isinstance(path, str):
+                raise ValueError(f"invalid path for section '{attr}': {path!r}")
+            gen = _Gen(consts)
+            args = ", ".join(f"{t}={e}" for t, e in (gen.field("s", spec) for spec in sec["fields"]))
+            fname = f"_{self.name}_{attr}"
+            sources.append(_function(fname, "s", gen, f"{sec['model']}({args})"))
+            section_funcs.append((attr, fname, path))
+
+        frame = _Gen(consts)
+        args = [f"{t}={e}" for t, e in (frame.field("raw", spec) for spec in schema.get("frame", ()))]
+        for attr, fname, path in section_funcs:
+            args.append(f"{attr}={fname}({frame.parent('raw', tuple(path.split('.')))})")
+        args.append("raw=raw")
+        sources.append(_function(f"_{self.name}_frame", "raw", frame, f"TelemetryFrame({', '.join(args)})"))
+
+        self.source = "\n".join(sources)
+        ns: Dict[str, Any] = dict(_GLOBALS, _C=consts)
+        ns.update((n, getattr(_model, n)) for n in (*SECTION_MODELS, "TelemetryFrame"))
+        exec(compile(self.source, f"<schema {self.name}>", "exec"), ns)
+
+        self.frame: Callable[[Dict[str, Any]], Any] = ns[f"_{self.name}_frame"]
+        self.sections: Dict[str, Callable[[Dict[str, Any]], Any]] = {attr: ns[fname] for attr, fname, _ in section_funcs}
+
+    def matches(self, raw: Dict[str, Any]) -> bool:
+        for path in self.detect_spec.get("requires", ()):
+            if _lookup(raw, path) is _MISSING:
+                return False
+        path = self.detect_spec.get("path")
+        if path:
+            values = [str(v) for v in self.detect_spec.get("values", ())]
+            return str(_lookup(raw, path)) in values
+        return True
+
+
+_MISSING = object()
+
+
+def _lookup(raw: Any, path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(raw, dict) or key not in raw:
+            return _MISSING
+        raw = raw[key]
+    return raw
+
+
+# ---------------------------------------------------------------
+# Rejestr schematów i wykrywanie wersji
+# ---------------------------------------------------------------
+_SCHEMAS: List[CompiledSchema] = []
+
+
+def register_schema(schema: Dict[str, Any]) -> CompiledSchema:
+    """Kompiluje i rejestruje schemat; później zarejestrowane są sprawdzane najpierw."""
+    compiled = CompiledSchema(schema)
+    _SCHEMAS[:] = [s for s in _SCHEMAS if s.name != compiled.name]
+    _SCHEMAS.insert(0, compiled)
+    return compiled
+
+
+def load_schema_file(path: str) -> CompiledSchema:
+    """Rejestruje schemat zapisany jako JSON (nowa wersja pluginu bez zmian w kodzie)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return register_schema(json.load(f))
+
+
+def get_schema(name: str) -> CompiledSchema:
+    for s in _SCHEMAS:
+        if s.name == name:
+            return s
+    raise KeyError(name)
+
+
+def detect_schema(raw: Dict[str, Any], default: str = "funbit_v9") -> CompiledSchema:
+    """Pierwszy pasujący schemat (najnowsze rejestracje najpierw), inaczej domyślny."""
+    for s in _SCHEMAS:
+        if s.matches(raw):
+            return s
+    return get_schema(default)
+
+
+register_schema(FUNBIT_V9)
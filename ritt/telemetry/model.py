@@ -1,10 +1,43 @@
 # ritt/telemetry/model.py
+"""
+Model ramki telemetrii.
+
+Klasy są dataclassami ze __slots__ (bez __dict__ na instancję – mniej pamięci
+w buforach historii i szybsze tworzenie co tick). Przy frozen_model = 1
+w ritt.ini ramki są dodatkowo niemodyfikowalne (każda próba zmiany ramki
+trzymanej w historii kończy się FrozenInstanceError; tworzenie jest nieco wolniejsze).
+dataclass(slots=True) wymaga Pythona 3.10+.
+
+Serializacja: to_dict() (zagnieżdżone słowniki, świeże kopie) i
+TelemetryFrame.to_flat() – płaski słownik dla UI (jak poll_normalized()).
+Benchmark: benchmarks/bench_model.py.
+"""
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import Optional, Dict, Any
 
-@dataclass
-class GameInfo:
+try:
+    from ritt.config import CFG  # type: ignore
+except Exception:
+    CFG = {}  # type: ignore[assignment]
+
+FROZEN = bool(CFG.get("frozen_model", False)) if isinstance(CFG, dict) else False
+
+_model = dataclass(slots=True, frozen=FROZEN)
+
+
+class _Model:
+    """
+    Baza modeli. Każda klasa ma własne to_dict() zapisane literałem słownika
+    (Vec3 wpisane wprost w sekcje), bo to_flat() idzie co ramkę w normalize()
+    i push(), a pętla po fields() z getattr() była ok. 5x wolniejsza.
+    Zgodność kluczy z polami sprawdza _check_to_dict() przy imporcie.
+    """
+    __slots__ = ()
+
+
+@_model
+class GameInfo(_Model):
     connected: Optional[bool] = None
     game_name: Optional[str] = None
     paused: Optional[bool] = None
@@ -16,14 +49,31 @@ class GameInfo:
     version: Optional[str] = None
     plugin_version: Optional[str] = None
 
-@dataclass
-class Vec3:
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "game_name": self.game_name,
+            "paused": self.paused,
+            "time_iso": self.time_iso,
+            "time_unix": self.time_unix,
+            "minutes": self.minutes,
+            "time_scale": self.time_scale,
+            "next_rest_iso": self.next_rest_iso,
+            "version": self.version,
+            "plugin_version": self.plugin_version,
+        }
+
+@_model
+class Vec3(_Model):
     x: float = 0.0
     y: float = 0.0
     z: float = 0.0
 
-@dataclass
-class TruckInfo:
+    def to_dict(self) -> Dict[str, Any]:
+        return {"x": self.x, "y": self.y, "z": self.z}
+
+@_model
+class TruckInfo(_Model):
     id: Optional[str] = None
     make: Optional[str] = None
     model: Optional[str] = None
@@ -48,8 +98,36 @@ class TruckInfo:
     cabin: Vec3 = field(default_factory=Vec3)
     hook: Vec3 = field(default_factory=Vec3)
 
-@dataclass
-class TrailerInfo:
+    def to_dict(self) -> Dict[str, Any]:
+        p, a, h, c, k = self.placement, self.acceleration, self.head, self.cabin, self.hook
+        return {
+            "id": self.id,
+            "make": self.make,
+            "model": self.model,
+            "speed_ms": self.speed_ms,
+            "speed_kmh": self.speed_kmh,
+            "engine_on": self.engine_on,
+            "park_brake_on": self.park_brake_on,
+            "cruise_on": self.cruise_on,
+            "cruise_speed_kmh": self.cruise_speed_kmh,
+            "odometer_km": self.odometer_km,
+            "gear": self.gear,
+            "rpm": self.rpm,
+            "battery_v": self.battery_v,
+            "lights_beam_low": self.lights_beam_low,
+            "lights_parking": self.lights_parking,
+            "placement": {"x": p.x, "y": p.y, "z": p.z},
+            "heading": self.heading,
+            "pitch": self.pitch,
+            "roll": self.roll,
+            "acceleration": {"x": a.x, "y": a.y, "z": a.z},
+            "head": {"x": h.x, "y": h.y, "z": h.z},
+            "cabin": {"x": c.x, "y": c.y, "z": c.z},
+            "hook": {"x": k.x, "y": k.y, "z": k.z},
+        }
+
+@_model
+class TrailerInfo(_Model):
     attached: Optional[bool] = None
     id: Optional[str] = None
     name: Optional[str] = None
@@ -60,8 +138,22 @@ class TrailerInfo:
     pitch: Optional[float] = None
     roll: Optional[float] = None
 
-@dataclass
-class JobInfo:
+    def to_dict(self) -> Dict[str, Any]:
+        p = self.placement
+        return {
+            "attached": self.attached,
+            "id": self.id,
+            "name": self.name,
+            "mass_kg": self.mass_kg,
+            "wear": self.wear,
+            "placement": {"x": p.x, "y": p.y, "z": p.z},
+            "heading": self.heading,
+            "pitch": self.pitch,
+            "roll": self.roll,
+        }
+
+@_model
+class JobInfo(_Model):
     income: Optional[int] = None
     deadline_iso: Optional[str] = None
     remaining_iso: Optional[str] = None
@@ -70,14 +162,32 @@ class JobInfo:
     dest_city: Optional[str] = None
     dest_company: Optional[str] = None
 
-@dataclass
-class NavigationInfo:
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "income": self.income,
+            "deadline_iso": self.deadline_iso,
+            "remaining_iso": self.remaining_iso,
+            "source_city": self.source_city,
+            "source_company": self.source_company,
+            "dest_city": self.dest_city,
+            "dest_company": self.dest_company,
+        }
+
+@_model
+class NavigationInfo(_Model):
     eta_iso: Optional[str] = None
     distance_m: Optional[int] = None
     speed_limit_kmh: Optional[int] = None
 
-@dataclass
-class TelemetryFrame:
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "eta_iso": self.eta_iso,
+            "distance_m": self.distance_m,
+            "speed_limit_kmh": self.speed_limit_kmh,
+        }
+
+@_model
+class TelemetryFrame(_Model):
     # 1) płaski zestaw dla tachografu
     paused: bool = False
     speed_kmh: float = 0.0
@@ -96,3 +206,52 @@ class TelemetryFrame:
 
     # 3) surowy JSON
     raw: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "paused": self.paused,
+            "speed_kmh": self.speed_kmh,
+            "engine_on": self.engine_on,
+            "parking_brake": self.parking_brake,
+            "game_time_iso": self.game_time_iso,
+            "game_time_unix": self.game_time_unix,
+            "game_minutes": self.game_minutes,
+            "game": self.game.to_dict(),
+            "truck": self.truck.to_dict(),
+            "trailer": self.trailer.to_dict(),
+            "job": self.job.to_dict(),
+            "navigation": self.navigation.to_dict(),
+            "raw": self.raw,
+        }
+
+    def to_flat(self) -> Dict[str, Any]:
+        """Płaski słownik dla UI: pola tachografu + snapshoty jako słowniki (bez 'raw')."""
+        return {
+            "game_time_iso": self.game_time_iso,
+            "game_time_unix": self.game_time_unix,
+            "game_minutes": self.game_minutes,
+            "paused": bool(self.paused),
+            "speed_kmh": float(self.speed_kmh),
+            "engine_on": bool(self.engine_on),
+            "parking_brake": bool(self.parking_brake),
+            "game": self.game.to_dict(),
+            "truck": self.truck.to_dict(),
+            "trailer": self.trailer.to_dict(),
+            "job": self.job.to_dict(),
+            "navigation": self.navigation.to_dict(),
+        }
+
+
+def _check_to_dict() -> None:
+    """Jawne to_dict() muszą wymieniać wszystkie pola w kolejności deklaracji."""
+    for cls in (GameInfo, Vec3, TruckInfo, TrailerInfo, JobInfo, NavigationInfo, TelemetryFrame):
+        obj, names = cls(), tuple(f.name for f in fields(cls))
+        d = obj.to_dict()
+        assert tuple(d) == names, f"{cls.__name__}.to_dict() != {names}"
+        for name in names:
+            v = getattr(obj, name)
+            if isinstance(v, _Model):
+                assert d[name] == v.to_dict(), f"{cls.__name__}.to_dict()[{name!r}]"
+
+
+_check_to_dict()
@@ -0,0 +1,208 @@
+# ritt/telemetry/multiplex.py
+"""
+Multiplekser providerów telemetrii (tryb 'multi' w factory.build_provider).
+
+Każde źródło (np. DLL i HTTP) jest odpytywane we własnym wątku, więc
+zawieszony serwer Funbit blokuje tylko swój wątek – poll() multipleksera
+nigdy nie czeka na źródło, tylko oddaje najświeższą ramkę najzdrowszego.
+
+Zdrowie źródła (0..1):
+    (1 - error_rate) * świeżość * 1 / (1 + latency / stale)
+  error_rate – EWMA błędów (0 = same sukcesy, 1 = same błędy),
+  świeżość   – 1 tuż po ramce, 0 gdy ostatnia udana ramka jest starsza niż stale_ms,
+  latency    – EWMA czasu odczytu.
+Aktywne źródło zmienia się, gdy straci zdrowie całkowicie albo inne jest
+lepsze o więcej niż switch_margin (histereza – bez przeskakiwania co tick).
+Przy remisie wygrywa źródło wcześniej na liście.
+
+Każda zmiana źródła to failover: licznik i ostatnie zdarzenie są w stats().
+
+Ramka martwa – gra niepołączona (game.connected = false) albo płaska ramka
+z samymi zerami (np. DLL załadowana, ale gra nie działa) – liczy się jak
+błąd odczytu, więc takie źródło nie wygrywa priorytetem z działającym.
+
+Tempo: interval_ms to tylko wartość startowa; set_interval() (woła go tick
+UI z interwałem AdaptivePollScheduler) zmienia tempo wszystkich wątków
+i budzi je od razu. Próg świeżości rośnie razem z interwałem.
+poll() oddaje kopię ramki (słownik i sekcje), nie obiekt trzymany przez wątek.
+"""
+from __future__ import annotations
+import threading, time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_EWMA = 0.2
+
+
+def _live(frame: Dict[str, Any]) -> bool:
+    """Czy ramka pochodzi z działającej gry (patrz opis modułu)."""
+    game = frame.get("game")
+    if isinstance(game, dict):
+        return game.get("connected") is not False
+    return any(v for v in frame.values() if isinstance(v, (int, float)))
+
+
+def _copy(frame: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: dict(v) if isinstance(v, dict) else v for k, v in frame.items()}
+
+
+class _Source:
+    """Wątek odpytujący jeden provider i jego statystyki."""
+
+    def __init__(self, name: str, provider, interval_sec: float):
+        self.name = name
+        self.provider = provider
+        self.interval_sec = interval_sec
+        self.frame: Optional[Dict[str, Any]] = None
+        self.frame_at = 0.0          # monotonic ostatniej udanej ramki
+        self.latency_sec: Optional[float] = None
+        self.error_rate = 0.0
+        self.ok = 0
+        self.errors = 0
+        self.last_error = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"telemetry-{name}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def set_interval(self, interval_sec: float) -> None:
+        if interval_sec != self.interval_sec:
+            self.interval_sec = interval_sec
+            self._wake.set()  # nie dosypiamy starego (dłuższego) interwału
+
+    def stop(self, timeout: float = 0.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if timeout > 0.0 and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                frame = self.provider.poll()
+                ok = isinstance(frame, dict) and bool(frame) and _live(frame)
+                err = "" if ok else ("empty frame" if not frame else "game not running")
+            except Exception as e:
+                frame, ok, err = None, False, str(e)
+            t1 = time.monotonic()
+            dt = t1 - t0
+            with self._lock:
+                self.latency_sec = dt if self.latency_sec is None else self.latency_sec + _EWMA * (dt - self.latency_sec)
+                self.error_rate += _EWMA * ((0.0 if ok else 1.0) - self.error_rate)
+                if ok:
+                    self.ok += 1
+                    self.frame = frame
+                    self.frame_at = t1
+                else:
+                    self.errors += 1
+                    self.last_error = err
+            self._wake.wait(max(0.0, self.interval_sec - dt))
+            self._wake.clear()
+
+    def health(self, now: float, stale_sec: float) -> float:
+        with self._lock:
+            if self.frame is None:
+                return 0.0
+            fresh = 1.0 - (now - self.frame_at) / stale_sec
+            if fresh <= 0.0:
+                return 0.0
+            return (1.0 - self.error_rate) * fresh / (1.0 + (self.latency_sec or 0.0) / stale_sec)
+
+    def snapshot(self, now: float, stale_sec: float) -> Dict[str, Any]:
+        health = self.health(now, stale_sec)
+        with self._lock:
+            return {
+                "health": round(health, 3),
+                "ok": self.ok,
+                "errors": self.errors,
+                "error_rate": round(self.error_rate, 3),
+                "latency_ms": None if self.latency_sec is None else round(self.latency_sec * 1000.0, 2),
+                "age_ms": None if self.frame is None else round((now - self.frame_at) * 1000.0, 1),
+                "last_error": self.last_error,
+            }
+
+
+class TelemetryMultiplexer:
+    """Provider złożony: kilka źródeł w tle, poll() z najzdrowszego (bez czekania)."""
+
+    def __init__(self,
+                 sources: Sequence[Tuple[str, Any]],
+                 interval_ms: int = 100,
+                 stale_ms: int = 1000,
+                 switch_margin: float = 0.2):
+        if not sources:
+            raise ValueError("TelemetryMultiplexer needs at least one source")
+        self.stale_ms = max(50, int(stale_ms))
+        self.stale_sec = self.stale_ms / 1000.0
+        self.switch_margin = float(switch_margin)
+        self._sources: List[_Source] = [_Source(name, p, max(0.0, interval_ms / 1000.0)) for name, p in sources]
+        self.set_interval(interval_ms)
+        self._lock = threading.Lock()
+        self.active: Optional[str] = None
+        self.failovers = 0
+        self.last_failover: Optional[Dict[str, Any]] = None
+        self.no_source = 0
+        for s in self._sources:
+            s.start()
+
+    def set_interval(self, interval_ms: int) -> None:
+        """Tempo odpytywania źródeł (np. z AdaptivePollScheduler); świeżość >= 2 interwały."""
+        interval_sec = max(0.0, interval_ms / 1000.0)
+        self.stale_sec = max(self.stale_ms / 1000.0, 2.0 * interval_sec)
+        for s in self._sources:
+            s.set_interval(interval_sec)
+
+    def _select(self, now: float) -> Optional[_Source]:
+        scored = [(s.health(now, self.stale_sec), s) for s in self._sources]
+        best_h, best = max(scored, key=lambda hs: hs[0])  # max() zostawia pierwsze przy remisie
+        if best_h <= 0.0:
+            return None
+        current = next((hs for hs in scored if hs[1].name == self.active), None)
+        if current is not None and current[0] > 0.0 and best_h - current[0] <= self.switch_margin:
+            return current[1]
+        return best
+
+    def poll(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            src = self._select(now)
+            if src is None:
+                self.no_source += 1
+                raise TimeoutError("no healthy telemetry source: " + ", ".join(
+                    f"{s.name}: {s.last_error or 'no data'}" for s in self._sources))
+            if src.name != self.active:
+                if self.active is not None:
+                    self.failovers += 1
+                    self.last_failover = {"from": self.active, "to": src.name, "at": time.time()}
+                    print(f"[TelemetryMultiplexer] failover {self.active} -> {src.name}")
+                self.active = src.name
+            with src._lock:
+                return _copy(src.frame)  # type: ignore[arg-type]
+
+    fetch = poll
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "active": self.active,
+                "failovers": self.failovers,
+                "last_failover": self.last_failover,
+                "no_source": self.no_source,
+                "sources": {s.name: s.snapshot(now, self.stale_sec) for s in self._sources},
+            }
+
+    def close(self) -> None:
+        for s in self._sources:
+            s.stop()
+        for s in self._sources:
+            s.stop(self.stale_sec)  # odczyt w toku kończy się przed zamknięciem providera
+            close = getattr(s.provider, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    print(f"[TelemetryMultiplexer] close {s.name}: {e}")
@@ -1,22 +1,16 @@
 # ritt/telemetry/providers/http.py
 from __future__ import annotations
-import json
 from typing import Any, Dict, Optional
 from datetime import datetime
 
-try:
-    import requests  # type: ignore
-    _HAS_REQUESTS = True
-except Exception:
-    import urllib.request  # type: ignore
-    _HAS_REQUESTS = False
-
 try:
     from ritt.config import CFG  # type: ignore
 except Exception:
     CFG = {}  # type: ignore[assignment]
 
-from ritt.telemetry.util import first_present, coerce_bool
+from ritt.telemetry.util import PathAccessor, coerce_bool
+from ritt.telemetry.transport import KeepAliveSession
+from ritt.telemetry.jsondecode import FUNBIT_SECTIONS, decode_sections
 
 # --- Klucze kandydaci ---
 PARK_BRAKE_KEYS = [
@@ -41,6 +35,11 @@ ENGINE_ON_KEYS = [
 SPEED_KEYS = ["truck.speed", "speed"]
 TIME_KEYS  = ["game.time", "time"]
 
+# gałęzie JSON zostawiane w wyniku odczytu (reszta jest odrzucana po dekodowaniu)
+DECODE_SECTIONS = FUNBIT_SECTIONS | {
+    p.split(".", 1)[0] for p in ENGINE_ON_KEYS + PARK_BRAKE_KEYS + SPEED_KEYS + TIME_KEYS
+}
+
 def _cfg_get(key: str, default: Any = None) -> Any:
     try:
         if isinstance(CFG, dict):
@@ -77,32 +76,43 @@ class TelemetryHTTP:
         url: Optional[str] = None,
         timeout: Optional[float] = None,
         speed_scale: float = 1.0,
+        selective: bool = True,
     ) -> None:
         self.url = url or _cfg_get("http_url", "http://127.0.0.1:25555/api/ets2/telemetry")
         self.timeout = float(timeout if timeout is not None else _cfg_get("http_timeout", 0.5))
         self.speed_scale = float(speed_scale)
+        # jedno trwałe połączenie keep-alive zamiast nowego TCP przy każdym odczycie
+        self.session = KeepAliveSession(self.url, self.timeout)
+        # selective=True: w wyniku tylko gałęzie DECODE_SECTIONS (dekodowanie i tak obejmuje
+        # cały JSON – patrz jsondecode); selective=False: pełny JSON, np. do nagrywania
+        self.sections = DECODE_SECTIONS if selective else None
+        # ścieżki kandydatów skompilowane raz; trafiona ścieżka jest przypinana
+        self._engine_on = PathAccessor(ENGINE_ON_KEYS)
+        self._park_brake = PathAccessor(PARK_BRAKE_KEYS)
+        self._speed = PathAccessor(SPEED_KEYS, default=0.0)
+        self._time = PathAccessor(TIME_KEYS)
 
     def _fetch_json(self) -> Dict[str, Any]:
-        if _HAS_REQUESTS:
-            r = requests.get(self.url, timeout=self.timeout)
-            r.raise_for_status()
-            txt = r.text
-        else:
-            with urllib.request.urlopen(self.url, timeout=self.timeout) as resp:  # type: ignore[attr-defined]
-                txt = resp.read().decode("utf-8", "replace")
-        return json.loads(txt)
+        return decode_sections(self.session.get(), self.sections)
+
+    def stats(self) -> Dict[str, Any]:
+        """Statystyki połączenia: żądania, ponowne połączenia, czasy connect/read (ms)."""
+        return self.session.stats()
+
+    def close(self) -> None:
+        self.session.close()
 
     def poll(self) -> Dict[str, Any]:
         data = self._fetch_json()
 
         # --- Normalizacja flag ---
-        engine_on_raw = first_present(data, ENGINE_ON_KEYS, default=None)
-        park_brake_raw = first_present(data, PARK_BRAKE_KEYS, default=None)
+        engine_on_raw = self._engine_on(data)
+        park_brake_raw = self._park_brake(data)
         engine_on = coerce_bool(engine_on_raw)
         parking_brake = coerce_bool(park_brake_raw)
 
         # --- Skalowanie prędkości ---
-        raw_speed = first_present(data, SPEED_KEYS, default=0.0)
+        raw_speed = self._speed(data)
         try:
             raw_speed_f = float(raw_speed or 0.0)
         except Exception:
@@ -110,7 +120,7 @@ class TelemetryHTTP:
         speed_scaled = raw_speed_f * self.speed_scale
 
         # --- Czas gry: spłaszczenie + pola dla UI ---
-        time_iso = first_present(data, TIME_KEYS, default=None)
+        time_iso = self._time(data)
         if isinstance(time_iso, (int, float)):  # na wszelki wypadek
             time_iso = str(time_iso)
         dt = _parse_iso_z(time_iso) if isinstance(time_iso, str) else None
@@ -118,13 +128,11 @@ class TelemetryHTTP:
         game_weekday = dt.strftime("%a") if dt else None
 
         # Budujemy wynik: surowe dane + normalizacje (nie nadpisujemy oryginalnych gałęzi)
-        result = dict(data)
+        result = data  # świeżo zdekodowany – uzupełniamy w miejscu, bez kopii
 
         # truck.speed_scaled jako wygoda
         if isinstance(result.get("truck"), dict):
-            t = dict(result["truck"])
-            t["speed_scaled"] = speed_scaled
-            result["truck"] = t
+            result["truck"]["speed_scaled"] = speed_scaled
 
         # top-level dodatki używane przez UI
         result["engine_on"] = engine_on
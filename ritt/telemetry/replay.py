@@ -0,0 +1,208 @@
+# ritt/telemetry/replay.py
+"""
+Nagrywanie i odtwarzanie surowego wyjścia providera (np. TelemetryHTTP.poll).
+
+Plik nagrania (tylko dopisywanie):
+  nagłówek  MAGIC
+  rekordy   <d B I>  t (s od początku nagrania), typ (1 = klatka kluczowa,
+                     0 = różnica względem ostatniej klatki kluczowej), długość
+            + zlib(JSON) – pełny snapshot albo różnica z delta.diff().
+Kodowanie jak w TelemetryDB (DeltaEncoder), więc typowy rekord to kilkadziesiąt
+bajtów. Ucięty ostatni rekord (np. po awarii) jest przy odczycie pomijany.
+
+TelemetryReplay to provider (tryb 'replay' w factory.build_provider):
+odtwarza nagranie w czasie rzeczywistym, speed-krotnie szybciej, albo
+(speed=0) ramka po ramce przy każdym poll() – do testów regresyjnych.
+"""
+from __future__ import annotations
+import os, struct, threading, time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from . import delta as _delta
+
+MAGIC = b"RITTREC1\n"
+_REC = struct.Struct("<dBI")
+
+
+class TelemetryRecorder:
+    """Dopisuje snapshoty providera do pliku nagrania; bezpieczny wątkowo."""
+
+    def __init__(self, path: str, keyframe_every: int = 240):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "ab")
+        if new:
+            self._f.write(MAGIC)
+        # dopisujemy do istniejącego nagrania: czas liczymy dalej od jego końca
+        self._t0 = time.monotonic() - (self._last_offset(path) if not new else 0.0)
+        self._encoder = _delta.DeltaEncoder(keyframe_every)
+        self._lock = threading.Lock()
+        self.frames = 0
+
+    @staticmethod
+    def _last_offset(path: str) -> float:
+        last = 0.0
+        for t, _ in iter_records(path):
+            last = t
+        return last
+
+    def record(self, raw: Dict[str, Any], t: Optional[float] = None) -> None:
+        """Zapisuje snapshot; t = sekundy od początku nagrania (domyślnie zegar)."""
+        if not isinstance(raw, dict):
+            return
+        with self._lock:
+            if self._f is None:
+                return
+            t = time.monotonic() - self._t0 if t is None else float(t)
+            is_key, d = self._encoder.encode(raw)
+            blob = _delta.pack(raw if is_key else d)
+            if is_key:
+                # odniesieniem dla różnic jest to, co zapisaliśmy – konsument może jeszcze zmienić 'raw'
+                self._encoder.set_key(_delta.unpack(blob))
+            self._f.write(_REC.pack(t, 1 if is_key else 0, len(blob)) + blob)
+            self.frames += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+
+def iter_records(path: str) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """Odczytuje nagranie strumieniowo: (t, pełny snapshot)."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a RITT telemetry recording")
+        key: Optional[Dict[str, Any]] = None
+        while True:
+            head = f.read(_REC.size)
+            if len(head) < _REC.size:
+                return
+            t, is_key, n = _REC.unpack(head)
+            blob = f.read(n)
+            if len(blob) < n:
+                return  # ucięty ostatni rekord
+            obj = _delta.unpack(blob)
+            if is_key:
+                key = obj
+                yield t, _delta.apply(key, None)
+            elif key is not None:
+                yield t, _delta.apply(key, obj)
+
+
+class RecordingProvider:
+    """Opakowuje dowolny provider i nagrywa każdy wynik poll()."""
+
+    def __init__(self, inner, recorder: TelemetryRecorder):
+        self.inner = inner
+        self.recorder = recorder
+
+    def _record(self, raw: Dict[str, Any]) -> None:
+        try:
+            self.recorder.record(raw)
+        except Exception as e:
+            print(f"[TelemetryRecorder] write error: {e}")
+
+    def poll(self) -> Dict[str, Any]:
+        raw = self.inner.poll()
+        self._record(raw)
+        return raw
+
+    fetch = poll
+
+    def close(self) -> None:
+        """Zamyka nagranie (dopisuje bufor na dysk), potem provider wewnętrzny."""
+        self.recorder.close()
+        close = getattr(self.inner, "close", None)
+        if callable(close):
+            close()
+
+    def __getattr__(self, name: str) -> Any:
+        # stats() itp. providera wewnętrznego
+        attr = getattr(self.inner, name)
+        if name == "frames" and callable(attr):
+            # provider strumieniowy: nagrywamy każdą ramkę ze strumienia
+            def frames(*args, **kwargs):
+                for raw in attr(*args, **kwargs):
+                    self._record(raw)
+                    yield raw
+            return frames
+        return attr
+
+
+class TelemetryReplay:
+    """
+    Provider odtwarzający nagranie.
+      speed > 0  – czas nagrania płynie speed× szybciej niż zegar; poll() zwraca
+                   ostatnią ramkę, której czas już minął (jak prawdziwy serwer),
+      speed = 0  – każde poll() zwraca kolejną ramkę (najszybciej, deterministycznie).
+    Po końcu nagrania: loop=True zaczyna od nowa, inaczej poll() zwraca ostatnią ramkę
+    i ustawia finished=True.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.path = path
+        self.speed = max(0.0, float(speed))
+        self.loop = bool(loop)
+        self.finished = False
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._rewind()
+
+    def _rewind(self) -> None:
+        self._it = iter_records(self.path)
+        first = next(self._it, None)
+        if first is None:
+            raise ValueError(f"{self.path}: empty recording")
+        self._start_rec, self._current = first
+        self._next: Optional[Tuple[float, Dict[str, Any]]] = next(self._it, None)
+        self._start_wall = time.monotonic()
+        self._fresh = True   # pierwsza ramka jeszcze nie oddana (speed=0)
+        self._at_end = False
+        self.frames += 1
+
+    def _step(self) -> bool:
+        if self._next is None:
+            return False
+        self._current = self._next[1]
+        self._next = next(self._it, None)
+        self.frames += 1
+        return True
+
+    def _end(self) -> None:
+        """Koniec nagrania w trybie czasu rzeczywistego."""
+        if not self.loop:
+            self.finished = True
+        elif self._at_end:
+            self._rewind()
+            self._fresh = False
+        else:
+            self._at_end = True  # ostatnia ramka zostaje oddana raz, potem od początku
+
+    def poll(self) -> Dict[str, Any]:
+        with self._lock:
+            if self.speed == 0:
+                if self._fresh:
+                    self._fresh = False
+                elif not self._step():
+                    if self.loop:
+                        self._rewind()
+                        self._fresh = False
+                    else:
+                        self.finished = True
+            else:
+                now_rec = self._start_rec + (time.monotonic() - self._start_wall) * self.speed
+                while self._next is not None and self._next[0] <= now_rec:
+                    self._step()
+                if self._next is None:
+                    self._end()
+            # kopia – konsument może modyfikować wynik (jak świeży JSON z serwera)
+            return _delta.apply(self._current, None)
+
+    fetch = poll
@@ -0,0 +1,245 @@
+# ritt/telemetry/retention.py
+"""
+Retencja telemetrii:
+  • surowe ramki (telemetry_frames) trzymamy przez keep_raw_sec,
+  • starsze zwijamy do agregatów 1-minutowych (telemetry_rollup_1m)
+    i godzinowych (telemetry_rollup_1h), po czym kasujemy surowe wiersze,
+  • agregaty minutowe kasujemy po keep_minute_sec (godzinowe zostają).
+
+Praca jest przyrostowa: jedno run_once() zwija najwyżej max_minutes_per_run
+minut, więc blokada zapisu jest trzymana krótko nawet przy zaległościach.
+"""
+from __future__ import annotations
+import threading, time
+from typing import Any, Dict, List, Optional
+
+from .store import TelemetryDB
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS telemetry_rollup_1m (
+  bucket_ts REAL PRIMARY KEY,
+  frames INTEGER NOT NULL,
+  speed_min REAL, speed_max REAL, speed_avg REAL,
+  drive_sec REAL NOT NULL DEFAULT 0,
+  work_sec REAL NOT NULL DEFAULT 0,
+  rest_sec REAL NOT NULL DEFAULT 0,
+  engine_sec REAL NOT NULL DEFAULT 0,
+  brake_sec REAL NOT NULL DEFAULT 0,
+  covered_sec REAL NOT NULL DEFAULT 0,
+  distance_km REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS telemetry_rollup_1h (
+  bucket_ts REAL PRIMARY KEY,
+  frames INTEGER NOT NULL,
+  speed_min REAL, speed_max REAL, speed_avg REAL,
+  drive_sec REAL NOT NULL DEFAULT 0,
+  work_sec REAL NOT NULL DEFAULT 0,
+  rest_sec REAL NOT NULL DEFAULT 0,
+  engine_sec REAL NOT NULL DEFAULT 0,
+  brake_sec REAL NOT NULL DEFAULT 0,
+  covered_sec REAL NOT NULL DEFAULT 0,
+  distance_km REAL NOT NULL DEFAULT 0
+);
+"""
+
+ROLLUP_COLUMNS = ("bucket_ts", "frames", "speed_min", "speed_max", "speed_avg",
+                  "drive_sec", "work_sec", "rest_sec", "engine_sec", "brake_sec",
+                  "covered_sec", "distance_km")
+
+DRIVE_SPEED_KMH = 0.1       # jak w tick_from_game: > 0.1 km/h = jazda
+MAX_FRAME_GAP_SEC = 10.0    # dłuższa luka między ramkami = brak danych, nie czas aktywności
+MAX_ODO_STEP_KM = 5.0       # skok licznika większy niż to = reset/teleport, pomijamy
+
+
+def _new_bucket(bucket_ts: float) -> Dict[str, Any]:
+    return {"bucket_ts": bucket_ts, "frames": 0, "speed_min": None, "speed_max": None, "speed_sum": 0.0,
+            "drive_sec": 0.0, "work_sec": 0.0, "rest_sec": 0.0, "engine_sec": 0.0, "brake_sec": 0.0,
+            "covered_sec": 0.0, "distance_km": 0.0}
+
+
+class TelemetryRetention:
+    """Silnik retencji/zwijania telemetrii; run_once() ręcznie albo start() w tle."""
+
+    def __init__(self,
+                 db: TelemetryDB,
+                 keep_raw_sec: float = 48 * 3600,
+                 keep_minute_sec: float = 30 * 24 * 3600,
+                 interval_sec: float = 60.0,
+                 max_minutes_per_run: int = 60):
+        self.db = db
+        self.keep_raw_sec = float(keep_raw_sec)
+        self.keep_minute_sec = float(keep_minute_sec)
+        self.interval_sec = float(interval_sec)
+        self.max_minutes_per_run = max(1, int(max_minutes_per_run))
+        self.stats: Dict[str, int] = {"runs": 0, "frames_rolled": 0, "minutes_written": 0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        with self.db.write_tx() as conn:
+            for stmt in ROLLUP_SCHEMA.strip().split(";\n"):
+                if stmt.strip():
+                    conn.execute(stmt)
+
+    # ---------------------------------------------------------------
+    # Zwijanie
+    # ---------------------------------------------------------------
+    def run_once(self, now: Optional[float] = None) -> int:
+        """Zwija jedną porcję zaległych minut; zwraca liczbę zwiniętych ramek."""
+        now = time.time() if now is None else float(now)
+        cutoff = (now - self.keep_raw_sec) // 60 * 60  # tylko pełne minuty
+        rolled = 0
+        with self.db.write_tx() as conn:
+            first = conn.execute(
+                "SELECT ts_utc FROM telemetry_frames ORDER BY ts_utc ASC LIMIT 1"
+            ).fetchone()
+            if first and first[0] < cutoff:
+                start = first[0] // 60 * 60
+                end = min(cutoff, start + 60 * self.max_minutes_per_run)
+                rolled = self._roll_range(conn, start, end)
+                self.db.prune_keyframes(conn)
+            conn.execute("DELETE FROM telemetry_rollup_1m WHERE bucket_ts < ?",
+                         ((now - self.keep_minute_sec) // 3600 * 3600,))
+        self.stats["runs"] += 1
+        self.stats["frames_rolled"] += rolled
+        return rolled
+
+    def _roll_range(self, conn, start: float, end: float) -> int:
+        rows = conn.execute(
+            "SELECT ts_utc, paused, speed_kmh, engine_on, parking_brake, odometer_km, valid_until "
+            "FROM telemetry_frames WHERE ts_utc < ? ORDER BY ts_utc ASC", (end,)
+        ).fetchall()
+        if not rows:
+            return 0
+        # następna ramka za końcem zakresu – domyka odcinek ostatniej ramki
+        nxt = conn.execute(
+            "SELECT ts_utc, odometer_km FROM telemetry_frames WHERE ts_utc >= ? ORDER BY ts_utc ASC LIMIT 1",
+            (end,)
+        ).fetchone()
+
+        buckets: Dict[float, Dict[str, Any]] = {}
+        for i, (ts, paused, speed, engine, brake, odo, valid_until) in enumerate(rows):
+            b_ts = ts // 60 * 60
+            b = buckets.get(b_ts)
+            if b is None:
+                b = buckets[b_ts] = _new_bucket(b_ts)
+            speed = float(speed or 0.0)
+            b["frames"] += 1
+            b["speed_sum"] += speed
+            b["speed_min"] = speed if b["speed_min"] is None else min(b["speed_min"], speed)
+            b["speed_max"] = speed if b["speed_max"] is None else max(b["speed_max"], speed)
+
+            if i + 1 < len(rows):
+                next_ts, next_odo = rows[i + 1][0], rows[i + 1][5]
+            elif nxt:
+                next_ts, next_odo = nxt
+            else:
+                next_ts, next_odo = (valid_until or ts), odo
+            dt = next_ts - ts
+            # wiersz przedłużony przez pominięte duplikaty (valid_until) obejmuje cały odcinek
+            gap = next_ts - max(ts, valid_until or ts)
+            if 0 < dt and gap <= MAX_FRAME_GAP_SEC and not paused:
+                b["covered_sec"] += dt
+                if speed > DRIVE_SPEED_KMH:
+                    b["drive_sec"] += dt
+                elif engine:
+                    b["work_sec"] += dt
+                else:
+                    b["rest_sec"] += dt
+                if engine:
+                    b["engine_sec"] += dt
+                if brake:
+                    b["brake_sec"] += dt
+            if odo and next_odo:
+                step = float(next_odo) - float(odo)
+                if 0 < step <= MAX_ODO_STEP_KM:
+                    b["distance_km"] += step
+
+        for b in buckets.values():
+            self._merge_minute(conn, b)
+        for h_ts in sorted({b_ts // 3600 * 3600 for b_ts in buckets}):
+            self._rebuild_hour(conn, h_ts)
+        conn.execute("DELETE FROM telemetry_frames WHERE ts_utc < ?", (end,))
+        self.stats["minutes_written"] += len(buckets)
+        return len(rows)
+
+    def _merge_minute(self, conn, b: Dict[str, Any]) -> None:
+        """Dopisuje minutę; jeśli już istnieje (dosłane ramki), sumuje wartości."""
+        old = conn.execute(
+            f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM telemetry_rollup_1m WHERE bucket_ts=?", (b["bucket_ts"],)
+        ).fetchone()
+        if old:
+            o = dict(zip(ROLLUP_COLUMNS, old))
+            b["speed_sum"] += (o["speed_avg"] or 0.0) * o["frames"]
+            b["frames"] += o["frames"]
+            b["speed_min"] = min(v for v in (b["speed_min"], o["speed_min"]) if v is not None)
+            b["speed_max"] = max(v for v in (b["speed_max"], o["speed_max"]) if v is not None)
+            for k in ("drive_sec", "work_sec", "rest_sec", "engine_sec", "brake_sec", "covered_sec", "distance_km"):
+                b[k] += o[k] or 0.0
+        b["speed_avg"] = b["speed_sum"] / b["frames"] if b["frames"] else None
+        conn.execute(
+            f"INSERT OR REPLACE INTO telemetry_rollup_1m ({', '.join(ROLLUP_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(ROLLUP_COLUMNS))})",
+            tuple(b[c] for c in ROLLUP_COLUMNS)
+        )
+
+    def _rebuild_hour(self, conn, h_ts: float) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO telemetry_rollup_1h "
+            f"({', '.join(ROLLUP_COLUMNS)}) "
+            "SELECT ?, SUM(frames), MIN(speed_min), MAX(speed_max), "
+            "SUM(speed_avg * frames) / SUM(frames), "
+            "SUM(drive_sec), SUM(work_sec), SUM(rest_sec), SUM(engine_sec), SUM(brake_sec), "
+            "SUM(covered_sec), SUM(distance_km) "
+            "FROM telemetry_rollup_1m WHERE bucket_ts >= ? AND bucket_ts < ? HAVING COUNT(*) > 0",
+            (h_ts, h_ts, h_ts + 3600)
+        )
+
+    # ---------------------------------------------------------------
+    # Odczyt
+    # ---------------------------------------------------------------
+    def _query(self, table: str, ts_from: float, ts_to: float) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            f"SELECT {', '.join(ROLLUP_COLUMNS)} FROM {table} "
+            "WHERE bucket_ts BETWEEN ? AND ? ORDER BY bucket_ts ASC",
+            (float(ts_from), float(ts_to))
+        )
+        out = []
+        for r in rows:
+            d = dict(zip(ROLLUP_COLUMNS, r))
+            cov = d["covered_sec"] or 0.0
+            d["engine_duty"] = d["engine_sec"] / cov if cov else 0.0
+            d["brake_duty"] = d["brake_sec"] / cov if cov else 0.0
+            out.append(d)
+        return out
+
+    def minutes(self, ts_from: float, ts_to: float) -> List[Dict[str, Any]]:
+        """Agregaty 1-minutowe z przedziału (bucket_ts = początek minuty, UTC)."""
+        return self._query("telemetry_rollup_1m", ts_from, ts_to)
+
+    def hours(self, ts_from: float, ts_to: float) -> List[Dict[str, Any]]:
+        """Agregaty godzinowe z przedziału (bucket_ts = początek godziny, UTC)."""
+        return self._query("telemetry_rollup_1h", ts_from, ts_to)
+
+    # ---------------------------------------------------------------
+    # Wątek w tle
+    # ---------------------------------------------------------------
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # zaległości zwijamy porcjami, z krótką przerwą dla zapisu bieżących ramek
+                while not self._stop.is_set() and self.run_once() > 0:
+                    self._stop.wait(0.05)
+            except Exception as e:
+                print(f"[TelemetryRetention] error: {e}")
+            self._stop.wait(self.interval_sec)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="TelemetryRetention", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
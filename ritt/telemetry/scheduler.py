@@ -0,0 +1,121 @@
+# ritt/telemetry/scheduler.py
+"""
+Adaptacyjny harmonogram odpytywania telemetrii.
+
+Tempo zależy od ostatnich ramek:
+  • jazda (prędkość > DRIVE_SPEED_KMH)             -> fast_ms  (domyślnie 250 ms),
+  • silnik ON na postoju                           -> idle_ms,
+  • postój z wyłączonym silnikiem (odpoczynek)     -> rest_ms,
+  • pauza gry                                      -> paused_ms,
+  • błąd odczytu (serwer Funbit nie odpowiada)     -> backoff wykładniczy do max_backoff_ms.
+
+Każda zmiana stanu (silnik, hamulec, pauza, ruszenie) od razu wraca do fast_ms
+i trzyma je przez hold_fast_sec – krawędzie (start silnika, ruszenie) łapiemy
+z opóźnieniem najwyżej jednego wolnego interwału, a kolejne już w pełnym tempie.
+
+take_ticks() zamienia upływ czasu na liczbę „bazowych” ticków (base_ms),
+więc liczniki zwiększane o 1 na tick nie zależą od aktualnego tempa.
+"""
+from __future__ import annotations
+import threading, time
+from typing import Any, Dict, Optional
+
+DRIVE_SPEED_KMH = 0.1
+
+MODE_LABELS = {
+    "drive": "jazda",
+    "idle": "postój",
+    "rest": "odpoczynek",
+    "paused": "pauza",
+    "offline": "brak połączenia",
+}
+
+
+class AdaptivePollScheduler:
+    """Wylicza interwał kolejnego odczytu na podstawie stanu gry; bezpieczny wątkowo."""
+
+    def __init__(self,
+                 fast_ms: int = 250,
+                 idle_ms: int = 500,
+                 rest_ms: int = 2000,
+                 paused_ms: int = 1000,
+                 max_backoff_ms: int = 10000,
+                 hold_fast_sec: float = 10.0,
+                 base_ms: Optional[int] = None):
+        self.fast_ms = max(10, int(fast_ms))
+        self.idle_ms = max(self.fast_ms, int(idle_ms))
+        self.rest_ms = max(self.fast_ms, int(rest_ms))
+        self.paused_ms = max(self.fast_ms, int(paused_ms))
+        self.max_backoff_ms = max(self.fast_ms, int(max_backoff_ms))
+        self.hold_fast_sec = float(hold_fast_sec)
+        self.base_ms = int(base_ms or self.fast_ms)
+
+        self._lock = threading.Lock()
+        self.mode = "drive"
+        self.interval_ms = self.fast_ms
+        self.errors = 0
+        self._last_state: Optional[tuple] = None
+        self._fast_until = 0.0
+        self._last_tick: Optional[float] = None
+        self._carry = 0.0
+
+    def on_frame(self, d: Dict[str, Any], now: Optional[float] = None) -> int:
+        """Aktualizuje tryb po udanym odczycie; zwraca interwał w ms."""
+        now = time.monotonic() if now is None else now
+        paused = bool(d.get("paused", False))
+        engine = bool(d.get("engine_on", False))
+        brake = bool(d.get("parking_brake", False))
+        moving = float(d.get("speed_kmh") or 0.0) > DRIVE_SPEED_KMH
+        state = (paused, engine, brake, moving)
+        with self._lock:
+            self.errors = 0
+            if state != self._last_state:
+                if self._last_state is not None:
+                    self._fast_until = now + self.hold_fast_sec
+                self._last_state = state
+            if paused:
+                self.mode, iv = "paused", self.paused_ms
+            elif moving:
+                self.mode, iv = "drive", self.fast_ms
+            elif engine:
+                self.mode, iv = "idle", self.idle_ms
+            else:
+                self.mode, iv = "rest", self.rest_ms
+            if now < self._fast_until:
+                iv = self.fast_ms
+            self.interval_ms = iv
+            return iv
+
+    def on_error(self) -> int:
+        """Błąd odczytu: podwaja interwał (od idle_ms) aż do max_backoff_ms."""
+        with self._lock:
+            self.errors += 1
+            self.mode = "offline"
+            self._last_state = None
+            self.interval_ms = min(self.max_backoff_ms, self.idle_ms * (2 ** min(self.errors - 1, 16)))
+            return self.interval_ms
+
+    def take_ticks(self, now: Optional[float] = None) -> int:
+        """Liczba pełnych ticków base_ms od poprzedniego wywołania (reszta przechodzi dalej)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._last_tick is None:
+                self._last_tick = now
+                return 1
+            self._carry += (now - self._last_tick) * 1000.0 / self.base_ms
+            self._last_tick = now
+            # przerwa dłuższa niż najwolniejsze tempo to uśpienie/zawieszenie, nie czas jazdy
+            cap = self.max_backoff_ms / self.base_ms
+            if self._carry > cap:
+                self._carry = cap
+            ticks = int(self._carry)
+            self._carry -= ticks
+            return ticks
+
+    @property
+    def rate_hz(self) -> float:
+        return 1000.0 / self.interval_ms
+
+    def describe(self) -> str:
+        """Tekst do paska stanu, np. '4.0 Hz (jazda)'."""
+        return f"{self.rate_hz:.1f} Hz ({MODE_LABELS.get(self.mode, self.mode)})"
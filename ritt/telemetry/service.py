@@ -1,6 +1,7 @@
 # ritt/telemetry/service.py
 from __future__ import annotations
-from typing import Dict, Any, Callable, Optional
+import threading
+from typing import Dict, Any, Callable, Iterable, Optional, Tuple, Union
 from .model import TelemetryFrame, GameInfo, TruckInfo, TrailerInfo, JobInfo, NavigationInfo, Vec3
 from .store import TelemetryDB
 
@@ -15,6 +16,25 @@ def _to_bool(v) -> bool:
     return bool(v)
 
 
+def _changed(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Klucze z 'new', które różnią się od 'old' (zagnieżdżone słowniki – tylko zmienione pola)."""
+    out: Dict[str, Any] = {}
+    for k, v in new.items():
+        ov = old.get(k, _MISSING)
+        if ov is v:
+            continue
+        if isinstance(v, dict) and isinstance(ov, dict):
+            sub = _changed(ov, v)
+            if sub:
+                out[k] = sub
+        elif ov != v or type(ov) is not type(v):
+            out[k] = v
+    return out
+
+
+_MISSING = object()
+
+
 def _from_legacy_flat(raw: Dict[str, Any]) -> TelemetryFrame:
     """Adapter dla 'starego' providera (jak w TACHO1)."""
     tf = TelemetryFrame(
@@ -39,6 +59,17 @@ class TelemetryService:
     """
     Odbiera ramki z providera (np. HTTP / DLL / SIM).
     Normalizuje dane do TelemetryFrame i udostępnia jako płaski słownik dla UI.
+
+    Provider strumieniowy (z metodą frames(), np. TelemetryStream): po
+    start_stream() każda ramka jest normalizowana i zapisywana zaraz po
+    nadejściu, a poll_normalized() oddaje ostatnią z nich bez odpytywania.
+
+    poll_delta(): zamiast pełnego słownika zwraca (wersja, zmienione klucze);
+    wersja rośnie tylko przy zmianie, pełny stan jest w delta_state.
+
+    Szyna (TelemetryBus): akwizycję prowadzi szyna, a serwis dostaje ramki
+    przez push() (odbiorca „ui”); poll_normalized() oddaje ostatnią z nich,
+    zapis do DB robi osobny odbiorca szyny (db.insert_many).
     """
     def __init__(self,
                  provider,
@@ -47,11 +78,25 @@ class TelemetryService:
         self.provider = provider
         self.mapper = mapper
         self.db = db
+        self._stream_thread: Optional[threading.Thread] = None
+        # płaski słownik (consume) albo ramka z push() – spłaszczana dopiero przy odczycie
+        self._stream_latest: Optional[Union[Dict[str, Any], TelemetryFrame]] = None
+        self._flat_src: Optional[TelemetryFrame] = None
+        self._flat: Dict[str, Any] = {}
+        self.bus = None
+        self.stream_frames = 0
+        self.delta_state: Dict[str, Any] = {}
+        self.delta_version = 0
 
     def poll_normalized(self) -> Dict[str, Any]:
         """Pobiera dane z providera i normalizuje do płaskiej postaci."""
+        if self._stream_thread is not None or self.bus is not None:
+            return self._latest_pushed()
         raw = self.provider.poll() or {}
+        return self.normalize(raw)
 
+    def map_frame(self, raw: Dict[str, Any]) -> TelemetryFrame:
+        """Mapuje surową ramkę na TelemetryFrame (bez zapisu do DB)."""
         # wykrycie formatu
         is_raw_funbit = isinstance(raw, dict) and (
             ("game" in raw) or ("truck" in raw) or ("navigation" in raw)
@@ -63,6 +108,11 @@ class TelemetryService:
                 tf: TelemetryFrame = _from_legacy_flat(raw)
         except Exception:
             tf = _from_legacy_flat(raw)
+        return tf
+
+    def normalize(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Mapuje surową ramkę, zapisuje ją do DB i zwraca płaski słownik dla UI."""
+        tf = self.map_frame(raw)
 
         # zapis do DB
         if self.db:
@@ -72,28 +122,107 @@ class TelemetryService:
                 pass
 
         # przygotowanie danych do GUI
-        out = {
-            "game_time_iso": tf.game_time_iso,
-            "game_time_unix": tf.game_time_unix,
-            "game_minutes": tf.game_minutes,
-            "paused": bool(tf.paused),
-            "speed_kmh": float(tf.speed_kmh),
-            "engine_on": bool(tf.engine_on),
-            "parking_brake": bool(tf.parking_brake),
-            "game": tf.game.__dict__,
-            "truck": {
-                **tf.truck.__dict__,
-                "placement": tf.truck.placement.__dict__,
-                "acceleration": tf.truck.acceleration.__dict__,
-                "head": tf.truck.head.__dict__,
-                "cabin": tf.truck.cabin.__dict__,
-                "hook": tf.truck.hook.__dict__,
-            },
-            "trailer": {**tf.trailer.__dict__, "placement": tf.trailer.placement.__dict__},
-            "job": tf.job.__dict__,
-            "navigation": tf.navigation.__dict__,
-        }
-        return out
+        return tf.to_flat()
+
+    # ---------------------------------------------------------------
+    # Strumień (push)
+    # ---------------------------------------------------------------
+    def consume(self, frames: Iterable[Dict[str, Any]],
+                on_frame: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """Przetwarza ramki w kolejności nadejścia (blokuje do końca iteratora); zwraca ich liczbę."""
+        n = 0
+        for raw in frames:
+            self._consumed(raw, on_frame)
+            n += 1
+        return n
+
+    async def consume_async(self, frames, on_frame: Optional[Callable[[Dict[str, Any]], None]] = None) -> int:
+        """Jak consume(), dla asynchronicznego iteratora ramek (async for)."""
+        n = 0
+        async for raw in frames:
+            self._consumed(raw, on_frame)
+            n += 1
+        return n
+
+    def _consumed(self, raw: Dict[str, Any], on_frame: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """Jedna ramka strumienia; błąd w on_frame jest logowany i nie przerywa strumienia."""
+        out = self.normalize(raw or {})
+        self._stream_latest = out
+        self.stream_frames += 1
+        if on_frame is not None:
+            try:
+                on_frame(out)
+            except Exception as e:
+                print(f"[TelemetryService] on_frame error: {e}")
+
+    def start_stream(self, on_frame: Optional[Callable[[Dict[str, Any]], None]] = None) -> bool:
+        """
+        Uruchamia w tle consume(provider.frames()). Zwraca False, gdy provider
+        nie jest strumieniowy (zostaje zwykłe odpytywanie).
+        """
+        frames = getattr(self.provider, "frames", None)
+        if not callable(frames):
+            return False
+        if self._stream_thread is None:
+            def run():
+                try:
+                    self.consume(frames(), on_frame)
+                except Exception as e:
+                    print(f"[TelemetryService] stream stopped: {e}")
+            self._stream_thread = threading.Thread(target=run, name="telemetry-consume", daemon=True)
+            self._stream_thread.start()
+        return True
+
+    def _latest_pushed(self) -> Dict[str, Any]:
+        source = self.bus if self.bus is not None else self.provider
+        if not getattr(source, "connected", True) or self._stream_latest is None:
+            err = getattr(source, "last_error", "") or "waiting for first frame"
+            raise ConnectionError(f"telemetry stream not connected: {err}")
+        latest = self._stream_latest
+        if isinstance(latest, TelemetryFrame):
+            if latest is not self._flat_src:
+                self._flat_src, self._flat = latest, latest.to_flat()
+            return self._flat
+        return latest
+
+    # ---------------------------------------------------------------
+    # Szyna (TelemetryBus)
+    # ---------------------------------------------------------------
+    def attach_bus(self, bus, rate_hz: Optional[float] = 4.0) -> None:
+        """Ramki dla UI z szyny (najwyżej rate_hz na sekundę) zamiast własnego odpytywania."""
+        self.bus = bus
+        bus.subscribe("ui", self.push, rate_hz=rate_hz, policy="latest")
+
+    def push(self, tf: TelemetryFrame) -> None:
+        """
+        Ramka z zewnętrznej pętli akwizycji – poll_normalized() odda ją przy
+        następnym ticku. to_flat() dopiero przy odczycie: ramki nadpisane przed
+        tickiem UI nie są spłaszczane wcale.
+        """
+        self._stream_latest = tf
+        self.stream_frames += 1
+
+    # ---------------------------------------------------------------
+    # Delta
+    # ---------------------------------------------------------------
+    def poll_delta(self) -> Tuple[int, Dict[str, Any]]:
+        """
+        Jak poll_normalized(), ale zwraca (wersja, zmiany względem poprzedniego
+        wywołania). Bez zmian -> (ta sama wersja, {}); konsument może pominąć pracę.
+        Pierwsze wywołanie (i pierwsze po reset_delta()) zwraca pełny stan.
+        """
+        out = self.poll_normalized()
+        if out is self.delta_state:
+            return self.delta_version, {}  # ta sama ramka (np. strumień bez nowych danych)
+        changed = _changed(self.delta_state, out) if self.delta_state else dict(out)
+        self.delta_state = out
+        if changed:
+            self.delta_version += 1
+        return self.delta_version, changed
+
+    def reset_delta(self) -> None:
+        """Następne poll_delta() zwróci pełny stan (np. po błędzie odczytu)."""
+        self.delta_state = {}
 
     # ✅ NOWA METODA: ujednolicony interfejs do pobierania danych
     def get_data(self) -> Optional[Dict[str, Any]]:
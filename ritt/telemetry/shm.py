@@ -0,0 +1,187 @@
+# ritt/telemetry/shm.py
+"""
+Provider telemetrii z pamięci współdzielonej (mmap) – bez HTTP i JSON.
+
+Plugin telemetrii (lub stand-in w testach) zapisuje stały blok binarny
+(SHM_LAYOUT, little-endian). Spójność zapewnia seqlock: pisarz zwiększa
+licznik 'seq' przed i po zapisie (nieparzysty = zapis w toku), czytelnik
+czyta seq, potem dane (struct.unpack_from prosto z mapowania, bez kopii
+bufora), potem znowu seq – i ponawia odczyt, jeśli się zmienił.
+Ten sam seq co poprzednio = snapshot bez zmian: poll() oddaje poprzedni
+wynik bez dekodowania.
+
+Windows: nazwana pamięć współdzielona (mmap z tagname, np. 'Local\\RITTTelemetry').
+Linux/testy: zwykły plik tego samego rozmiaru (ShmWriter zapisuje stand-in).
+
+Strona pisarza: żaden plugin w tym repozytorium (ani Funbit) nie zapisuje
+tego bloku – potrzebny jest własny plugin SDK gry, który pod ustaloną nazwą
+mapowania zapisuje SHM_LAYOUT z SHM_MAGIC i SHM_VERSION według protokołu
+ShmWriter.write(). Dlatego tryb jest jawnie włączany: mode = shm oraz
+shm_name (Windows) albo shm_path – bez domyślnej nazwy.
+Na Windows mmap(-1, tagname) bez pisarza tworzy wyzerowane mapowanie;
+poll() rozpoznaje je po braku SHM_MAGIC i zgłasza błąd przy każdym odczycie
+(nie zapamiętuje seq, więc nie zamilknie po pierwszym wyjątku).
+"""
+from __future__ import annotations
+import mmap, struct, sys, time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+# (nazwa, format struct) w kolejności w bloku; offsety wynikają z formatu "<" (bez wyrównania)
+SHM_LAYOUT = (
+    ("seq", "I"),                # licznik seqlock
+    ("magic", "I"),              # SHM_MAGIC – pisarz istnieje (a nie puste mapowanie)
+    ("version", "I"),            # wersja układu (SHM_VERSION)
+    ("paused", "B"),
+    ("engine_on", "B"),
+    ("parking_brake", "B"),
+    ("trailer_attached", "B"),
+    ("game_time_min", "I"),      # minuty czasu gry od 0001-01-01 (jak w SDK)
+    ("speed_ms", "f"),
+    ("engine_rpm", "f"),
+    ("odometer_km", "d"),
+    ("x", "d"), ("y", "d"), ("z", "d"),
+    ("heading", "f"), ("pitch", "f"), ("roll", "f"),
+    ("nav_distance_m", "i"),
+    ("speed_limit_kmh", "i"),
+    ("gear", "i"),
+)
+SHM_MAGIC = 0x54544952      # b"RITT" little-endian
+SHM_VERSION = 2
+
+_FIELDS = tuple(name for name, _ in SHM_LAYOUT)
+_BLOCK = struct.Struct("<" + "".join(fmt for _, fmt in SHM_LAYOUT))
+_SEQ = struct.Struct("<I")
+SHM_SIZE = _BLOCK.size
+
+_GAME_EPOCH = datetime(1, 1, 1)
+_MAX_RETRIES = 64
+
+
+def _open_map(name: Optional[str], path: Optional[str]) -> mmap.mmap:
+    if path:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), SHM_SIZE, access=mmap.ACCESS_READ)
+    if sys.platform != "win32":
+        raise OSError("named shared memory needs Windows; use shm_path (file-backed) elsewhere")
+    return mmap.mmap(-1, SHM_SIZE, tagname=name, access=mmap.ACCESS_READ)
+
+
+class TelemetrySHM:
+    """Provider: odczyt bloku SHM_LAYOUT z mmap (seqlock, pomijanie niezmienionych)."""
+
+    def __init__(self, name: Optional[str] = None, path: Optional[str] = None, speed_scale: float = 3.6):
+        if not name and not path:
+            raise ValueError("shared memory telemetry needs shm_name (Windows) or shm_path")
+        self.name = name
+        self.path = path
+        self.speed_scale = float(speed_scale)
+        self._mm: Optional[mmap.mmap] = None
+        self._last_seq: Optional[int] = None
+        self._last: Dict[str, Any] = {}
+        self._time_min: Optional[int] = None
+        self._time_iso: Optional[str] = None
+        self.stats: Dict[str, int] = {"reads": 0, "unchanged": 0, "retries": 0, "torn": 0}
+
+    def _map(self) -> mmap.mmap:
+        if self._mm is None:
+            self._mm = _open_map(self.name, self.path)
+        return self._mm
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def read_block(self) -> Optional[tuple]:
+        """
+        Spójny odczyt bloku albo None, gdy seq się nie zmienił lub pisarz nie
+        pozwolił na spójny odczyt w _MAX_RETRIES próbach (zostaje poprzedni snapshot).
+        OSError, gdy w bloku nie ma SHM_MAGIC / SHM_VERSION – seq nie jest wtedy
+        zapamiętywany, więc każdy kolejny odczyt sprawdza blok od nowa.
+        """
+        mm = self._map()
+        unpack_seq = _SEQ.unpack_from
+        for _ in range(_MAX_RETRIES):
+            seq = unpack_seq(mm, 0)[0]
+            if seq & 1:
+                self.stats["retries"] += 1
+                time.sleep(0)  # pisarz w trakcie – oddajemy czas procesora
+                continue
+            if seq == self._last_seq:
+                self.stats["unchanged"] += 1
+                return None
+            values = _BLOCK.unpack_from(mm, 0)
+            if unpack_seq(mm, 0)[0] == seq:
+                if values[1] != SHM_MAGIC:
+                    raise OSError(f"no telemetry writer for shared memory {self.path or self.name!r}")
+                if values[2] != SHM_VERSION:
+                    raise OSError(f"unsupported shared memory layout version {values[2]}")
+                self._last_seq = seq
+                self.stats["reads"] += 1
+                return values
+            self.stats["retries"] += 1
+        self.stats["torn"] += 1
+        return None
+
+    def _game_time_iso(self, minutes: int) -> str:
+        # format jak Funbit ("0001-01-05T14:31:00Z"); liczony tylko po zmianie minuty
+        if minutes != self._time_min:
+            self._time_min = minutes
+            self._time_iso = (_GAME_EPOCH + timedelta(minutes=minutes)).isoformat() + "Z"
+        return self._time_iso  # type: ignore[return-value]
+
+    def poll(self) -> Dict[str, Any]:
+        values = self.read_block()
+        if values is None:
+            return self._last
+        v = dict(zip(_FIELDS, values))
+        speed_ms = float(v["speed_ms"])
+        placement = {"x": v["x"], "y": v["y"], "z": v["z"],
+                     "heading": v["heading"], "pitch": v["pitch"], "roll": v["roll"]}
+        # układ jak JSON Funbita – ten sam mapper (normalize_funbit_v9) co dla HTTP
+        self._last = {
+            "game": {"connected": True, "paused": bool(v["paused"]),
+                     "time": self._game_time_iso(v["game_time_min"])},
+            "truck": {"speed": speed_ms, "speed_scaled": speed_ms * self.speed_scale,
+                      "engineOn": bool(v["engine_on"]), "parkBrakeOn": bool(v["parking_brake"]),
+                      "odometer": v["odometer_km"], "engineRpm": v["engine_rpm"], "gear": v["gear"],
+                      "placement": placement},
+            "trailer": {"attached": bool(v["trailer_attached"])},
+            "navigation": {"estimatedDistance": v["nav_distance_m"], "speedLimit": v["speed_limit_kmh"]},
+        }
+        return self._last
+
+    fetch = poll
+
+
+class ShmWriter:
+    """
+    Pisarz bloku SHM_LAYOUT do pliku – stand-in pluginu dla testów i benchmarków
+    na Linuksie (ten sam protokół seqlock co po stronie pluginu).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "ab") as f:
+            if f.tell() < SHM_SIZE:
+                f.write(b"\0" * (SHM_SIZE - f.tell()))
+        self._f = open(path, "r+b")
+        self._mm = mmap.mmap(self._f.fileno(), SHM_SIZE)
+        self._seq = _SEQ.unpack_from(self._mm, 0)[0] & ~1
+
+    def write(self, **fields: Any) -> None:
+        values = {name: 0 for name in _FIELDS}
+        values.update(fields)
+        values["magic"] = SHM_MAGIC
+        values["version"] = SHM_VERSION
+        busy = (self._seq + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(self._mm, 0, busy)  # nieparzysty: zapis w toku
+        values["seq"] = busy
+        _BLOCK.pack_into(self._mm, 0, *(values[name] for name in _FIELDS))
+        self._seq = (self._seq + 2) & 0xFFFFFFFF
+        _SEQ.pack_into(self._mm, 0, self._seq)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._f.close()
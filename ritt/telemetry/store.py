@@ -1,8 +1,21 @@
 # ritt/telemetry/store.py
 from __future__ import annotations
-import json, sqlite3, time
-from typing import Optional, List, Dict, Any
+import json, queue, sqlite3, threading, time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple, Iterable, Iterator, Union
 from .model import TelemetryFrame
+from . import delta as _delta
+from .gameday import GameDayAccumulator, MAX_ACTIVE_GAP_SEC, DRIVE_SPEED_KMH, DAY_SEC, game_datetime, game_seconds, iso_week
+
+try:
+    import numpy as np  # opcjonalne – tylko dla fetch_columns()
+    _HAS_NUMPY = True
+except Exception:
+    np = None  # type: ignore[assignment]
+    _HAS_NUMPY = False
 
 SCHEMA = """
 PRAGMA journal_mode=WAL;
@@ -24,71 +37,980 @@ CREATE TABLE IF NOT EXISTS telemetry_frames (
 );
 CREATE INDEX IF NOT EXISTS idx_tf_ts ON telemetry_frames(ts_utc);
 CREATE INDEX IF NOT EXISTS idx_tf_flags ON telemetry_frames(paused, engine_on, parking_brake);
+CREATE TABLE IF NOT EXISTS telemetry_keyframes (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  blob BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS telemetry_meta (
+  key TEXT PRIMARY KEY,
+  value
+);
+CREATE TABLE IF NOT EXISTS telemetry_game_days (
+  game_day TEXT PRIMARY KEY,
+  iso_week TEXT NOT NULL,
+  drive_sec INTEGER NOT NULL DEFAULT 0,
+  work_sec INTEGER NOT NULL DEFAULT 0,
+  rest_sec INTEGER NOT NULL DEFAULT 0,
+  last_game_time INTEGER,
+  updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_gd_week ON telemetry_game_days(iso_week);
+"""
+
+# kolumny dodane po pierwszej wersji schematu: (nazwa, typ) – migracja przez ALTER TABLE
+MIGRATED_COLUMNS = [
+    ("raw_key", "INTEGER"),   # id klatki kluczowej w telemetry_keyframes
+    ("raw_delta", "BLOB"),    # zlib(JSON różnicy względem klatki kluczowej), NULL = brak zmian
+    ("valid_until", "REAL"),  # ts_utc ostatniej identycznej (pominiętej) ramki, NULL = tylko ts_utc
+    ("game_time", "INTEGER"),             # czas gry w sekundach (gameday.game_seconds), NULL = nieznany
+    ("game_valid_until", "INTEGER"),      # game_time ostatniej pominiętej ramki, NULL = tylko game_time
+]
+
+# to samo dla telemetry_game_days
+MIGRATED_GAME_DAY_COLUMNS = [
+    ("last_game_time", "INTEGER"),  # czas gry (sekundy) na końcu ostatniego przyrostu tego dnia
+    ("updated_at", "REAL"),         # ts UTC ostatniego przyrostu – „dziś” po starcie = najpóźniej zapisany dzień
+]
+
+# indeksy na kolumnach z migracji (tworzone dopiero po ALTER TABLE)
+MIGRATED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_tf_game_time ON telemetry_frames(game_time)",
+)
+
+INSERT_FRAME = """
+INSERT INTO telemetry_frames
+(ts_utc, game_time_iso, paused, speed_kmh, engine_on, parking_brake,
+ odometer_km, truck_x, truck_y, truck_z, heading, pitch, roll,
+ trailer_attached, job_income, nav_distance_m, game_time, raw_json, raw_key, raw_delta)
+VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+UPSERT_GAME_DAY = """
+INSERT INTO telemetry_game_days (game_day, iso_week, drive_sec, work_sec, rest_sec, last_game_time, updated_at)
+VALUES (?,?,?,?,?,?,?)
+ON CONFLICT(game_day) DO UPDATE SET
+  drive_sec = drive_sec + excluded.drive_sec,
+  work_sec = work_sec + excluded.work_sec,
+  rest_sec = rest_sec + excluded.rest_sec,
+  last_game_time = excluded.last_game_time,
+  updated_at = excluded.updated_at
 """
 
+# znacznik zatrzymania wątku zapisującego
+_STOP = object()
+_EPOCH_DATE = date(1970, 1, 1)
+
+
+class _Touch:
+    """Pozycja kolejki: „poprzedni wiersz nadal aktualny do ts_utc” (ramka bez zmian)."""
+    __slots__ = ("ts_utc", "game_time")
+
+    def __init__(self, ts_utc: float, game_time: Optional[int] = None):
+        self.ts_utc = ts_utc
+        self.game_time = game_time
+
+# kolumny zwracane przez iteratory strumieniowe (iter_between / iter_last_n)
+STREAM_COLUMNS = ("id", "ts_utc", "game_time_iso", "paused", "speed_kmh", "engine_on", "parking_brake",
+                  "odometer_km", "x", "y", "z", "nav_distance_m", "valid_until")
+_STREAM_SELECT = ("SELECT id, ts_utc, game_time_iso, paused, speed_kmh, engine_on, parking_brake, "
+                  "odometer_km, truck_x, truck_y, truck_z, nav_distance_m, valid_until, raw_json, raw_key, raw_delta "
+                  "FROM telemetry_frames ")
+
+# lekki wiersz (namedtuple) dla iteratorów; 'raw' wypełniane tylko przy with_raw=True
+FrameRow = namedtuple("FrameRow", STREAM_COLUMNS + ("raw",), defaults=(None,))
+
+# kolumny fetch_columns(): (klucz wyniku, wyrażenie SQL, dtype numpy)
+COLUMNAR_FIELDS = (
+    ("ts", "ts_utc", "float64"),
+    ("speed_kmh", "COALESCE(speed_kmh, 0)", "float32"),
+    ("engine_on", "COALESCE(engine_on, 0)", "bool"),
+    ("parking_brake", "COALESCE(parking_brake, 0)", "bool"),
+    ("x", "COALESCE(truck_x, 0)", "float64"),
+    ("y", "COALESCE(truck_y, 0)", "float64"),
+    ("z", "COALESCE(truck_z, 0)", "float64"),
+    ("odometer", "COALESCE(odometer_km, 0)", "float64"),
+)
+
+
+def _game_day_key(game_time: int) -> str:
+    """
+    Klucz telemetry_game_days (data ISO) dla czasu gry w sekundach.
+    Czas gry zaczyna się w roku 0001, więc zakres sprzed date.min (np. pierwsze
+    14 dni profilu) przycinamy do pierwszego dnia, a za date.max – do ostatniego.
+    """
+    days = int(game_time) // DAY_SEC
+    lo, hi = (date.min - _EPOCH_DATE).days, (date.max - _EPOCH_DATE).days
+    return (_EPOCH_DATE + timedelta(days=min(max(days, lo), hi))).isoformat()
+
+
 class TelemetryDB:
-    def __init__(self, path: str = "telemetry.sqlite"):
+    """
+    Magazyn ramek telemetrii (SQLite, WAL).
+
+    Tryb synchroniczny (domyślny): każdy insert() to INSERT + commit.
+    Tryb async_writes=True: insert() tylko wrzuca wiersz do ograniczonej kolejki,
+    a osobny wątek zapisuje ramki paczkami (batch_size sztuk lub max_delay sekund)
+    w jednej transakcji. Gdy kolejka jest pełna, ramka jest odrzucana
+    (stats["dropped"]), a ramki zapisane później niż late_after sekund od odczytu
+    liczone są jako spóźnione (stats["late"]). close() dopisuje resztę kolejki.
+
+    Surowy JSON (compress_raw=True): zamiast pełnego raw_json co keyframe_every
+    ramek zapisujemy skompresowaną klatkę kluczową (telemetry_keyframes),
+    a pozostałe ramki trzymają tylko zlib-owaną różnicę względem niej.
+    Odczyt (latest/between) odtwarza pełne ramki przezroczyście; stare wiersze
+    z raw_json są czytane bez zmian, a migrate_raw_json() przepisuje je na nowy format.
+
+    Agregat dni gry (telemetry_game_days): każda ramka dolicza sekundy
+    jazdy/pracy/odpoczynku do swojego dnia gry i tygodnia ISO; przyrosty są
+    zapisywane razem z ramkami, a game_day_totals() odtwarza liczniki po starcie.
+
+    Tłumienie duplikatów (dedupe=True): ramka, której pola (bez czasu gry
+    i surowego JSON) mają ten sam skrót co poprzednio zapisana, nie dodaje
+    wiersza – tylko przesuwa valid_until poprzedniego. Co heartbeat_sec i tak
+    zapisujemy pełny wiersz, żeby przerwa w danych była odróżnialna od postoju.
+    Agregat dni gry liczy każdą ramkę, także pominiętą.
+
+    Czas gry (game_time): każdy wiersz ma całkowity czas gry w sekundach
+    z indeksem, więc zapytania po czasie gry (between_game, game_activity,
+    drive_seconds_game) to skany zakresu indeksu zamiast parsowania ISO.
+    Zakres starszy niż surowe ramki zachowane przez retencję game_activity
+    uzupełnia z telemetry_game_days (pełne dni gry).
+
+    Połączenia: jedno zapisujące (self._conn, pod self._lock) i pula do
+    read_pool połączeń tylko-do-odczytu dla latest/last_n/between/raportów –
+    w WAL czytelnicy nie czekają na zapis, a każde połączenie jest używane
+    naraz tylko przez jeden wątek.
+
+    Licznik kilometrów: ostatni odczyt, odczyt ze startu sesji i ze startu
+    bieżącego zlecenia są trzymane w pamięci i utrwalane w telemetry_meta,
+    więc get_last_odometer()/get_total_distance() nie skanują tabeli ramek.
+    """
+    def __init__(self,
+                 path: str = "telemetry.sqlite",
+                 async_writes: bool = False,
+                 batch_size: int = 50,
+                 max_delay: float = 1.0,
+                 queue_max: int = 2000,
+                 late_after: float = 5.0,
+                 compress_raw: bool = True,
+                 keyframe_every: int = 240,
+                 dedupe: bool = True,
+                 heartbeat_sec: float = 30.0,
+                 read_pool: int = 4):
         self.path = path
         self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # URI czytelników liczony raz (względem bieżącego katalogu z chwili otwarcia);
+        # as_uri() koduje '?', '#', '%' w ścieżce
+        self._ro_uri = "" if path == ":memory:" else Path(path).absolute().as_uri() + "?mode=ro"
         self._conn.execute("PRAGMA foreign_keys=ON;")
         for stmt in SCHEMA.strip().split(";\n"):
             if stmt.strip():
                 self._conn.execute(stmt)
+        self._migrate_columns()
+        # w WAL wystarczy fsync przy checkpoincie, nie przy każdym commicie
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
         self._conn.commit()
+        self._lock = threading.RLock()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=max(1, int(read_pool)))
+        self._closed = False
+
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = float(max_delay)
+        self.late_after = float(late_after)
+        self.stats: Dict[str, int] = {"queued": 0, "written": 0, "dropped": 0, "late": 0, "batches": 0,
+                                      "suppressed": 0}
+
+        self.dedupe = bool(dedupe)
+        self.heartbeat_sec = float(heartbeat_sec)
+        self._last_fp: Optional[int] = None
+        self._last_fp_ts = 0.0
+        self._last_rowid = 0
+        self._sync_touch: Optional[_Touch] = None
+
+        self.compress_raw = bool(compress_raw)
+        self.keyframe_every = max(1, int(keyframe_every))
+        self._encoder = _delta.DeltaEncoder(self.keyframe_every)
+        self._key_id: Optional[int] = None
+        self._key_cache: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._key_cache_lock = threading.Lock()
+        self._days = GameDayAccumulator()
+
+        # licznik km: w pamięci + telemetry_meta (zapisywane razem z ramkami)
+        self._meta_lock = threading.Lock()
+        self._meta_dirty: Dict[str, Any] = {}
+        self._odo_last = 0.0
+        self._odo_session_start: Optional[float] = None
+        self._odo_job_start: Optional[float] = None
+        self._job_key: Optional[str] = None
+        self._load_meta()
+
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        if async_writes:
+            self._queue = queue.Queue(maxsize=max(1, int(queue_max)))
+            self._writer = threading.Thread(target=self._writer_loop, name="TelemetryDBWriter", daemon=True)
+            self._writer.start()
+
+    def _migrate_columns(self) -> None:
+        """Dodaje brakujące kolumny w bazach utworzonych starszą wersją schematu."""
+        have = {r[1] for r in self._conn.execute("PRAGMA table_info(telemetry_frames)")}
+        for name, typ in MIGRATED_COLUMNS:
+            if name not in have:
+                self._conn.execute(f"ALTER TABLE telemetry_frames ADD COLUMN {name} {typ}")
+        for stmt in MIGRATED_INDEXES:
+            self._conn.execute(stmt)
+        have_days = {r[1] for r in self._conn.execute("PRAGMA table_info(telemetry_game_days)")}
+        for name, typ in MIGRATED_GAME_DAY_COLUMNS:
+            if name not in have_days:
+                self._conn.execute(f"ALTER TABLE telemetry_game_days ADD COLUMN {name} {typ}")
+        if "game_time" not in have:
+            self._backfill_game_time()
+
+    def _backfill_game_time(self, batch: int = 5000) -> int:
+        """Uzupełnia game_time w starych wierszach na podstawie game_time_iso (jednorazowo)."""
+        done, last_id = 0, 0
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, game_time_iso FROM telemetry_frames WHERE id > ? AND game_time_iso IS NOT NULL "
+                "ORDER BY id ASC LIMIT ?", (last_id, int(batch))
+            ).fetchall()
+            if not rows:
+                return done
+            updates = []
+            for rid, iso in rows:
+                dt = game_datetime(TelemetryFrame(game_time_iso=iso))
+                if dt is not None:
+                    updates.append((game_seconds(dt), rid))
+            self._conn.executemany("UPDATE telemetry_frames SET game_time=? WHERE id=?", updates)
+            self._conn.commit()
+            done += len(updates)
+            last_id = rows[-1][0]
+
+    # ---------------------------------------------------------------
+    # Metadane: licznik kilometrów / zlecenie
+    # ---------------------------------------------------------------
+    def _load_meta(self) -> None:
+        meta = dict(self._conn.execute(
+            "SELECT key, value FROM telemetry_meta WHERE key IN "
+            "('last_odometer_km', 'job_start_odometer_km', 'job_key')"
+        ).fetchall())
+        self._odo_last = float(meta.get("last_odometer_km") or 0.0)
+        if meta.get("job_start_odometer_km") is not None:
+            self._odo_job_start = float(meta["job_start_odometer_km"])
+        self._job_key = meta.get("job_key") or None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        """Zapamiętuje zmianę; trafi do telemetry_meta przy najbliższym zapisie."""
+        with self._meta_lock:
+            self._meta_dirty[key] = value
+
+    @staticmethod
+    def _job_identity(tf: TelemetryFrame) -> Optional[str]:
+        j = tf.job
+        parts = (j.source_city, j.source_company, j.dest_city, j.dest_company)
+        if not any(parts):
+            return None
+        return "|".join(str(p or "") for p in parts)
+
+    def _track_odometer(self, tf: TelemetryFrame) -> None:
+        odo = float(tf.truck.odometer_km or 0.0)
+        if odo <= 0.0:
+            return
+        if self._odo_session_start is None:
+            self._odo_session_start = odo  # sesja = od otwarcia bazy, więc bez utrwalania
+        job_key = self._job_identity(tf)
+        if job_key is not None and job_key != self._job_key:
+            self._job_key = job_key
+            self._odo_job_start = odo
+            self._set_meta("job_key", job_key)
+            self._set_meta("job_start_odometer_km", odo)
+        if odo != self._odo_last:
+            self._odo_last = odo
+            self._set_meta("last_odometer_km", odo)
+
+    def get_last_odometer(self) -> float:
+        """Ostatni odczyt licznika (km); 0.0 gdy jeszcze nie było danych."""
+        return self._odo_last
+
+    def get_session_distance(self) -> float:
+        """Kilometry od pierwszej ramki tej sesji (od otwarcia bazy)."""
+        if self._odo_session_start is None:
+            return 0.0
+        return max(0.0, self._odo_last - self._odo_session_start)
+
+    def get_job_distance(self) -> float:
+        """Kilometry od początku bieżącego zlecenia (0.0 gdy brak zlecenia)."""
+        if self._odo_job_start is None:
+            return 0.0
+        return max(0.0, self._odo_last - self._odo_job_start)
+
+    def get_total_distance(self) -> float:
+        """Dystans zlecenia (km); bez wykrytego zlecenia – dystans sesji."""
+        if self._odo_job_start is not None:
+            return self.get_job_distance()
+        return self.get_session_distance()
+
+    def start_job(self) -> None:
+        """Ręcznie zaczyna liczenie dystansu zlecenia od bieżącego odczytu."""
+        self._odo_job_start = self._odo_last
+        self._set_meta("job_start_odometer_km", self._odo_last)
 
-    def insert(self, tf: TelemetryFrame) -> int:
-        js = json.dumps(tf.raw, ensure_ascii=False)
+    # ---------------------------------------------------------------
+    # Surowy JSON: klatki kluczowe + różnice
+    # ---------------------------------------------------------------
+    def _encode_raw(self, cur: sqlite3.Cursor, raw: Dict[str, Any]) -> Tuple[str, Optional[int], Optional[bytes]]:
+        """Zwraca (raw_json, raw_key, raw_delta) dla nowego wiersza. Wołane pod self._lock."""
+        if not self.compress_raw:
+            return json.dumps(raw, ensure_ascii=False), None, None
+        is_key, d = self._encoder.encode(raw)
+        if is_key or self._key_id is None:
+            cur.execute("INSERT INTO telemetry_keyframes (blob) VALUES (?)", (_delta.pack(raw),))
+            self._key_id = int(cur.lastrowid)
+            return "", self._key_id, None
+        return "", self._key_id, (_delta.pack(d) if d else None)
+
+    def _keyframe(self, conn: sqlite3.Connection, key_id: int) -> Dict[str, Any]:
+        with self._key_cache_lock:
+            key = self._key_cache.get(key_id)
+            if key is not None:
+                self._key_cache.move_to_end(key_id)
+                return key
+        row = conn.execute("SELECT blob FROM telemetry_keyframes WHERE id=?", (int(key_id),)).fetchone()
+        key = (_delta.unpack(row[0]) if row else None) or {}
+        with self._key_cache_lock:
+            self._key_cache[key_id] = key
+            while len(self._key_cache) > 16:
+                self._key_cache.popitem(last=False)
+        return key
+
+    def _decode_raw(self, conn: sqlite3.Connection, raw_json: Optional[str],
+                    raw_key: Optional[int], raw_delta: Optional[bytes]) -> Dict[str, Any]:
+        if raw_key is None:
+            return json.loads(raw_json) if raw_json else {}
+        return _delta.apply(self._keyframe(conn, raw_key), _delta.unpack(raw_delta))
+
+    def migrate_raw_json(self, batch: int = 1000, vacuum: bool = False) -> int:
+        """
+        Przepisuje stare wiersze (pełny raw_json) na klatki kluczowe + różnice.
+        Działa paczkami po 'batch' wierszy; zwraca liczbę przepisanych ramek.
+        vacuum=True odzyskuje miejsce w pliku po migracji.
+        """
+        enc = _delta.DeltaEncoder(self.keyframe_every)
+        key_id: Optional[int] = None
+        done = 0
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, raw_json FROM telemetry_frames "
+                    "WHERE raw_key IS NULL AND raw_json <> '' AND id > ? ORDER BY id ASC LIMIT ?",
+                    (last_id, int(batch))
+                ).fetchall()
+                if not rows:
+                    break
+                cur = self._conn.cursor()
+                for rid, raw_json in rows:
+                    try:
+                        raw = json.loads(raw_json)
+                    except Exception:
+                        raw = {}
+                    is_key, d = enc.encode(raw)
+                    if is_key or key_id is None:
+                        cur.execute("INSERT INTO telemetry_keyframes (blob) VALUES (?)", (_delta.pack(raw),))
+                        key_id = int(cur.lastrowid)
+                        blob = None
+                    else:
+                        blob = _delta.pack(d) if d else None
+                    cur.execute("UPDATE telemetry_frames SET raw_json='', raw_key=?, raw_delta=? WHERE id=?",
+                                (key_id, blob, rid))
+                self._conn.commit()
+            done += len(rows)
+            last_id = rows[-1][0]
+        if vacuum and done:
+            with self._lock:
+                self._conn.execute("VACUUM")
+        return done
+
+    # ---------------------------------------------------------------
+    # Zapis
+    # ---------------------------------------------------------------
+    @contextmanager
+    def write_tx(self) -> Iterator[sqlite3.Connection]:
+        """Połączenie zapisujące pod blokadą: commit na końcu, rollback przy wyjątku."""
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def prune_keyframes(self, conn: sqlite3.Connection) -> int:
+        """Usuwa klatki kluczowe, do których nie odwołuje się już żadna ramka."""
+        row = conn.execute(
+            "SELECT raw_key FROM telemetry_frames WHERE raw_key IS NOT NULL ORDER BY id ASC LIMIT 1"
+        ).fetchone()
+        keep_from = row[0] if row else None
+        if self._key_id is not None:
+            keep_from = self._key_id if keep_from is None else min(keep_from, self._key_id)
+        with self._key_cache_lock:
+            for kid in [k for k in self._key_cache if keep_from is None or k < keep_from]:
+                self._key_cache.pop(kid, None)
+        if keep_from is None:
+            return conn.execute("DELETE FROM telemetry_keyframes").rowcount
+        return conn.execute("DELETE FROM telemetry_keyframes WHERE id < ?", (int(keep_from),)).rowcount
+
+    def _frame_row(self, tf: TelemetryFrame, ts_utc: float, game_time: Optional[int] = None) -> Tuple[Any, ...]:
         truck = tf.truck
-        cur = self._conn.cursor()
-        cur.execute("""
-        INSERT INTO telemetry_frames
-        (ts_utc, game_time_iso, paused, speed_kmh, engine_on, parking_brake,
-         odometer_km, truck_x, truck_y, truck_z, heading, pitch, roll,
-         trailer_attached, job_income, nav_distance_m, raw_json)
-        VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-        """, (
-            time.time(), tf.game_time_iso, int(tf.paused), float(tf.speed_kmh),
+        return (
+            ts_utc, tf.game_time_iso, int(tf.paused), float(tf.speed_kmh),
             int(tf.engine_on), int(tf.parking_brake),
             float(truck.odometer_km or 0.0),
             float(truck.placement.x), float(truck.placement.y), float(truck.placement.z),
             float(truck.heading or 0.0), float(truck.pitch or 0.0), float(truck.roll or 0.0),
             int(tf.trailer.attached or 0), int(tf.job.income or 0), int(tf.navigation.distance_m or 0),
-            js
-        ))
-        self._conn.commit()
-        return int(cur.lastrowid)
+            game_time,
+            tf.raw if isinstance(tf.raw, dict) else {},
+        )
+
+    @staticmethod
+    def _fingerprint(row: Tuple[Any, ...]) -> int:
+        """Tani skrót pól mapowanych (bez ts, czasu gry i raw); drgania floatów zaokrąglamy."""
+        return hash((row[2], round(row[3], 1), row[4], row[5], round(row[6], 2),
+                     round(row[7], 2), round(row[8], 2), round(row[9], 2),
+                     round(row[10], 3), round(row[11], 3), round(row[12], 3),
+                     row[13], row[14], row[15]))
+
+    def _write_rows(self, rows: List[Any]) -> int:
+        """
+        Zapisuje wiersze (i znaczniki _Touch) w jednej transakcji, w kolejności;
+        zwraca id ostatniego wiersza.
+        """
+        with self._lock:
+            cur = self._conn.cursor()
+            rowid = self._last_rowid
+            touch: Optional[_Touch] = None
+            days = self._days.drain()
+            meta: Dict[str, Any] = {}
+            try:
+                for row in rows:
+                    if isinstance(row, _Touch):
+                        touch = row
+                        continue
+                    if touch is not None and rowid:
+                        self._apply_touch(cur, rowid, touch)
+                        touch = None
+                    cur.execute(INSERT_FRAME, row[:-1] + self._encode_raw(cur, row[-1]))
+                    rowid = int(cur.lastrowid or 0)
+                if touch is not None and rowid:
+                    self._apply_touch(cur, rowid, touch)
+                with self._meta_lock:
+                    meta, self._meta_dirty = self._meta_dirty, {}
+                if meta:
+                    cur.executemany("INSERT OR REPLACE INTO telemetry_meta (key, value) VALUES (?, ?)",
+                                    list(meta.items()))
+                if days:
+                    cur.executemany(UPSERT_GAME_DAY, [k + tuple(v) for k, v in days.items()])
+                self._conn.commit()
+            except Exception:
+                # wycofana transakcja mogła zabrać klatkę kluczową – zaczynamy od nowej
+                self._conn.rollback()
+                self._encoder.reset()
+                self._key_id = None
+                self._days.merge(days)
+                with self._meta_lock:
+                    meta.update(self._meta_dirty)
+                    self._meta_dirty = meta
+                raise
+            self._last_rowid = rowid
+            return rowid
+
+    @staticmethod
+    def _apply_touch(cur: sqlite3.Cursor, rowid: int, touch: _Touch) -> None:
+        cur.execute("UPDATE telemetry_frames SET valid_until=?, game_valid_until=COALESCE(?, game_valid_until) "
+                    "WHERE id=?", (touch.ts_utc, touch.game_time, rowid))
+
+    def _prepare(self, tf: TelemetryFrame, ts_utc: Optional[float] = None) -> Any:
+        """Wiersz ramki albo _Touch, gdy dedupe uznał ją za powtórzenie poprzedniej."""
+        gdt = self._days.feed(tf)
+        self._track_odometer(tf)
+        row = self._frame_row(tf, time.time() if ts_utc is None else ts_utc,
+                              game_seconds(gdt) if gdt is not None else None)
+
+        if self.dedupe:
+            fp = self._fingerprint(row)
+            if fp == self._last_fp and row[0] - self._last_fp_ts < self.heartbeat_sec:
+                self.stats["suppressed"] += 1
+                return _Touch(row[0], row[16])
+            self._last_fp, self._last_fp_ts = fp, row[0]
+        return row
+
+    def insert(self, tf: TelemetryFrame, ts_utc: Optional[float] = None) -> int:
+        """
+        Zapisuje ramkę. W trybie async zwraca 0 (id nie jest jeszcze znane),
+        a ramka trafia do kolejki wątku zapisującego.
+        ts_utc – czas odczytu ramki (domyślnie teraz).
+        """
+        row = self._prepare(tf, ts_utc)
+        if isinstance(row, _Touch):
+            return self._enqueue_touch(row)
+
+        if self._queue is None:
+            pending = [self._sync_touch, row] if self._sync_touch else [row]
+            self._sync_touch = None
+            rowid = self._write_rows(pending)
+            self.stats["written"] += 1
+            return rowid
+        try:
+            self._queue.put_nowait(row)
+            self.stats["queued"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+            self._last_fp = None  # następna ramka nie może przedłużać niezapisanego wiersza
+        return 0
+
+    def insert_many(self, frames: Iterable[Tuple[float, TelemetryFrame]]) -> int:
+        """
+        Zapisuje paczkę par (ts_utc, ramka), np. z TelemetryBus raz na sekundę.
+        W trybie sync cała paczka to jedna transakcja; w async ramki idą do
+        kolejki jak z insert(). Zwraca liczbę ramek.
+        """
+        if self._queue is not None:
+            n = 0
+            for ts, tf in frames:
+                self.insert(tf, ts)
+                n += 1
+            return n
+        items = [self._prepare(tf, ts) for ts, tf in frames]
+        if not items:
+            return 0
+        pending = [self._sync_touch] + items if self._sync_touch else list(items)
+        self._sync_touch = None
+        if isinstance(pending[-1], _Touch):
+            self._sync_touch = pending.pop()  # jak w insert(): przedłużenie przy następnym zapisie
+        if pending:
+            self._write_rows(pending)
+            self.stats["written"] += sum(1 for row in pending if not isinstance(row, _Touch))
+        return len(items)
+
+    def _enqueue_touch(self, touch: _Touch) -> int:
+        """Przedłuża ważność ostatniego wiersza; w trybie sync dopiero przy następnym zapisie."""
+        if self._queue is None:
+            self._sync_touch = touch
+            return self._last_rowid
+        try:
+            self._queue.put_nowait(touch)
+        except queue.Full:
+            pass  # utrata przedłużenia nie psuje danych – najwyżej krótszy valid_until
+        return 0
+
+    def _flush_batch(self, batch: List[Any]) -> None:
+        rows = [row for row in batch if not isinstance(row, _Touch)]
+        try:
+            self._write_rows(batch)
+        except Exception as e:
+            print(f"[TelemetryDB] batch write error: {e}")
+            self.stats["dropped"] += len(rows)
+            return
+        now = time.time()
+        self.stats["written"] += len(rows)
+        self.stats["batches"] += 1
+        self.stats["late"] += sum(1 for row in rows if now - row[0] > self.late_after)
+
+    def _writer_loop(self) -> None:
+        """Wątek zapisujący: zbiera ramki i commituje je paczkami."""
+        q = self._queue
+        batch: List[Tuple[Any, ...]] = []
+        batch_started = 0.0
+        stop = False
+        while not stop:
+            timeout = self.max_delay if not batch else max(0.0, batch_started + self.max_delay - time.monotonic())
+            try:
+                item = q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stop = True
+            elif item is not None:
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(item)
+
+            if batch and (stop or len(batch) >= self.batch_size
+                          or time.monotonic() - batch_started >= self.max_delay):
+                n = len(batch)
+                self._flush_batch(batch)
+                batch = []
+                for _ in range(n):
+                    q.task_done()
+            if item is _STOP:
+                q.task_done()
+
+    def flush(self) -> None:
+        """Czeka, aż wszystkie zakolejkowane ramki trafią na dysk (max ~max_delay)."""
+        if self._queue is not None:
+            self._queue.join()
+        elif self._sync_touch is not None:
+            touch, self._sync_touch = self._sync_touch, None
+            self._write_rows([touch])
 
+    def close(self) -> None:
+        """Dopisuje zakolejkowane ramki, zatrzymuje wątek zapisujący i zamyka bazę."""
+        if self._queue is None and self._sync_touch is not None:
+            self.flush()
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(timeout=max(5.0, self.max_delay * 5))
+        self._writer = None
+        self._queue = None
+        self._closed = True
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------------------------------------
+    # Odczyt
+    # ---------------------------------------------------------------
     def latest(self) -> Optional[Dict[str, Any]]:
-        row = self._conn.execute(
-            "SELECT id, ts_utc, game_time_iso, paused, speed_kmh, engine_on, parking_brake, raw_json "
-            "FROM telemetry_frames ORDER BY id DESC LIMIT 1"
-        ).fetchone()
-        if not row:
-            return None
-        import json as _json
+        with self._read_conn() as conn:
+            row = conn.execute(
+                "SELECT id, ts_utc, game_time_iso, paused, speed_kmh, engine_on, parking_brake, "
+                "raw_json, raw_key, raw_delta, valid_until "
+                "FROM telemetry_frames ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+            raw = self._decode_raw(conn, row[7], row[8], row[9])
         return {
             "id": row[0], "ts_utc": row[1], "game_time_iso": row[2],
             "paused": bool(row[3]), "speed_kmh": float(row[4]),
             "engine_on": bool(row[5]), "parking_brake": bool(row[6]),
-            "raw": _json.loads(row[7])
+            "valid_until": row[10] if row[10] is not None else row[1],
+            "raw": raw
         }
 
     def last_n(self, n: int = 100) -> List[Dict[str, Any]]:
-        rows = self._conn.execute(
-            "SELECT ts_utc, speed_kmh, engine_on, parking_brake, truck_x, truck_y, truck_z "
-            "FROM telemetry_frames ORDER BY id DESC LIMIT ?", (int(n),)
-        ).fetchall()
+        with self._read_conn() as conn:
+            rows = conn.execute(
+                "SELECT ts_utc, speed_kmh, engine_on, parking_brake, truck_x, truck_y, truck_z "
+                "FROM telemetry_frames ORDER BY id DESC LIMIT ?", (int(n),)
+            ).fetchall()
         return [
             {"ts_utc": r[0], "speed_kmh": r[1], "engine_on": bool(r[2]),
              "parking_brake": bool(r[3]), "x": r[4], "y": r[5], "z": r[6]}
             for r in rows
         ]
 
-    def between(self, ts_from: float, ts_to: float) -> List[Dict[str, Any]]:
-        cur = self._conn.execute(
-            "SELECT ts_utc, speed_kmh, engine_on, parking_brake, nav_distance_m "
-            "FROM telemetry_frames WHERE ts_utc BETWEEN ? AND ? ORDER BY ts_utc ASC",
-            (float(ts_from), float(ts_to))
-        )
-        return [{"ts_utc": r[0], "speed_kmh": r[1], "engine_on": bool(r[2]), "parking_brake": bool(r[3]),
-                 "nav_distance_m": r[4]} for r in cur.fetchall()]
+    def between(self, ts_from: float, ts_to: float, with_raw: bool = False) -> List[Dict[str, Any]]:
+        """Ramki z przedziału ts_utc; with_raw=True dokłada odtworzony pełny JSON ('raw')."""
+        with self._read_conn() as conn:
+            rows = conn.execute(
+                "SELECT ts_utc, speed_kmh, engine_on, parking_brake, nav_distance_m, raw_json, raw_key, raw_delta "
+                "FROM telemetry_frames WHERE ts_utc BETWEEN ? AND ? ORDER BY ts_utc ASC",
+                (float(ts_from), float(ts_to))
+            ).fetchall()
+            out = []
+            for r in rows:
+                item = {"ts_utc": r[0], "speed_kmh": r[1], "engine_on": bool(r[2]), "parking_brake": bool(r[3]),
+                        "nav_distance_m": r[4]}
+                if with_raw:
+                    item["raw"] = self._decode_raw(conn, r[5], r[6], r[7])
+                out.append(item)
+        return out
+
+    def game_day_totals(self, game_day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Liczniki jazdy z agregatu dni gry (bez skanowania ramek):
+          day       – jazda w dniu gry 'game_day' (domyślnie ostatnio zapisywany,
+                      nie najpóźniejsza data – po wczytaniu starszego zapisu gry),
+          week      – jazda w jego tygodniu ISO,
+          fortnight – jazda w tym i poprzednim tygodniu ISO (limit 90 h),
+        plus work_day / work_week i game_time – ostatni czas gry tego dnia
+        (sekundy jak game_time; None w bazach sprzed tej kolumny).
+        Pusta baza -> same zera i game_day=None.
+        """
+        with self._read_conn() as conn:
+            if game_day is None:
+                row = conn.execute("SELECT game_day FROM telemetry_game_days "
+                                   "ORDER BY updated_at DESC, game_day DESC LIMIT 1").fetchone()
+                game_day = row[0] if row else None
+            out: Dict[str, Any] = {"game_day": game_day, "day": 0, "week": 0, "fortnight": 0,
+                                   "work_day": 0, "work_week": 0, "game_time": None}
+            if not game_day:
+                return out
+            d = date.fromisoformat(game_day)
+            week = iso_week(d)
+            try:
+                prev_week = iso_week(d - timedelta(days=7))
+            except OverflowError:
+                prev_week = week
+            row = conn.execute("SELECT drive_sec, work_sec, last_game_time FROM telemetry_game_days "
+                               "WHERE game_day=?", (game_day,)).fetchone()
+            if row:
+                out["day"], out["work_day"], out["game_time"] = int(row[0]), int(row[1]), row[2]
+            for wk, drive, work in conn.execute(
+                    "SELECT iso_week, SUM(drive_sec), SUM(work_sec) FROM telemetry_game_days "
+                    "WHERE iso_week IN (?, ?) GROUP BY iso_week", (week, prev_week)):
+                if wk == week:
+                    out["week"], out["work_week"] = int(drive or 0), int(work or 0)
+                out["fortnight"] += int(drive or 0)
+        return out
+
+    def between_game(self, gt_from: int, gt_to: int, with_raw: bool = False) -> List[Dict[str, Any]]:
+        """Ramki z przedziału czasu gry (sekundy jak game_time), w kolejności zapisu."""
+        with self._read_conn() as conn:
+            rows = conn.execute(
+                "SELECT ts_utc, game_time, speed_kmh, engine_on, parking_brake, nav_distance_m, "
+                "raw_json, raw_key, raw_delta "
+                "FROM telemetry_frames WHERE game_time BETWEEN ? AND ? ORDER BY id ASC",
+                (int(gt_from), int(gt_to))
+            ).fetchall()
+            out = []
+            for r in rows:
+                item = {"ts_utc": r[0], "game_time": r[1], "speed_kmh": r[2], "engine_on": bool(r[3]),
+                        "parking_brake": bool(r[4]), "nav_distance_m": r[5]}
+                if with_raw:
+                    item["raw"] = self._decode_raw(conn, r[6], r[7], r[8])
+                out.append(item)
+        return out
+
+    def game_activity(self, gt_from: int, gt_to: int) -> Dict[str, int]:
+        """
+        Sekundy jazdy/pracy/odpoczynku w przedziale czasu gry.
+
+        Część objęta surowymi ramkami liczona jest w SQL tak jak
+        GameDayAccumulator: odcinek do następnego wiersza dostaje stan
+        wcześniejszego, pauza nie nalicza nic, a luka > MAX_ACTIVE_GAP_SEC za
+        ciągiem pominiętych duplikatów (game_valid_until) to odpoczynek.
+        Retencja kasuje surowe ramki po keep_raw (czas rzeczywisty), więc
+        część starszą niż najstarsza zachowana ramka bierzemy z agregatu
+        telemetry_game_days – pełne dni gry od gt_from; z dnia, w którym
+        zaczynają się surowe ramki, tylko to, czego ramki już nie pokrywają.
+        """
+        with self._read_conn() as conn:
+            out = self._raw_activity(conn, gt_from, gt_to)
+            row = conn.execute(
+                "SELECT game_time FROM telemetry_frames WHERE game_time IS NOT NULL ORDER BY id LIMIT 1"
+            ).fetchone()
+            raw_from = int(row[0]) if row else None
+            if raw_from is not None and raw_from <= gt_from:
+                return out
+            split = gt_to + 1 if raw_from is None else min(raw_from, gt_to + 1)
+            day_from = -(-int(gt_from) // DAY_SEC) * DAY_SEC  # pierwsza pełna doba od gt_from
+            if day_from >= split:
+                return out
+            old = self._game_days_activity(conn, day_from, split - 1)
+            if split == raw_from and raw_from % DAY_SEC:
+                # dzień, w którym zaczynają się ramki: agregat liczy go całego, a część od raw_from
+                # jest już w out – zostaje tylko to, czego ramki nie pokrywają
+                day_end = (raw_from // DAY_SEC + 1) * DAY_SEC
+                covered = self._raw_activity(conn, raw_from, day_end - 1)
+                day = self._game_days_activity(conn, raw_from, raw_from)
+                for k, v in day.items():
+                    old[k] -= min(v, covered[k])
+        for k, v in old.items():
+            out[k] += v
+        return out
+
+    @staticmethod
+    def _raw_activity(conn: sqlite3.Connection, gt_from: int, gt_to: int) -> Dict[str, int]:
+        """Sekundy jazdy/pracy/odpoczynku z surowych ramek o game_time w [gt_from, gt_to]."""
+        out = {"drive_sec": 0, "work_sec": 0, "rest_sec": 0}
+        keys = ("drive_sec", "work_sec", "rest_sec")
+        rows = conn.execute(
+            "SELECT state, SUM(CASE WHEN span - held > ? THEN held ELSE span END),"
+            "  SUM(CASE WHEN span - held > ? THEN span - held ELSE 0 END) FROM ("
+            "  SELECT paused,"
+            "    CASE WHEN speed_kmh > ? THEN 0 WHEN engine_on THEN 1 ELSE 2 END AS state,"
+            "    LEAD(game_time) OVER (ORDER BY id) - game_time AS span,"
+            "    MAX(COALESCE(game_valid_until, game_time) - game_time, 0) AS held"
+            "  FROM telemetry_frames WHERE game_time BETWEEN ? AND ?"
+            ") WHERE span > 0 AND NOT paused GROUP BY state",
+            (MAX_ACTIVE_GAP_SEC, MAX_ACTIVE_GAP_SEC, DRIVE_SPEED_KMH, int(gt_from), int(gt_to))
+        ).fetchall()
+        for state, active, rest in rows:
+            out[keys[state]] += int(active or 0)
+            out["rest_sec"] += int(rest or 0)
+        return out
+
+    @staticmethod
+    def _game_days_activity(conn: sqlite3.Connection, gt_from: int, gt_to: int) -> Dict[str, int]:
+        """Sumy z telemetry_game_days dla pełnych dni gry od dnia gt_from do dnia gt_to."""
+        row = conn.execute(
+            "SELECT COALESCE(SUM(drive_sec), 0), COALESCE(SUM(work_sec), 0), COALESCE(SUM(rest_sec), 0)"
+            " FROM telemetry_game_days WHERE game_day BETWEEN ? AND ?",
+            (_game_day_key(gt_from), _game_day_key(gt_to))
+        ).fetchone()
+        return {"drive_sec": int(row[0]), "work_sec": int(row[1]), "rest_sec": int(row[2])}
+
+    def drive_seconds_game(self, days: float = 14, until: Optional[int] = None) -> int:
+        """Jazda w ostatnich 'days' dobach czasu gry (do 'until', domyślnie ostatniego czasu gry w bazie)."""
+        if until is None:
+            with self._read_conn() as conn:
+                row = conn.execute(
+                    "SELECT MAX(gt) FROM (SELECT MAX(game_time) AS gt FROM telemetry_frames"
+                    " UNION ALL SELECT MAX(last_game_time) FROM telemetry_game_days)"
+                ).fetchone()
+            if not row or row[0] is None:
+                return 0
+            until = int(row[0])
+        return self.game_activity(int(until - days * 86400), int(until))["drive_sec"]
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Połączenie tylko-do-odczytu z puli; gdy pula pusta – nowe (nie czekamy)."""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            return sqlite3.connect(self._ro_uri, uri=True, check_same_thread=False)
+
+    def _release_reader(self, conn: sqlite3.Connection) -> None:
+        # otwarta transakcja trzymałaby starą migawkę WAL i blokowała checkpoint
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        try:
+            self._readers.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def _read_conn(self) -> Iterator[sqlite3.Connection]:
+        """
+        Połączenie tylko-do-odczytu z puli (WAL – nie czeka na zapis).
+        Dla ':memory:' zwraca główne połączenie pod blokadą.
+        """
+        if self.path == ":memory:":
+            with self._lock:
+                yield self._conn
+            return
+        conn = self._acquire_reader()
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Zapytanie tylko-do-odczytu na połączeniu z puli (np. tabele agregatów retencji)."""
+        with self._read_conn() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def fetch_columns(self, ts_from: float, ts_to: float, max_points: Optional[int] = None,
+                      chunk_size: int = 4096) -> Dict[str, Any]:
+        """
+        Przedział ts_utc jako słownik tablic NumPy (klucze jak COLUMNAR_FIELDS):
+        ts, speed_kmh, engine_on, parking_brake, x, y, z, odometer.
+        Tablice są alokowane raz (COUNT w tej samej migawce odczytu) i wypełniane
+        paczkami prosto z kursora. max_points > 0 przerzedza wynik równym krokiem.
+        Wymaga numpy.
+        """
+        if not _HAS_NUMPY:
+            raise ImportError("TelemetryDB.fetch_columns requires numpy (pip install numpy)")
+        where = "FROM telemetry_frames WHERE ts_utc BETWEEN ? AND ?"
+        params = (float(ts_from), float(ts_to))
+        chunk_size = max(1, int(chunk_size))
+        with self._read_conn() as conn:
+            if conn is not self._conn:
+                conn.execute("BEGIN")  # jedna migawka dla COUNT i SELECT
+            total = int(conn.execute("SELECT COUNT(*) " + where, params).fetchone()[0])
+            stride = 1
+            if max_points and total > int(max_points):
+                stride = -(-total // int(max_points))
+            size = -(-total // stride) if total else 0
+            out = {key: np.empty(size, dtype=dt) for key, _, dt in COLUMNAR_FIELDS}
+            cur = conn.execute(
+                f"SELECT {', '.join(expr for _, expr, _ in COLUMNAR_FIELDS)} {where} ORDER BY ts_utc ASC", params
+            )
+            filled = 0
+            seen = 0
+            while filled < size:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                # wiersze o globalnym indeksie podzielnym przez stride
+                picked = rows[(-seen) % stride::stride]
+                seen += len(rows)
+                if not picked:
+                    continue
+                picked = picked[:size - filled]
+                block = np.array(picked, dtype=np.float64)
+                for j, (key, _, _) in enumerate(COLUMNAR_FIELDS):
+                    out[key][filled:filled + len(picked)] = block[:, j]
+                filled += len(picked)
+            if conn is not self._conn:
+                conn.rollback()
+        if filled < size:
+            out = {k: v[:filled] for k, v in out.items()}
+        return out
+
+    # ---------------------------------------------------------------
+    # Odczyt strumieniowy (stała pamięć)
+    # ---------------------------------------------------------------
+    def _iter_rows(self, sql: str, params: tuple, chunk_size: int, row_type: str,
+                   with_raw: bool) -> Iterator[Union[Dict[str, Any], tuple, FrameRow]]:
+        """
+        Wspólny generator: połączenie tylko-do-odczytu z puli (WAL nie blokuje
+        zapisu), wiersze pobierane paczkami przez fetchmany(chunk_size).
+        Baza ':memory:' nie ma osobnego pliku – wtedy czytamy z głównego połączenia.
+        """
+        if row_type not in ("dict", "tuple", "row"):
+            raise ValueError(f"row_type must be 'dict', 'tuple' or 'row', got {row_type!r}")
+        own = self.path != ":memory:"
+        conn = self._acquire_reader() if own else self._conn
+        cur = None
+        try:
+            if own:
+                cur = conn.execute(sql, params)
+            else:
+                with self._lock:
+                    cur = conn.execute(sql, params)
+            n = len(STREAM_COLUMNS)
+            while True:
+                if own:
+                    rows = cur.fetchmany(chunk_size)
+                else:
+                    with self._lock:
+                        rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for r in rows:
+                    raw = self._decode_raw(conn, r[n], r[n + 1], r[n + 2]) if with_raw else None
+                    if row_type == "tuple":
+                        yield r[:n] + ((raw,) if with_raw else ())
+                    elif row_type == "row":
+                        yield FrameRow(*r[:n], raw)
+                    else:
+                        item = dict(zip(STREAM_COLUMNS, r[:n]))
+                        for k in ("paused", "engine_on", "parking_brake"):
+                            item[k] = bool(item[k])
+                        if with_raw:
+                            item["raw"] = raw
+                        yield item
+        finally:
+            if cur is not None:
+                cur.close()
+            if own:
+                self._release_reader(conn)
+
+    def iter_between(self, ts_from: float, ts_to: float, chunk_size: int = 1000,
+                     row_type: str = "dict", with_raw: bool = False
+                     ) -> Iterator[Union[Dict[str, Any], tuple, FrameRow]]:
+        """
+        Generator ramek z przedziału ts_utc (rosnąco) w stałej pamięci.
+        row_type: 'dict' (klucze jak STREAM_COLUMNS), 'tuple' (surowe krotki) albo 'row' (FrameRow).
+        """
+        return self._iter_rows(_STREAM_SELECT + "WHERE ts_utc BETWEEN ? AND ? ORDER BY ts_utc ASC",
+                               (float(ts_from), float(ts_to)), max(1, int(chunk_size)), row_type, with_raw)
+
+    def iter_last_n(self, n: int = 100, chunk_size: int = 1000,
+                    row_type: str = "dict", with_raw: bool = False
+                    ) -> Iterator[Union[Dict[str, Any], tuple, FrameRow]]:
+        """Generator n najnowszych ramek (od najnowszej), jak last_n()."""
+        return self._iter_rows(_STREAM_SELECT + "ORDER BY id DESC LIMIT ?",
+                               (int(n),), max(1, int(chunk_size)), row_type, with_raw)
@@ -0,0 +1,268 @@
+# ritt/telemetry/stream.py
+"""
+Telemetria strumieniowa (push) zamiast odpytywania.
+
+Protokół: TCP, jedna ramka = jedna linia JSON zakończona '\\n'. Serwer wysyła
+ramkę tylko wtedy, gdy się zmieniła; w ciszy co heartbeat_sec wysyła pustą
+linię (heartbeat), żeby klient odróżnił „nic się nie dzieje” od zerwanego
+połączenia.
+
+TelemetryStream – klient (tryb 'stream' w factory.build_provider):
+  • for raw in stream.frames()        – iterator blokujący, ramka zaraz po nadejściu,
+  • async for raw in stream           – to samo dla asyncio,
+  • poll()                            – zgodność z providerami: ostatnia ramka
+                                        (czytnik w tle startuje przy pierwszym wywołaniu).
+Po zerwaniu połączenia klient łączy się ponownie co reconnect_sec.
+
+StreamServer – lokalny stand-in serwera: odpytuje dowolny provider
+(np. TelemetrySim, TelemetryReplay) i rozsyła zmienione ramki klientom.
+"""
+from __future__ import annotations
+import asyncio, json, socket, threading, time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .jsondecode import loads
+
+HEARTBEAT = b"\n"
+
+
+def parse_addr(addr: str, default_port: int = 25556) -> Tuple[str, int]:
+    """'host:port' albo 'tcp://host:port' -> (host, port)."""
+    addr = addr.split("://", 1)[-1].strip().rstrip("/")
+    host, _, port = addr.rpartition(":")
+    if not host:
+        return addr or "127.0.0.1", default_port
+    return host, int(port)
+
+
+def encode_frame(raw: Dict[str, Any]) -> bytes:
+    return json.dumps(raw, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class TelemetryStream:
+    """Klient strumienia ramek (linie JSON po TCP)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 25556,
+                 connect_timeout: float = 1.0, idle_timeout: float = 3.0, reconnect_sec: float = 1.0):
+        self.host = host
+        self.port = int(port)
+        self.connect_timeout = float(connect_timeout)
+        self.idle_timeout = float(idle_timeout)     # brak ramek i heartbeatów = połączenie martwe
+        self.reconnect_sec = float(reconnect_sec)
+        self.connected = False
+        self.frames_received = 0
+        self.reconnects = 0
+        self.last_error = ""
+        self._closed = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._latest: Optional[Dict[str, Any]] = None
+        self._reader: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------------
+    # Iterator blokujący
+    # ---------------------------------------------------------------
+    def _open(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.idle_timeout)
+        return sock
+
+    def frames(self) -> Iterator[Dict[str, Any]]:
+        """Ramki w kolejności nadejścia, aż do close(); ponowne łączenie po zerwaniu."""
+        first = True
+        while not self._closed.is_set():
+            if not first:
+                self.reconnects += 1
+                if self._closed.wait(self.reconnect_sec):
+                    return
+            first = False
+            try:
+                sock = self._open()
+            except OSError as e:
+                self.last_error = str(e)
+                continue
+            self._sock = sock
+            self.connected = True
+            try:
+                with sock.makefile("rb") as f:
+                    for line in f:
+                        if line == HEARTBEAT:
+                            continue
+                        raw = loads(line)
+                        self.frames_received += 1
+                        yield raw
+                self.last_error = "server closed connection"
+            except (OSError, ValueError) as e:
+                if not self._closed.is_set():
+                    self.last_error = str(e)
+            finally:
+                self.connected = False
+                self._sock = None
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+    __iter__ = frames
+
+    # ---------------------------------------------------------------
+    # asyncio
+    # ---------------------------------------------------------------
+    async def aframes(self) -> AsyncIterator[Dict[str, Any]]:
+        """Jak frames(), ale dla asyncio (StreamReader zamiast blokującego gniazda)."""
+        first = True
+        while not self._closed.is_set():
+            if not first:
+                self.reconnects += 1
+                await asyncio.sleep(self.reconnect_sec)
+            first = False
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.last_error = str(e) or "connect timeout"
+                continue
+            self.connected = True
+            try:
+                while not self._closed.is_set():
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                    if not line:
+                        self.last_error = "server closed connection"
+                        break
+                    if line == HEARTBEAT:
+                        continue
+                    raw = loads(line)
+                    self.frames_received += 1
+                    yield raw
+            except (OSError, ValueError, asyncio.TimeoutError) as e:
+                self.last_error = str(e) or "idle timeout"
+            finally:
+                self.connected = False
+                writer.close()
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self.aframes()
+
+    # ---------------------------------------------------------------
+    # Zgodność z providerami odpytywanymi
+    # ---------------------------------------------------------------
+    def _read_loop(self) -> None:
+        for raw in self.frames():
+            self._latest = raw
+
+    def poll(self) -> Dict[str, Any]:
+        """Ostatnia odebrana ramka (bez czekania); błąd, gdy strumień nie działa."""
+        with self._lock:
+            if self._reader is None:
+                self._reader = threading.Thread(target=self._read_loop, name="telemetry-stream", daemon=True)
+                self._reader.start()
+        if not self.connected or self._latest is None:
+            raise ConnectionError(f"telemetry stream {self.host}:{self.port} not connected: {self.last_error or 'connecting'}")
+        return self._latest
+
+    fetch = poll
+
+    def stats(self) -> Dict[str, Any]:
+        return {"connected": self.connected, "frames": self.frames_received,
+                "reconnects": self.reconnects, "last_error": self.last_error}
+
+    def close(self) -> None:
+        self._closed.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class StreamServer:
+    """Stand-in serwera push: odpytuje provider i rozsyła zmienione ramki do klientów."""
+
+    def __init__(self, source, host: str = "127.0.0.1", port: int = 0,
+                 interval_ms: int = 20, heartbeat_sec: float = 1.0):
+        self.source = source
+        self.interval_sec = max(0.001, interval_ms / 1000.0)
+        self.heartbeat_sec = float(heartbeat_sec)
+        self.frames_sent = 0
+        self._listener = socket.create_server((host, port))
+        self.address: Tuple[str, int] = self._listener.getsockname()[:2]
+        self._clients: List[socket.socket] = []
+        self._last_line: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._accept_loop, name="stream-accept", daemon=True),
+                         threading.Thread(target=self._push_loop, name="stream-push", daemon=True)]
+
+    def start(self) -> "StreamServer":
+        for t in self._threads:
+            t.start()
+        return self
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._clients.append(conn)
+                last = self._last_line
+            if last is not None:
+                self._send_to([conn], last)  # nowy klient od razu dostaje bieżący stan
+
+    def _send_to(self, clients: List[socket.socket], line: bytes) -> None:
+        for c in clients:
+            try:
+                c.sendall(line)
+            except OSError:
+                with self._lock:
+                    if c in self._clients:
+                        self._clients.remove(c)
+                c.close()
+
+    def _push_loop(self) -> None:
+        last: Optional[bytes] = None
+        last_sent = time.monotonic()
+        while not self._stop.wait(self.interval_sec):
+            try:
+                raw = self.source.poll()
+            except Exception as e:
+                print(f"[StreamServer] source error: {e}")
+                continue
+            now = time.monotonic()
+            line = encode_frame(raw)  # porównujemy zakodowane linie – provider może zmieniać dict w miejscu
+            if line != last:
+                last = line
+                self.frames_sent += 1
+            elif now - last_sent >= self.heartbeat_sec:
+                line = HEARTBEAT
+            else:
+                continue
+            with self._lock:
+                if line is not HEARTBEAT:
+                    self._last_line = line
+                clients = list(self._clients)
+            self._send_to(clients, line)
+            last_sent = now
+
+    def close(self) -> None:
+        self._stop.set()
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)  # budzi accept() w wątku
+        except OSError:
+            pass
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for c in clients:
+            try:
+                c.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            c.close()
@@ -0,0 +1,145 @@
+# ritt/telemetry/transport.py
+"""
+Trwałe połączenie HTTP/1.1 (keep-alive) do lokalnego serwera telemetrii.
+
+Zamiast nowego połączenia TCP przy każdym odczycie (requests.get / urlopen)
+trzymamy jedno otwarte połączenie http.client i używamy go ponownie.
+Po błędzie (serwer zamknął połączenie, reset, timeout) połączenie jest
+zamykane, a żądanie ponawiane raz na świeżym połączeniu.
+
+Statystyki (stats()): liczba żądań/połączeń/błędów oraz czasy w ms –
+connect (zestawienie TCP), read (od wysłania żądania do odczytu całej
+odpowiedzi): ostatni, średnia krocząca (EWMA) i maksimum.
+"""
+from __future__ import annotations
+import http.client, socket, threading, time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+# błędy, po których warto spróbować jeszcze raz na nowym połączeniu
+_RETRYABLE = (http.client.RemoteDisconnected, http.client.BadStatusLine, http.client.CannotSendRequest,
+              http.client.ResponseNotReady, ConnectionError, BrokenPipeError)
+
+_EWMA_ALPHA = 0.2
+
+
+class HTTPStatusError(IOError):
+    """Odpowiedź HTTP inna niż 2xx."""
+    def __init__(self, status: int, reason: str, url: str):
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.status = status
+
+
+class KeepAliveSession:
+    """Jedno trwałe połączenie do 'url'; get() jest bezpieczne wątkowo."""
+
+    def __init__(self, url: str, timeout: float = 0.5):
+        parts = urlsplit(url)
+        self.url = url
+        self.timeout = float(timeout)
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname or "127.0.0.1"
+        self._port = parts.port or (443 if self._https else 80)
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._headers = {"Host": parts.netloc, "Connection": "keep-alive", "Accept": "application/json"}
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "requests": 0, "connects": 0, "reconnects": 0, "errors": 0,
+            "connect_ms": None, "connect_ms_avg": None, "connect_ms_max": 0.0,
+            "read_ms": None, "read_ms_avg": None, "read_ms_max": 0.0,
+        }
+
+    # ---------------------------------------------------------------
+    # Połączenie
+    # ---------------------------------------------------------------
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        conn = cls(self._host, self._port, timeout=self.timeout)
+        t0 = time.perf_counter()
+        conn.connect()
+        self._record("connect", (time.perf_counter() - t0) * 1000.0)
+        try:
+            # małe żądania – bez opóźnienia Nagle'a
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, AttributeError):
+            pass
+        self._stats["connects"] += 1
+        return conn
+
+    def _drop(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+    # ---------------------------------------------------------------
+    # Żądanie
+    # ---------------------------------------------------------------
+    def _request(self) -> bytes:
+        if self._conn is None:
+            self._conn = self._connect()
+        t0 = time.perf_counter()
+        self._conn.request("GET", self._path, headers=self._headers)
+        resp = self._conn.getresponse()
+        body = resp.read()  # całość – inaczej połączenia nie da się użyć ponownie
+        self._record("read", (time.perf_counter() - t0) * 1000.0)
+        if resp.will_close:
+            self._drop()
+        if not 200 <= resp.status < 300:
+            raise HTTPStatusError(resp.status, resp.reason, self.url)
+        return body
+
+    def get(self) -> bytes:
+        """Zwraca treść odpowiedzi GET; jedno ponowienie po zerwanym połączeniu."""
+        with self._lock:
+            self._stats["requests"] += 1
+            reused = self._conn is not None
+            try:
+                return self._request()
+            except HTTPStatusError:
+                self._stats["errors"] += 1
+                raise
+            except _RETRYABLE:
+                self._drop()
+                if not reused:
+                    self._stats["errors"] += 1
+                    raise
+            except Exception:
+                # timeout itp. – stan połączenia nieznany, następnym razem od nowa
+                self._drop()
+                self._stats["errors"] += 1
+                raise
+            # serwer zamknął bezczynne połączenie – jedno ponowienie na nowym
+            self._stats["reconnects"] += 1
+            try:
+                return self._request()
+            except Exception:
+                self._drop()
+                self._stats["errors"] += 1
+                raise
+
+    def get_text(self, encoding: str = "utf-8") -> str:
+        return self.get().decode(encoding, "replace")
+
+    # ---------------------------------------------------------------
+    # Statystyki
+    # ---------------------------------------------------------------
+    def _record(self, kind: str, ms: float) -> None:
+        s = self._stats
+        s[f"{kind}_ms"] = ms
+        avg = s[f"{kind}_ms_avg"]
+        s[f"{kind}_ms_avg"] = ms if avg is None else avg + _EWMA_ALPHA * (ms - avg)
+        if ms > s[f"{kind}_ms_max"]:
+            s[f"{kind}_ms_max"] = ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Kopia statystyk połączenia (czasy w ms)."""
+        with self._lock:
+            return dict(self._stats)
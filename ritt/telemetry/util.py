@@ -40,3 +40,55 @@ def first_present(data: Mapping[str, Any] | None, candidates: Iterable[str], def
         if val is not None:
             return val
     return default
+
+_MISSING = object()
+
+class PathAccessor:
+    """
+    Skompilowany odpowiednik first_present(): ścieżki są dzielone na części raz,
+    przy tworzeniu, a ścieżka, która ostatnio zwróciła wartość, zostaje
+    „przypięta” (ta sama wersja pluginu = ten sam układ JSON). Kolejne odczyty
+    to kilka bezpośrednich data[k]; pełne przeszukanie kandydatów (w kolejności)
+    tylko wtedy, gdy przypięta ścieżka zniknie lub ma wartość None.
+    """
+    __slots__ = ("paths", "default", "_split", "_pinned")
+
+    def __init__(self, candidates: Iterable[str], default: Any = None):
+        self.paths = tuple(candidates)
+        self.default = default
+        self._split = tuple(tuple(p.split(".")) for p in self.paths)
+        self._pinned: tuple | None = None
+
+    @staticmethod
+    def _walk(data: Any, parts: tuple) -> Any:
+        cur = data
+        try:
+            for part in parts:
+                cur = cur[part]
+        except (KeyError, TypeError, IndexError):
+            return None
+        return cur
+
+    def __call__(self, data: Mapping[str, Any] | None, default: Any = _MISSING) -> Any:
+        if default is _MISSING:
+            default = self.default
+        if data is None:
+            return default
+        pinned = self._pinned
+        if pinned is not None:
+            val = self._walk(data, pinned)
+            if val is not None:
+                return val
+        for parts in self._split:
+            if parts is pinned:
+                continue
+            val = self._walk(data, parts)
+            if val is not None:
+                self._pinned = parts
+                return val
+        return default
+
+    @property
+    def pinned_path(self) -> str | None:
+        """Aktualnie przypięta ścieżka (diagnostyka) albo None."""
+        return ".".join(self._pinned) if self._pinned is not None else None
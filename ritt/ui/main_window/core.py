@@ -6,8 +6,11 @@ from ritt.ui.brand import BrandHeader
 from ritt.api import NetSignals, NetClient
 from ritt.telemetry.factory import build_provider
 from ritt.telemetry.service import TelemetryService
+from ritt.telemetry.bus import TelemetryBus
 from ritt.telemetry.store import TelemetryDB
-from ritt.telemetry.mappers.funbit_v9 import normalize_funbit_v9
+from ritt.telemetry.retention import TelemetryRetention
+from ritt.telemetry.scheduler import AdaptivePollScheduler
+from ritt.telemetry.mappers.funbit_v9 import FunbitMapper
 from ritt.breaks import BreakManager
 from ritt.ui.views.main_tab import MainTab
 from ritt.ui.views.breaks_tab import BreaksTab
@@ -18,10 +21,13 @@ from .history import HistoryMixin
 from .telemetry_loop import TelemetryMixin
 from .breaks_control import BreaksMixin
 from .overlay_control import OverlayMixin
+from .telemetry_events import TelemetryEventsMixin
 from ritt.i18n import get_tr, LANGS
 from ritt.integrations.events import send_event_to_n8n
+from ritt.config import CFG
 
-class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, OverlayMixin):
+
+class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, OverlayMixin, TelemetryEventsMixin):
     """Główne okno tachografu RITT PRO"""
     def __init__(self, lang="pl"):
         super().__init__()
@@ -33,10 +39,28 @@ class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, O
         self.net = NetClient(self.netSignals)
         self.telemetry_service = TelemetryService(
             provider=build_provider(),
-            mapper=normalize_funbit_v9,
-            db=TelemetryDB("telemetry.sqlite")
+            # schemat pól wykrywany raz na sesję; pełna ramka, bo zapis do DB i tak czyta wszystkie sekcje
+            mapper=FunbitMapper(),
+            db=TelemetryDB("telemetry.sqlite", async_writes=True),
         )
+        # surowe ramki 48 h, potem agregaty 1 min / 1 h (zwijanie w tle)
+        self.telemetry_retention = TelemetryRetention(self.telemetry_service.db)
+        self.telemetry_retention.start()
         self.breaks = BreakManager()
+        # zbocza (silnik, ręczny, ruszenie, zlecenie...) -> auto-koniec przerwy, n8n, pasek statusu
+        self._init_telemetry_events()
+        self.telemetry_bus = None
+        if CFG.get("bus_interval_ms", 0) > 0:
+            # jedna akwizycja, każdy odbiorca we własnym wątku – wolny odbiorca nie blokuje UI ani zapisu
+            # bus_interval_ms to tempo startowe; dalej szyna idzie za AdaptivePollScheduler (_tick_threaded)
+            bus = TelemetryBus(self.telemetry_service, interval_ms=CFG["bus_interval_ms"])
+            self.telemetry_service.attach_bus(bus, rate_hz=4)  # tick UI czyta ostatnią ramkę
+            bus.subscribe("db", self.telemetry_service.db.insert_many, rate_hz=1, policy="all", batch=True)
+            bus.subscribe("events", self.edges.feed, policy="all")  # pełne ramki: także naczepa i zlecenie
+            self.telemetry_bus = bus.start()
+        else:
+            # provider strumieniowy (mode = stream): ramki zapisywane zaraz po nadejściu, tick bierze ostatnią
+            self.telemetry_service.start_stream()
         self.vehicle_id = "TRUCK_01"
         self.current_job_status = "idle"
 
@@ -50,6 +74,7 @@ class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, O
         self.daily_drive_sec = 0
         self.week_drive_sec = 0
         self.fortnight_drive_sec = 0
+        self._restore_counters_from_db()
 
         # --- UI ---
         central = QWidget(); self.setCentralWidget(central)
@@ -90,21 +115,43 @@ class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, O
         install_3d_effects(self)
 
         # --- Ustawienia / historia ---
+        self.poll_rate_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.poll_rate_label)
         self.statusBar().addPermanentWidget(QSizeGrip(self))
         self._settings = QSettings("RITT", "Tachograph")
         self._history_file = self._history_path()
         self._history_load()  # ✅ teraz działa, bo breaksTab już istnieje
 
         # --- Timery ---
+        # tempo odczytu zależy od stanu gry (jazda/postój/pauza/brak serwera)
+        self.poll_scheduler = AdaptivePollScheduler(fast_ms=250)
+        self._tick_thread = None
         self.game_tick = QTimer(self)
         self.game_tick.timeout.connect(self._tick_threaded)
-        self.game_tick.start(250)
+        self.game_tick.start(self.poll_scheduler.interval_ms)
 
         # Wyłączony automatyczny refresh — dane idą tylko po zakończeniu zlecenia
         self.points_timer = None
 
         self.refresh_labels(force=True)
 
+    def _restore_counters_from_db(self):
+        """Odtwarza liczniki dzienne/tygodniowe/dwutygodniowe z agregatu dni gry."""
+        try:
+            totals = self.telemetry_service.db.game_day_totals()
+        except Exception as e:
+            print(f"[UI] restore counters: {e}")
+            return
+        self.daily_drive_sec = totals["day"]
+        self.week_drive_sec = totals["week"]
+        self.fortnight_drive_sec = totals["fortnight"]
+        self.breaks.restore_counters(
+            # w BreakManager czas pracy obejmuje też jazdę
+            drive_today=totals["day"], work_today=totals["day"] + totals["work_day"],
+            drive_this_week=totals["week"], work_this_week=totals["week"] + totals["work_week"],
+            drive_14days=totals["fortnight"], game_unix_sec=totals["game_time"],
+        )
+
     def _show_logged_user_on_brand(self):
         """Pokazuje aktualnie zalogowanego użytkownika w nagłówku"""
         if hasattr(self, "brand"):
@@ -125,6 +172,24 @@ class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, O
         self.logged_user = name or login
         self._show_logged_user_on_brand()
 
+    def closeEvent(self, e):
+        """Zatrzymuje tick i dopisuje zakolejkowane ramki telemetrii przed zamknięciem."""
+        try:
+            self.game_tick.stop()
+            if self.telemetry_bus is not None:
+                self.telemetry_bus.close()  # zamyka provider; ostatnia paczka trafia do DB przed db.close()
+            else:
+                close = getattr(self.telemetry_service.provider, "close", None)
+                if callable(close):
+                    close()  # połączenie HTTP, nagranie (RecordingProvider) itp.
+            self.telemetry_retention.stop()
+            db = getattr(self.telemetry_service, "db", None)
+            if db is not None:
+                db.close()
+        except Exception as ex:
+            print("[UI] closeEvent:", ex)
+        super().closeEvent(e)
+
     def change_lang(self):
         """Zmienia język interfejsu po zmianie w polu wyboru"""
         code = self.lang_box.currentData()
@@ -215,7 +280,22 @@ class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, O
 
     def _tick_threaded(self):
         import threading
-        threading.Thread(target=self.tick_from_game, daemon=True).start()
+        # interwał wyliczony przez poprzedni tick – QTimer zmieniamy tylko w wątku GUI
+        iv = self.poll_scheduler.interval_ms
+        if self.game_tick.interval() != iv:
+            self.game_tick.setInterval(iv)
+        # to samo tempo dla akwizycji szyny i wątków źródeł multipleksera (bez zmiany – no-op)
+        if self.telemetry_bus is not None:
+            self.telemetry_bus.set_interval(iv)
+        set_interval = getattr(self.telemetry_service.provider, "set_interval", None)
+        if callable(set_interval):
+            set_interval(iv)
+        self.poll_rate_label.setText(f"Telemetria: {self.poll_scheduler.describe()}")
+        # poprzedni odczyt jeszcze trwa (np. timeout serwera) – nie mnożymy wątków
+        if self._tick_thread is not None and self._tick_thread.is_alive():
+            return
+        self._tick_thread = threading.Thread(target=self.tick_from_game, daemon=True)
+        self._tick_thread.start()
 
     def _optimize_tab_switch(self, index):
         """Optymalizacja przełączania zakładek – tymczasowe wyłączenie redraw."""
@@ -250,6 +330,11 @@ class TachographWindow(QMainWindow, HistoryMixin, TelemetryMixin, BreaksMixin, O
             else:
                 print("[DISPATCH] Brak połączenia z n8n.")
 
+            # dystans następnego zlecenia liczony od bieżącego odczytu licznika
+            db = getattr(self.telemetry_service, "db", None)
+            if db is not None:
+                db.start_job()
+
         except Exception as e:
             print(f"[DISPATCH] Unexpected error in complete_job: {e}")
 
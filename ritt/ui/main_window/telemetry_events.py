@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from PySide6.QtCore import QObject, Signal
+from ritt.config import CFG
+from ritt.telemetry.events import (
+    EdgeDetector, ENGINE_ON, ENGINE_OFF, PARKING_BRAKE_SET, PARKING_BRAKE_RELEASED,
+    MOVING_START, MOVING_STOP, TRAILER_ATTACHED, TRAILER_DETACHED, JOB_STARTED, JOB_FINISHED,
+    GAME_TIME_JUMP,
+)
+from ritt.integrations.events import send_event_to_n8n
+from .ui_helpers import fmt_hm
+
+# zbocza wysyłane do n8n (event_type = rodzaj zdarzenia)
+_N8N_EVENTS = (ENGINE_ON, ENGINE_OFF, PARKING_BRAKE_SET, PARKING_BRAKE_RELEASED, MOVING_START, MOVING_STOP,
+               TRAILER_ATTACHED, TRAILER_DETACHED, JOB_STARTED, JOB_FINISHED)
+# zbocza łamiące warunki przerwy (silnik OFF, ręczny ON, postój) -> automatyczne zakończenie
+_BREAK_GUARD = (ENGINE_ON, PARKING_BRAKE_RELEASED, MOVING_START)
+
+
+def _frame_state(frame) -> dict:
+    """engine_on / speed_kmh / parking_brake z ramki (TelemetryFrame albo płaski słownik)."""
+    get = frame.get if isinstance(frame, dict) else (lambda k, d=None: getattr(frame, k, d))
+    out = {}
+    for key, conv in (("engine_on", bool), ("speed_kmh", float), ("parking_brake", bool)):
+        v = get(key)
+        if v is not None:
+            out[key] = conv(v)
+    return out
+
+
+class EdgeSignals(QObject):
+    event = Signal(object)
+
+
+class TelemetryEventsMixin:
+    def _init_telemetry_events(self):
+        """Detektor zboczy; zdarzenia z wątku telemetrii trafiają do wątku GUI sygnałem Qt."""
+        self.edges = EdgeDetector(
+            debounce_ms=CFG.get("edge_debounce_ms", 500),
+            move_on_kmh=CFG.get("edge_move_on_kmh", 2.0),
+            move_off_kmh=CFG.get("edge_move_off_kmh", 0.5),
+            time_jump_min=CFG.get("edge_time_jump_min", 30),
+        )
+        self.edgeSignals = EdgeSignals()
+        self.edgeSignals.event.connect(self._on_telemetry_event)
+        self.edges.subscribe(self.edgeSignals.event.emit)
+
+    def _on_telemetry_event(self, ev):
+        """Obsługa zdarzenia w wątku GUI."""
+        if ev.kind in _BREAK_GUARD and self.breaks.on_break:
+            self.stop_break()
+            self.statusBar().showMessage(
+                self.tr.get("break_cancelled_guard",
+                            "Przerwa przerwana: silnik włączony lub hamulec ręczny zwolniony.")
+                + f" ({ev.label})", 4000)
+        elif ev.kind == GAME_TIME_JUMP:
+            sign = "+" if ev.value > 0 else "−"
+            self.statusBar().showMessage(f"{ev.label}: {sign}{fmt_hm(abs(ev.value))}", 4000)
+
+        if ev.kind in _N8N_EVENTS:
+            # stan z ramki zdarzenia – pola okna aktualizuje tick, mogą być jeszcze sprzed zbocza
+            send_event_to_n8n(self, ev.kind, ev.label, extra=_frame_state(ev.frame))
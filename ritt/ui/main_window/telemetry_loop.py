@@ -7,16 +7,36 @@ from ritt.integrations.events import send_event_to_n8n
 DAILY_DRIVE_LIMIT_SEC = 9 * 3600
 WARN_REMAIN_DAILY_MIN = 15 * 60
 from ritt.ui.main_window.ui_helpers import fmt_game_clock
+# klucze poll_delta(), od których zależy zegar gry w UI
+_CLOCK_KEYS = ("game_time_unix", "game_time_iso", "game")
+
+
 class TelemetryMixin:
 
 
     def tick_from_game(self):
         """Odczytuje dane z gry i aktualizuje interfejs."""
+        scheduler = getattr(self, "poll_scheduler", None)
+        service = self.telemetry_service
         try:
-            d = self.telemetry_service.poll_normalized() or {}
+            # tylko zmienione klucze; pełny stan w service.delta_state
+            _, changed = service.poll_delta()
+            d = service.delta_state
+            if scheduler is not None:
+                scheduler.on_frame(d)
+            if getattr(self, "telemetry_bus", None) is None:
+                self.edges.feed(d)  # bez szyny zdarzenia z ramek ticku
         except Exception as e:
-            print(f"[tick] provider exception: {e}")
-            d = {}
+            if scheduler is None or scheduler.errors == 0:
+                print(f"[tick] provider exception: {e}")
+            if scheduler is not None:
+                scheduler.on_error()
+            service.reset_delta()
+            if getattr(self, "telemetry_bus", None) is None:
+                self.edges.reset()
+            d, changed = {}, None  # None = odśwież wszystko (zera po utracie danych)
+        # liczniki rosną o liczbę bazowych ticków (250 ms), niezależnie od tempa odczytu
+        steps = scheduler.take_ticks() if scheduler is not None else 1
 
         # --- dane podstawowe ---
         paused = bool(d.get("paused", False))
@@ -33,11 +53,12 @@ class TelemetryMixin:
         )
         self.game_time_iso = game_time_val
 
-        # --- aktualizacja GUI ---
-        if hasattr(self.mainTab, "set_speed"):
+        # --- aktualizacja GUI (tylko gdy zmieniło się to, co widać) ---
+        if hasattr(self.mainTab, "set_speed") and (changed is None or "speed_kmh" in changed):
             self.mainTab.set_speed(self.speed_kmh)
 
-        if hasattr(self.mainTab, "set_clock_text"):
+        if hasattr(self.mainTab, "set_clock_text") and (
+                changed is None or not changed.keys().isdisjoint(_CLOCK_KEYS)):
             readable = fmt_game_clock(game_time_val, self.lang)
             clock_txt = f"{self.tr['game_clock']}: {readable}"
             self.mainTab.set_clock_text(clock_txt)
@@ -45,10 +66,10 @@ class TelemetryMixin:
         # --- liczniki czasu jazdy / pracy ---
         if not paused and self.engine_on:
             if self.speed_kmh > 1.0:
-                self.driving_seconds += 1
-                self.working_seconds += 1
+                self.driving_seconds += steps
+                self.working_seconds += steps
             else:
-                self.working_seconds += 1
+                self.working_seconds += steps
 
         # --- diagnostyka (jeśli chcesz zobaczyć dane) ---
         # print(f"[TACHO] speed={self.speed_kmh:.1f} km/h, engine={self.engine_on}, time={readable}")